@@ -1,12 +1,34 @@
 import sys
-from PyQt6.QtWidgets import QApplication
-from workspace_gui.main_window import MainWindow
+
+from workspace_gui import startup_profile, tracing
 
 
 def main():
-    app = QApplication(sys.argv)
-    window = MainWindow()
-    window.show()
+    profiling = "--profile-startup" in sys.argv
+    if profiling:
+        sys.argv.remove("--profile-startup")
+        startup_profile.enable()
+    if "--trace" in sys.argv:
+        sys.argv.remove("--trace")
+        tracing.enable()
+
+    with startup_profile.section("import PyQt6"):
+        from PyQt6.QtCore import QTimer
+        from PyQt6.QtWidgets import QApplication
+    with startup_profile.section("import workspace_gui.main_window"):
+        from workspace_gui.main_window import MainWindow
+
+    with startup_profile.section("QApplication()"):
+        app = QApplication(sys.argv)
+    with startup_profile.section("MainWindow()"):
+        window = MainWindow()
+    with startup_profile.section("window.show()"):
+        window.show()
+
+    if profiling:
+        # first event-loop turn: the window has been laid out and painted
+        QTimer.singleShot(0, startup_profile.print_report)
+
     sys.exit(app.exec())
 
 
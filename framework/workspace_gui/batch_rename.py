@@ -0,0 +1,209 @@
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import List
+
+from .dedup import extract_unique
+from .metadata_engine import extract_metadata
+from .rules_engine import generate_names_for_folder
+
+STATUS_OK = "ok"
+STATUS_UNCHANGED = "unchanged"
+STATUS_RESOLVED = "resolved"
+STATUS_CONFLICT = "conflict"
+
+
+class BatchRenameError(Exception):
+    pass
+
+
+@dataclass
+class RenameOp:
+    source: str
+    new_name: str
+    status: str = STATUS_OK
+    note: str = ""
+
+    @property
+    def target(self):
+        return os.path.join(os.path.dirname(self.source), self.new_name)
+
+
+def default_journal_dir():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, "config", "rename_journals")
+
+
+def list_folder_files(folder):
+    with os.scandir(folder) as it:
+        return sorted(e.path for e in it if e.is_file(follow_symlinks=False))
+
+
+# ------------------------------------------------------------
+# Planning
+# ------------------------------------------------------------
+
+def plan_batch_rename(paths, settings_manager, metadata_for=extract_metadata,
+                      resolve_conflicts=True, progress=None) -> List[RenameOp]:
+    """
+    Builds a complete rename plan for paths using the default naming
+    preset, rendered for the whole batch in one call. Identical copies
+    are extracted once (dedup.extract_unique). Collisions inside the plan
+    and against files already on disk are checked in a single pass
+    afterwards. progress(done, total) is called after each file's
+    metadata is loaded.
+    """
+    found = extract_unique(paths, metadata_for, progress)
+    metadata_list = [found[p].raw_metadata for p in paths]
+
+    names = generate_names_for_folder(paths, settings_manager, metadata_list)
+    ops = [RenameOp(source=p, new_name=n) for p, n in zip(paths, names)]
+    validate_plan(ops, resolve_conflicts=resolve_conflicts)
+    return ops
+
+
+def validate_plan(ops, resolve_conflicts=False):
+    """
+    Sets status/note on every op. Each directory is listed once; a name
+    counts as taken if it exists on disk and isn't being renamed away, or
+    if an earlier op in the plan already claimed it. With
+    resolve_conflicts, clashing names get a numeric suffix instead.
+    """
+    on_disk = {}
+    for op in ops:
+        folder = os.path.dirname(op.source)
+        if folder not in on_disk:
+            try:
+                with os.scandir(folder) as it:
+                    on_disk[folder] = {e.name for e in it}
+            except OSError:
+                on_disk[folder] = set()
+
+    moving = {op.source for op in ops if os.path.basename(op.source) != op.new_name}
+    claimed = set()
+
+    for op in ops:
+        folder, old_name = os.path.split(op.source)
+        op.status, op.note = STATUS_OK, ""
+
+        if not op.new_name or os.sep in op.new_name:
+            op.status, op.note = STATUS_CONFLICT, "invalid name"
+            continue
+
+        if op.new_name == old_name:
+            op.status = STATUS_UNCHANGED
+            claimed.add(op.source)
+            continue
+
+        name = op.new_name
+        if _is_taken(folder, name, on_disk, moving, claimed):
+            if not resolve_conflicts:
+                op.status, op.note = STATUS_CONFLICT, "name already taken"
+                continue
+            stem, ext = os.path.splitext(name)
+            n = 2
+            while _is_taken(folder, f"{stem}_{n}{ext}", on_disk, moving, claimed):
+                n += 1
+            name = f"{stem}_{n}{ext}"
+            op.status, op.note = STATUS_RESOLVED, f"renamed from {op.new_name}"
+            op.new_name = name
+
+        claimed.add(os.path.join(folder, name))
+
+    return ops
+
+
+def _is_taken(folder, name, on_disk, moving, claimed):
+    path = os.path.join(folder, name)
+    if path in claimed:
+        return True
+    return name in on_disk[folder] and path not in moving
+
+
+# ------------------------------------------------------------
+# Execution / rollback
+# ------------------------------------------------------------
+
+def execute_plan(ops, journal_path=None):
+    """
+    Applies every renamable op, recording each step in a JSONL journal
+    (synced to disk) before it is made, so a crash mid-batch can still be
+    rolled back. If the plan swaps or chains names, sources are first
+    moved to temporary names. On failure the completed steps are rolled
+    back and BatchRenameError is raised. Returns the journal path.
+    """
+    todo = [op for op in ops if op.status in (STATUS_OK, STATUS_RESOLVED)]
+    if any(op.status == STATUS_CONFLICT for op in ops):
+        raise BatchRenameError("plan still has conflicts")
+
+    if journal_path is None:
+        journal_dir = default_journal_dir()
+        os.makedirs(journal_dir, exist_ok=True)
+        journal_path = os.path.join(
+            journal_dir, time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}.jsonl"
+        )
+
+    sources = {op.source for op in todo}
+    two_phase = any(op.target in sources for op in todo)
+
+    with open(journal_path, "w", encoding="utf-8") as journal:
+        try:
+            if two_phase:
+                staged = []
+                for i, op in enumerate(todo):
+                    folder, name = os.path.split(op.source)
+                    temp = os.path.join(folder, f".{name}.renaming-{os.getpid()}-{i}")
+                    _journaled_rename(journal, op.source, temp)
+                    staged.append((temp, op.target))
+                for temp, target in staged:
+                    _journaled_rename(journal, temp, target)
+            else:
+                for op in todo:
+                    _journaled_rename(journal, op.source, op.target)
+            os.fsync(journal.fileno())
+        except OSError as e:
+            journal.flush()
+            try:
+                rollback(journal_path)
+            except OSError as undo_error:
+                raise BatchRenameError(
+                    f"rename failed: {e}; rollback incomplete: {undo_error} "
+                    f"(journal: {journal_path})"
+                ) from e
+            raise BatchRenameError(f"rename failed, batch rolled back: {e}") from e
+
+    return journal_path
+
+
+def _journaled_rename(journal, src, dst):
+    # intent first: rollback() skips steps whose target doesn't exist
+    journal.write(json.dumps({"from": src, "to": dst}) + "\n")
+    journal.flush()
+    os.fsync(journal.fileno())
+    os.rename(src, dst)
+
+
+def read_journal(journal_path):
+    steps = []
+    with open(journal_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                steps.append(json.loads(line))
+            except ValueError:
+                continue
+    return steps
+
+
+def rollback(journal_path):
+    """
+    Undoes a batch by replaying its journal in reverse. Steps that never
+    happened (target missing or source back in place) are skipped.
+    Returns the number of steps undone.
+    """
+    undone = 0
+    for step in reversed(read_journal(journal_path)):
+        if os.path.exists(step["to"]) and not os.path.exists(step["from"]):
+            os.rename(step["to"], step["from"])
+            undone += 1
+    return undone
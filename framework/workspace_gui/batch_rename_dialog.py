@@ -0,0 +1,143 @@
+import os
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox, QCheckBox
+)
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QColor
+
+from .batch_rename import (
+    BatchRenameError, STATUS_CONFLICT, STATUS_RESOLVED, STATUS_UNCHANGED,
+    execute_plan, rollback, validate_plan,
+)
+
+STATUS_COLORS = {
+    STATUS_CONFLICT: QColor("#f4c7c3"),
+    STATUS_RESOLVED: QColor("#fce8b2"),
+    STATUS_UNCHANGED: QColor("#eeeeee"),
+}
+
+
+class BatchRenameDialog(QDialog):
+    """
+    Reviewable rename plan:
+      - one row per file: current name | new name (editable) | status
+      - Apply runs the whole batch with a journal
+      - Roll Back undoes the last applied batch
+    Emits: renamed(list of (old_path, new_path))
+    """
+    renamed = pyqtSignal(list)
+
+    def __init__(self, ops, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Batch Rename")
+        self.resize(900, 600)
+        self.ops = ops
+        self.journal_path = None
+        self._populating = False
+
+        self._init_ui()
+        self._populate()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel(self)
+
+        self.table = QTableWidget(0, 3, self)
+        self.table.setHorizontalHeaderLabels(["Current name", "New name", "Status"])
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
+        self.table.verticalHeader().setVisible(False)
+        self.table.itemChanged.connect(self.on_item_changed)
+
+        self.auto_resolve = QCheckBox("Resolve conflicts with numeric suffixes", self)
+        self.auto_resolve.setChecked(True)
+        self.auto_resolve.toggled.connect(self.revalidate)
+
+        buttons = QHBoxLayout()
+        self.btn_apply = QPushButton("Apply", self)
+        self.btn_apply.clicked.connect(self.apply)
+        self.btn_rollback = QPushButton("Roll Back", self)
+        self.btn_rollback.setEnabled(False)
+        self.btn_rollback.clicked.connect(self.roll_back)
+        btn_close = QPushButton("Close", self)
+        btn_close.clicked.connect(self.accept)
+        buttons.addWidget(self.auto_resolve)
+        buttons.addStretch()
+        buttons.addWidget(self.btn_rollback)
+        buttons.addWidget(self.btn_apply)
+        buttons.addWidget(btn_close)
+
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.table, 1)
+        layout.addLayout(buttons)
+
+    def _populate(self):
+        self._populating = True
+        self.table.setRowCount(len(self.ops))
+        for row, op in enumerate(self.ops):
+            current = QTableWidgetItem(os.path.basename(op.source))
+            current.setFlags(current.flags() & ~Qt.ItemFlag.ItemIsEditable)
+            new = QTableWidgetItem(op.new_name)
+            status = QTableWidgetItem(op.status + (f" ({op.note})" if op.note else ""))
+            status.setFlags(status.flags() & ~Qt.ItemFlag.ItemIsEditable)
+
+            color = STATUS_COLORS.get(op.status)
+            if color is not None:
+                for item in (current, new, status):
+                    item.setBackground(color)
+
+            self.table.setItem(row, 0, current)
+            self.table.setItem(row, 1, new)
+            self.table.setItem(row, 2, status)
+        self._populating = False
+        self._update_summary()
+
+    def _update_summary(self):
+        conflicts = sum(1 for op in self.ops if op.status == STATUS_CONFLICT)
+        changes = sum(1 for op in self.ops if op.status != STATUS_UNCHANGED)
+        self.summary_label.setText(
+            f"{len(self.ops)} files, {changes} to rename, {conflicts} conflicts"
+        )
+        self.btn_apply.setEnabled(conflicts == 0 and changes > 0 and self.journal_path is None)
+
+    def on_item_changed(self, item):
+        if self._populating or item.column() != 1:
+            return
+        self.ops[item.row()].new_name = item.text().strip()
+        self.revalidate()
+
+    def revalidate(self):
+        validate_plan(self.ops, resolve_conflicts=self.auto_resolve.isChecked())
+        self._populate()
+
+    def apply(self):
+        try:
+            self.journal_path = execute_plan(self.ops)
+        except BatchRenameError as e:
+            QMessageBox.critical(self, "Batch Rename Failed", str(e))
+            return
+
+        done = [(op.source, op.target) for op in self.ops if op.status != STATUS_UNCHANGED]
+        self.btn_apply.setEnabled(False)
+        self.btn_rollback.setEnabled(True)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.summary_label.setText(f"Renamed {len(done)} files. Journal: {self.journal_path}")
+        self.renamed.emit(done)
+
+    def roll_back(self):
+        if not self.journal_path:
+            return
+        try:
+            undone = rollback(self.journal_path)
+        except OSError as e:
+            QMessageBox.critical(self, "Roll Back Failed", str(e))
+            return
+
+        reverted = [(op.target, op.source) for op in self.ops if op.status != STATUS_UNCHANGED]
+        self.btn_rollback.setEnabled(False)
+        self.summary_label.setText(f"Rolled back {undone} renames.")
+        self.renamed.emit(reverted)
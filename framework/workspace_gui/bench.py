@@ -0,0 +1,639 @@
+"""
+Headless benchmarks for the metadata and naming engines.
+
+    python -m workspace_gui.bench [-o results.json] [--scale small|medium|large]
+    python -m workspace_gui.bench --compare old.json new.json
+
+Generates a synthetic corpus in a temporary folder (text files of several
+sizes, PDFs with N pages, JPEGs with EXIF, a deep directory tree), runs
+each benchmark in a fresh process and reports throughput, p50/p99 latency
+and peak RSS. Results are written as JSON so two runs can be compared.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+RESULTS_VERSION = 1
+REGRESSION_THRESHOLD = 0.10
+
+SCALES = {
+    "small": {
+        "text_sizes": {"1k": 1024, "64k": 64 * 1024, "1m": 1024 * 1024},
+        "text_count": 20,
+        "pdf_pages": [1, 10, 50],
+        "pdf_count": 5,
+        "jpeg_count": 200,
+        "tree_depth": 4,
+        "tree_fanout": 4,
+        "tree_files": 5,
+        "naming_count": 2000,
+    },
+    "medium": {
+        "text_sizes": {"1k": 1024, "64k": 64 * 1024, "1m": 1024 * 1024, "16m": 16 * 1024 * 1024},
+        "text_count": 50,
+        "pdf_pages": [1, 10, 100],
+        "pdf_count": 10,
+        "jpeg_count": 1000,
+        "tree_depth": 5,
+        "tree_fanout": 5,
+        "tree_files": 10,
+        "naming_count": 10000,
+    },
+    "large": {
+        "text_sizes": {"1k": 1024, "1m": 1024 * 1024, "64m": 64 * 1024 * 1024},
+        "text_count": 100,
+        "pdf_pages": [1, 100, 500],
+        "pdf_count": 20,
+        "jpeg_count": 5000,
+        "tree_depth": 6,
+        "tree_fanout": 5,
+        "tree_files": 10,
+        "naming_count": 50000,
+    },
+}
+
+WORDS = (
+    "report project budget meeting summary draft review archive notes data "
+    "water quality sample county permit invoice contract terms amount due "
+    "department missouri usda irs dnr quarterly annual final revision"
+).split()
+
+
+# ------------------------------------------------------------
+# Synthetic corpus
+# ------------------------------------------------------------
+
+def _sentence(rng, n=12):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def make_text_file(path, size, rng):
+    line = (_sentence(rng) + "\n").encode()
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            f.write(line)
+            written += len(line)
+
+
+def make_pdf(path, pages, rng, title="Synthetic Report", author="Bench"):
+    """
+    Writes a small valid PDF with one line of Helvetica text per page and
+    an /Info dictionary.
+    """
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(None)
+    pages_obj = add(None)
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    kids = []
+    for _ in range(pages):
+        text = _sentence(rng).replace("(", "").replace(")", "")
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        content = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+            % (pages_obj, font, content)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+    )
+    info = add(
+        b"<< /Title (%s) /Author (%s) /CreationDate (D:20240115093000) >>"
+        % (title.encode(), author.encode())
+    )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(
+        b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+        % (len(objects) + 1, catalog, info, xref)
+    )
+    with open(path, "wb") as f:
+        f.write(out.getvalue())
+
+
+def _exif_segment(model, taken):
+    """
+    APP1 segment with IFD0 (Model, ExifIFD pointer) and an Exif IFD
+    (DateTimeOriginal), little-endian.
+    """
+    model_bytes = model.encode() + b"\0"
+    date_bytes = taken.encode() + b"\0"
+
+    ifd0_offset = 8
+    ifd0_size = 2 + 2 * 12 + 4
+    exif_offset = ifd0_offset + ifd0_size
+    exif_size = 2 + 1 * 12 + 4
+    model_offset = exif_offset + exif_size
+    date_offset = model_offset + len(model_bytes)
+
+    tiff = b"II*\0" + struct.pack("<I", ifd0_offset)
+    tiff += struct.pack("<H", 2)
+    tiff += struct.pack("<HHII", 0x0110, 2, len(model_bytes), model_offset)
+    tiff += struct.pack("<HHII", 0x8769, 4, 1, exif_offset)
+    tiff += struct.pack("<I", 0)
+    tiff += struct.pack("<H", 1)
+    tiff += struct.pack("<HHII", 0x9003, 2, len(date_bytes), date_offset)
+    tiff += struct.pack("<I", 0)
+    tiff += model_bytes + date_bytes
+
+    payload = b"Exif\0\0" + tiff
+    return b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+
+
+def make_jpeg(path, rng, size=(640, 480)):
+    """
+    JPEG with an EXIF APP1 segment. With Pillow the image data is real;
+    without it the file is header-only, which is all the EXIF reader needs.
+    """
+    taken = "2023:%02d:%02d 10:%02d:00" % (rng.randint(1, 12), rng.randint(1, 28), rng.randint(0, 59))
+    segment = _exif_segment(rng.choice(["BenchCam X1", "BenchCam Z9"]), taken)
+    body = b"\xff\xd9"
+    try:
+        from PIL import Image
+        buf = io.BytesIO()
+        Image.new("RGB", size, (rng.randrange(256), 80, 160)).save(buf, "JPEG", quality=80)
+        body = buf.getvalue()[2:]
+    except ImportError:
+        pass
+    with open(path, "wb") as f:
+        f.write(b"\xff\xd8" + segment + body)
+
+
+def make_tree(root, depth, fanout, files_per_dir, rng):
+    count = 0
+    stack = [(root, 0)]
+    while stack:
+        folder, level = stack.pop()
+        os.makedirs(folder, exist_ok=True)
+        for i in range(files_per_dir):
+            with open(os.path.join(folder, f"{rng.choice(WORDS)}_{i}.txt"), "w") as f:
+                f.write(_sentence(rng))
+            count += 1
+        if level < depth:
+            stack.extend((os.path.join(folder, f"d{j}"), level + 1) for j in range(fanout))
+    return count
+
+
+def build_corpus(root, scale, seed=1234):
+    """
+    Creates the corpus under root and returns {group: [paths]}.
+    """
+    rng = random.Random(seed)
+    corpus = {}
+
+    for label, size in scale["text_sizes"].items():
+        folder = os.path.join(root, "text", label)
+        os.makedirs(folder)
+        paths = []
+        for i in range(scale["text_count"] if size <= 1024 * 1024 else 3):
+            path = os.path.join(folder, f"notes_{i}.txt")
+            make_text_file(path, size, rng)
+            paths.append(path)
+        corpus[f"text_{label}"] = paths
+
+    for pages in scale["pdf_pages"]:
+        folder = os.path.join(root, "pdf", f"{pages}p")
+        os.makedirs(folder)
+        paths = []
+        for i in range(scale["pdf_count"]):
+            path = os.path.join(folder, f"report_{i}.pdf")
+            make_pdf(path, pages, rng)
+            paths.append(path)
+        corpus[f"pdf_{pages}p"] = paths
+
+    folder = os.path.join(root, "jpeg")
+    os.makedirs(folder)
+    paths = []
+    for i in range(scale["jpeg_count"]):
+        path = os.path.join(folder, f"IMG_{i:05d}.jpg")
+        make_jpeg(path, rng)
+        paths.append(path)
+    corpus["jpeg_exif"] = paths
+
+    tree_root = os.path.join(root, "tree")
+    make_tree(tree_root, scale["tree_depth"], scale["tree_fanout"], scale["tree_files"], rng)
+    corpus["tree"] = [tree_root]
+    return corpus
+
+
+# ------------------------------------------------------------
+# Measurements
+# ------------------------------------------------------------
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def measure(fn, items, repeat=1, nbytes=None):
+    """
+    Calls fn(item) for every item (repeat times) and summarises the
+    per-call latencies.
+    """
+    latencies = []
+    clock = time.perf_counter
+    start = clock()
+    for _ in range(repeat):
+        for item in items:
+            t0 = clock()
+            fn(item)
+            latencies.append(clock() - t0)
+    total = clock() - start
+
+    latencies.sort()
+    result = {
+        "ops": len(latencies),
+        "seconds": round(total, 6),
+        "ops_per_sec": round(len(latencies) / total, 1) if total else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+        "mean_ms": round(total / len(latencies) * 1000, 4) if latencies else 0.0,
+    }
+    if nbytes:
+        result["mb_per_sec"] = round(nbytes * repeat / total / 1e6, 1) if total else None
+    return result
+
+
+# ------------------------------------------------------------
+# Benchmarks (each runs in its own process)
+# ------------------------------------------------------------
+
+def _bench_extract(corpus, group):
+    from .metadata_engine import extract_metadata
+    paths = corpus[group]
+    nbytes = sum(os.path.getsize(p) for p in paths)
+    extract_metadata(paths[0], use_cache=False)  # warm imports
+    return measure(lambda p: extract_metadata(p, use_cache=False), paths, nbytes=nbytes)
+
+
+def _bench_pdf_info(corpus, group):
+    from .pdf_fast import read_pdf_info
+    paths = corpus[group]
+    return measure(read_pdf_info, paths, repeat=5)
+
+
+def _bench_cache_hit(corpus, group):
+    from .metadata_cache import MetadataCache
+    from .metadata_engine import extract_metadata
+    paths = corpus[group]
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = MetadataCache(os.path.join(tmp, "cache.sqlite"))
+        extractor = lambda p: extract_metadata(p, use_cache=False)
+        for p in paths:
+            cache.get_or_extract(p, extractor)
+        result = measure(lambda p: cache.get_or_extract(p, extractor), paths, repeat=5)
+        cache.close()
+    return result
+
+
+def _naming_inputs(corpus, count):
+    from .metadata_engine import extract_metadata
+    rng = random.Random(99)
+    samples = [p for group in ("jpeg_exif", "pdf_1p", "text_1k") for p in corpus.get(group, [])[:50]]
+    metas = [(p, extract_metadata(p, use_cache=False)) for p in samples]
+    return [metas[rng.randrange(len(metas))] for _ in range(count)]
+
+
+def _bench_suggestions(corpus, count):
+    from .rules_engine import generate_name_suggestions
+    from .settings_manager import SettingsManager
+    sm = SettingsManager()
+    inputs = _naming_inputs(corpus, count)
+    return measure(lambda item: generate_name_suggestions(item[0], sm, item[1]), inputs)
+
+
+def _bench_names_for_folder(corpus, count):
+    from .rules_engine import generate_names_for_folder
+    from .settings_manager import SettingsManager
+    sm = SettingsManager()
+    inputs = _naming_inputs(corpus, count)
+    batches = [inputs[i:i + 100] for i in range(0, len(inputs), 100)]
+    result = measure(
+        lambda batch: generate_names_for_folder([p for p, _ in batch], sm, [m for _, m in batch]),
+        batches,
+    )
+    result["files_per_sec"] = round(len(inputs) / result["seconds"], 1) if result["seconds"] else None
+    return result
+
+
+def _random_titles(count, seed=7):
+    rng = random.Random(seed)
+    punctuation = [" ", "-", "_", ".", "  ", "/", ":", "(", ")", "&"]
+    return [
+        "".join(rng.choice(WORDS) + rng.choice(punctuation) for _ in range(rng.randint(2, 8)))
+        + str(i)  # unique, so apply_style's lru_cache never hits
+        for i in range(count)
+    ]
+
+
+def _bench_apply_style(corpus, count):
+    from .rules_engine import apply_style
+    styles = ["snake_case", "kebab_case", "camelCase", "PascalCase"]
+    titles = _random_titles(count)
+    return measure(lambda t: apply_style(t, styles[len(t) % 4]), titles)
+
+
+def _bench_sanitize(corpus, count):
+    from .rules_engine import sanitize_component
+    return measure(sanitize_component, _random_titles(count, seed=8))
+
+
+def _bench_walk(corpus, _):
+    from .index import iter_files
+    root = corpus["tree"][0]
+    files = []
+    result = measure(lambda r: files.append(sum(1 for _ in iter_files(r))), [root], repeat=3)
+    result["files"] = files[0]
+    result["files_per_sec"] = round(files[0] * 3 / result["seconds"], 1) if result["seconds"] else None
+    return result
+
+
+def _bench_detect(corpus, _):
+    from .filetype_detect import clear_cache, detect_many
+    from .index import iter_files
+    entries = list(iter_files(corpus["tree"][0]))
+
+    def run(batch):
+        clear_cache()
+        detect_many(batch)
+
+    result = measure(run, [entries], repeat=3)
+    result["files_per_sec"] = round(len(entries) * 3 / result["seconds"], 1) if result["seconds"] else None
+    return result
+
+
+def _bench_interactive_latency(corpus, count):
+    # a click submitted while the background queue is full of extractions
+    from .metadata_engine import extract_metadata
+    from .scheduler import BACKGROUND, INTERACTIVE, JobScheduler
+    paths = [p for group in ("text_1k", "jpeg_exif") for p in corpus.get(group, [])]
+    scheduler = JobScheduler(workers=3, idle_delay=0)
+    for i in range(count):
+        path = paths[i % len(paths)]
+        scheduler.submit(extract_metadata, path, False, key=("bg", i), priority=BACKGROUND, root="bench")
+
+    def click(path):
+        scheduler.submit(extract_metadata, path, False, priority=INTERACTIVE).wait()
+
+    result = measure(click, paths[:50])
+    result["background_queued"] = scheduler.metrics()["classes"]["background"]["queued"]
+    scheduler.shutdown(wait=True)
+    return result
+
+
+def _bench_classify(corpus, group):
+    from .classifier import get_classifier
+    paths = corpus[group]
+    texts = []
+    for p in paths:
+        with open(p, "r", encoding="utf-8", errors="ignore") as f:
+            texts.append(f.read(256 * 1024))
+    classifier = get_classifier()
+
+    def run(text):
+        r = classifier.start()
+        r.feed(text)
+        r.apply({})
+
+    return measure(run, texts, nbytes=sum(len(t) for t in texts))
+
+
+def _bench_fields(corpus, group):
+    from .field_extractor import get_field_extractor
+    texts = []
+    for p in corpus[group]:
+        with open(p, "r", encoding="utf-8", errors="ignore") as f:
+            texts.append(f.read(256 * 1024))
+    extractor = get_field_extractor()
+
+    def run(text):
+        extractor.extract(text)
+
+    return measure(run, texts, nbytes=sum(len(t) for t in texts))
+
+
+def _bench_minhash(corpus, group):
+    from .similarity import text_signature
+    texts = []
+    for p in corpus[group]:
+        with open(p, "r", encoding="utf-8", errors="ignore") as f:
+            texts.append(f.read(32 * 1024))
+    return measure(text_signature, texts, nbytes=sum(len(t) for t in texts))
+
+
+def _bench_lsh_query(corpus, count):
+    # random signatures: every lookup walks its buckets and finds nothing
+    import numpy as np
+    from .similarity import NUM_PERM, SimilarityIndex
+    rng = np.random.RandomState(3)
+    signatures = rng.randint(0, 2**32, size=(count * 50, NUM_PERM), dtype=np.uint64).astype(np.uint32)
+    index = SimilarityIndex()
+    index.add_many([str(i) for i in range(len(signatures))], signatures)
+    result = measure(index.query, list(signatures[:500]))
+    result["indexed"] = len(index)
+    return result
+
+
+def _run_in_child(name, fn_name, corpus, arg):
+    # executed in a fresh process so peak RSS belongs to this benchmark
+    result = globals()[fn_name](corpus, arg)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return name, result
+
+
+def plan_benchmarks(corpus, scale):
+    plan = []
+    for group in corpus:
+        if group.startswith(("text_", "pdf_", "jpeg_")):
+            plan.append((f"extract/{group}", "_bench_extract", group))
+        if group.startswith("pdf_"):
+            plan.append((f"pdf_info/{group}", "_bench_pdf_info", group))
+    plan.append(("cache/hit", "_bench_cache_hit", "jpeg_exif"))
+    if "text_64k" in corpus:
+        plan.append(("classify/text_64k", "_bench_classify", "text_64k"))
+        plan.append(("fields/text_64k", "_bench_fields", "text_64k"))
+        plan.append(("similarity/minhash", "_bench_minhash", "text_64k"))
+    n = scale["naming_count"]
+    plan += [
+        ("naming/generate_name_suggestions", "_bench_suggestions", n),
+        ("naming/generate_names_for_folder", "_bench_names_for_folder", n),
+        ("naming/apply_style", "_bench_apply_style", n * 5),
+        ("naming/sanitize_component", "_bench_sanitize", n * 5),
+        ("walk/iter_files", "_bench_walk", None),
+        ("detect/tree", "_bench_detect", None),
+        ("scheduler/interactive_latency", "_bench_interactive_latency", n),
+        ("similarity/lsh_query", "_bench_lsh_query", n),
+    ]
+    return plan
+
+
+def run_benchmarks(scale_name="small", only=None, in_process=False, progress=None):
+    scale = SCALES[scale_name]
+    tmp = tempfile.mkdtemp(prefix="workspace-bench-")
+    try:
+        t0 = time.perf_counter()
+        corpus = build_corpus(tmp, scale)
+        corpus_seconds = time.perf_counter() - t0
+
+        results = {}
+        plan = [p for p in plan_benchmarks(corpus, scale) if not only or any(o in p[0] for o in only)]
+        ctx = get_context("spawn")
+        for name, fn_name, arg in plan:
+            if in_process:
+                _, result = _run_in_child(name, fn_name, corpus, arg)
+            else:
+                with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+                    _, result = pool.submit(_run_in_child, name, fn_name, corpus, arg).result()
+            results[name] = result
+            if progress:
+                progress(name, result)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    return {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "scale": scale_name,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus_seconds": round(corpus_seconds, 3),
+        "results": results,
+    }
+
+
+# ------------------------------------------------------------
+# Reporting
+# ------------------------------------------------------------
+
+def format_result(name, r):
+    parts = [f"{name:<40}", f"{r['ops_per_sec'] or 0:>12,.1f} ops/s",
+             f"p50 {r['p50_ms']:>9.3f} ms", f"p99 {r['p99_ms']:>9.3f} ms"]
+    if r.get("mb_per_sec") is not None:
+        parts.append(f"{r['mb_per_sec']:>8.1f} MB/s")
+    if r.get("peak_rss_mb") is not None:
+        parts.append(f"rss {r['peak_rss_mb']:.0f} MB")
+    return "  ".join(parts)
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """
+    Returns (lines, regressions) comparing two result documents.
+    A benchmark regresses when throughput drops or p99 grows by more
+    than threshold.
+    """
+    lines, regressions = [], []
+    old_results, new_results = old.get("results", {}), new.get("results", {})
+    for name in sorted(set(old_results) | set(new_results)):
+        a, b = old_results.get(name), new_results.get(name)
+        if a is None or b is None:
+            lines.append(f"{name:<40}  {'only in new' if a is None else 'only in old'}")
+            continue
+        speed = _change(a.get("ops_per_sec"), b.get("ops_per_sec"))
+        p99 = _change(a.get("p99_ms"), b.get("p99_ms"))
+        flag = ""
+        if (speed is not None and speed < -threshold) or (p99 is not None and p99 > threshold):
+            flag = "  REGRESSION"
+            regressions.append(name)
+        lines.append(
+            f"{name:<40}  ops/s {a.get('ops_per_sec')} -> {b.get('ops_per_sec')} ({_pct(speed)})"
+            f"  p99 {a.get('p99_ms')} -> {b.get('p99_ms')} ms ({_pct(p99)}){flag}"
+        )
+    return lines, regressions
+
+
+def _change(old, new):
+    if not old or new is None:
+        return None
+    return (new - old) / old
+
+
+def _pct(change):
+    return "n/a" if change is None else f"{change * 100:+.1f}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m workspace_gui.bench",
+        description="Benchmark metadata extraction and naming on a synthetic corpus.",
+    )
+    parser.add_argument("-o", "--output", help="write results as JSON to this file")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small",
+                        help="corpus size (default: small)")
+    parser.add_argument("-k", "--only", action="append",
+                        help="run only benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="don't spawn a process per benchmark (peak RSS becomes cumulative)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="relative change counted as a regression (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        docs = []
+        for path in args.compare:
+            with open(path, "r", encoding="utf-8") as f:
+                docs.append(json.load(f))
+        lines, regressions = compare(docs[0], docs[1], args.threshold)
+        print("\n".join(lines))
+        if regressions:
+            print(f"{len(regressions)} regression(s)", file=sys.stderr)
+            return 1
+        return 0
+
+    def report(name, result):
+        print(format_result(name, result), flush=True)
+
+    doc = run_benchmarks(args.scale, only=args.only, in_process=args.in_process, progress=report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"results written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+import json
+import os
+import re
+import threading
+
+from .tracing import traced
+
+DEFAULT_RULES = {
+    "categories": [
+        {"name": "notes", "terms": ["todo"], "weight": 0.0, "add_keywords": True},
+        {"name": "permit", "terms": ["permit"], "weight": 0.15},
+        {"name": "invoice", "terms": ["invoice", "amount due"], "weight": 0.20},
+        {"name": "contract", "terms": ["contract", "terms"], "weight": 0.20}
+    ],
+    "keywords": ["dnr", "usda", "irs", "missouri", "department"]
+}
+
+
+def default_rules_path():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, "config", "classification_rules.json")
+
+
+class Classifier:
+    """
+    Keyword/category rules compiled into one case-insensitive regex, so
+    every term is found in a single pass over the text.
+      - categories: later rules take precedence; each matched rule adds
+        its weight to the confidence once
+      - keywords: plain terms copied into metadata["keywords"] when found
+    Terms are matched as substrings; overlapping hits inside the same span
+    count once (the longest term wins).
+    """
+
+    def __init__(self, rules):
+        self.categories = []
+        self.keywords = []
+        self._owner = {}
+
+        for rule in rules.get("categories", []):
+            terms = [t.lower() for t in rule.get("terms", []) if t]
+            self.categories.append({
+                "name": rule["name"],
+                "terms": terms,
+                "weight": float(rule.get("weight", 0.0)),
+                "add_keywords": bool(rule.get("add_keywords", False)),
+            })
+            for t in terms:
+                self._owner.setdefault(t, ("category", rule["name"]))
+
+        for term in rules.get("keywords", []):
+            t = term.lower()
+            if t and t not in self._owner:
+                self._owner[t] = ("keyword", t)
+                self.keywords.append(t)
+
+        terms = sorted(self._owner, key=len, reverse=True)
+        self.max_term_len = max((len(t) for t in terms), default=1)
+        self.pattern = (
+            re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+            if terms else None
+        )
+
+        # Once the highest-precedence category has matched, nothing can
+        # override it any more.
+        self._final_terms = set(self.categories[-1]["terms"]) if self.categories else set()
+
+    def start(self):
+        return ClassificationRun(self)
+
+    def classify(self, text, meta):
+        run = self.start()
+        run.feed(text)
+        return run.apply(meta)
+
+
+class ClassificationRun:
+    """
+    Streaming state for one document: feed() text chunks or pages, then
+    apply() the result to a metadata dict.
+    """
+
+    def __init__(self, classifier):
+        self.classifier = classifier
+        self.found = set()
+        self._keep = classifier.max_term_len - 1
+        self._tail = ""
+
+    @property
+    def done(self):
+        return len(self.found) == len(self.classifier._owner)
+
+    @property
+    def decided(self):
+        """True once more text cannot change the category."""
+        return bool(self.found & self.classifier._final_terms) or self.done
+
+    @property
+    def categorized(self):
+        """True once any category term (not just a keyword) has matched."""
+        owner = self.classifier._owner
+        return any(owner[t][0] == "category" for t in self.found)
+
+    @traced("classify.feed")
+    def feed(self, text):
+        pattern = self.classifier.pattern
+        if pattern is None or not text:
+            return
+        # the tail of the previous chunk catches terms split across chunks
+        window = self._tail + text
+        for m in pattern.finditer(window):
+            self.found.add(m.group(0).lower())
+        self._tail = window[-self._keep:] if self._keep else ""
+
+    def apply(self, meta):
+        keywords = meta.setdefault("keywords", [])
+        for rule in self.classifier.categories:
+            hits = [t for t in rule["terms"] if t in self.found]
+            if not hits:
+                continue
+            meta["category"] = rule["name"]
+            meta["confidence"] = round(meta.get("confidence", 0.0) + rule["weight"], 2)
+            if rule["add_keywords"]:
+                keywords.extend(h for h in hits if h not in keywords)
+
+        for t in self.classifier.keywords:
+            if t in self.found and t not in keywords:
+                keywords.append(t)
+        return meta
+
+
+# ------------------------------------------------------------
+# Shared instance (rules are compiled once per process)
+# ------------------------------------------------------------
+
+_classifier = None
+_lock = threading.Lock()
+
+
+def load_rules(path=None):
+    path = path or default_rules_path()
+    if not os.path.exists(path):
+        return DEFAULT_RULES
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def get_classifier():
+    global _classifier
+    if _classifier is None:
+        with _lock:
+            if _classifier is None:
+                try:
+                    rules = load_rules()
+                except (OSError, ValueError):
+                    rules = DEFAULT_RULES
+                _classifier = Classifier(rules)
+    return _classifier
+
+
+def reload_classifier(path=None):
+    global _classifier
+    with _lock:
+        _classifier = Classifier(load_rules(path))
+    return _classifier
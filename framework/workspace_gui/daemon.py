@@ -0,0 +1,552 @@
+"""
+Local extraction daemon.
+
+    python -m workspace_gui.daemon serve [--socket PATH] [--workers N]
+    python -m workspace_gui.daemon status | stop
+    python -m workspace_gui.daemon extract PATH... | suggest PATH | search TEXT...
+
+One long-running process owns the metadata cache, the scheduler's worker
+threads and the search index, and serves them over a Unix socket. The GUI
+(MainWindow) and scripts connect as clients, so the cache stays warm
+across launches and a lookup another client already did costs one
+round-trip.
+
+Protocol: each frame is a 4-byte big-endian length, then one codec byte
+(b"M" msgpack, b"J" JSON) and the encoded body. Requests are
+{"op": name, "args": {...}}; replies are {"ok": true, "result": ...} or
+{"ok": false, "error": "..."}, in the codec of the request. msgpack is
+used when installed, JSON otherwise.
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import tempfile
+import threading
+import time
+
+from .extractor_registry import lazy_import
+
+SOCKET_ENV = "WORKSPACE_GUI_SOCKET"
+MAX_FRAME = 64 * 1024 * 1024
+CONNECT_TIMEOUT = 0.5
+CALL_TIMEOUT = 120.0
+
+_HEADER = struct.Struct(">I")
+_CODEC_MSGPACK = b"M"
+_CODEC_JSON = b"J"
+
+
+class DaemonError(Exception):
+    """The daemon answered with an error."""
+
+
+class DaemonUnavailable(DaemonError):
+    """No daemon at the socket path, or the connection was lost."""
+
+
+def default_socket_path():
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(base, f"workspace_gui-{uid}.sock")
+
+
+def unix_sockets_supported():
+    return hasattr(socket, "AF_UNIX") and hasattr(socketserver, "UnixStreamServer")
+
+
+# ------------------------------------------------------------
+# Framing
+# ------------------------------------------------------------
+
+def encode(message, codec=None):
+    msgpack = lazy_import("msgpack")
+    if codec is None:
+        codec = _CODEC_MSGPACK if msgpack is not None else _CODEC_JSON
+    if codec == _CODEC_MSGPACK:
+        body = msgpack.packb(message, use_bin_type=True, default=str)
+    else:
+        body = json.dumps(message, default=str, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(len(body) + 1) + codec + body
+
+
+def decode(codec, body):
+    if codec == _CODEC_MSGPACK:
+        msgpack = lazy_import("msgpack")
+        if msgpack is None:
+            raise DaemonError("msgpack frame but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    if codec == _CODEC_JSON:
+        return json.loads(body.decode("utf-8"))
+    raise DaemonError(f"unknown codec {codec!r}")
+
+
+def read_frame(sock_file):
+    """(codec, body) or None at a clean end of stream."""
+    header = sock_file.read(_HEADER.size)
+    if not header:
+        return None
+    if len(header) < _HEADER.size:
+        raise DaemonUnavailable("connection closed mid-frame")
+    (length,) = _HEADER.unpack(header)
+    if not 1 <= length <= MAX_FRAME:
+        raise DaemonError(f"bad frame length {length}")
+    data = sock_file.read(length)
+    if len(data) < length:
+        raise DaemonUnavailable("connection closed mid-frame")
+    return data[:1], data[1:]
+
+
+# ------------------------------------------------------------
+# Server
+# ------------------------------------------------------------
+
+class DaemonService:
+    """
+    The operations clients can call. Extraction goes through the
+    scheduler, so identical requests from several clients are extracted
+    once and interactive requests overtake bulk ones.
+    """
+
+    def __init__(self, cache=None, search_index=None, scheduler=None, settings_manager=None):
+        from .scheduler import get_default_scheduler
+        self.cache = cache
+        self.search_index = search_index
+        self.scheduler = scheduler or get_default_scheduler()
+        self.settings_manager = settings_manager
+        self.started = time.time()
+        self.requests = 0
+        self.server = None
+
+    def handle(self, request):
+        self.requests += 1
+        try:
+            op = request["op"]
+            method = getattr(self, "op_" + op, None)
+            if method is None:
+                raise DaemonError(f"unknown op {op!r}")
+            return {"ok": True, "result": method(**(request.get("args") or {}))}
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+    def _submit(self, path, priority, root=None):
+        from .metadata_engine import extract_metadata
+        from .scheduler import BACKGROUND, INTERACTIVE, PREFETCH, file_io_bytes
+        cls = {"interactive": INTERACTIVE, "prefetch": PREFETCH, "background": BACKGROUND}[priority]
+        if cls == INTERACTIVE:
+            self.scheduler.note_user_activity()
+        return self.scheduler.submit(
+            extract_metadata, path, key=("extract", path), priority=cls, root=root,
+            io_bytes=0 if cls == INTERACTIVE else file_io_bytes(path), name="extract_metadata",
+        )
+
+    # ---- ops ----------------------------------------------------------
+
+    def op_ping(self):
+        return {"pid": os.getpid()}
+
+    def op_extract(self, path, priority="interactive", root=None):
+        job = self._submit(path, priority, root)
+        job.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result or {}
+
+    def op_extract_many(self, paths, priority="background", root=None):
+        jobs = [(path, self._submit(path, priority, root)) for path in paths]
+        metadata, errors = {}, {}
+        for path, job in jobs:
+            job.wait()
+            if job.error is not None:
+                errors[path] = f"{type(job.error).__name__}: {job.error}"
+            else:
+                metadata[path] = job.result or {}
+        return {"metadata": metadata, "errors": errors}
+
+    def op_peek_many(self, entries):
+        if self.cache is None:
+            return {}
+        return self.cache.peek_many([tuple(e) for e in entries])
+
+    def op_suggest(self, path):
+        from .rules_engine import generate_name_suggestions
+        from .settings_manager import SettingsManager
+        if self.settings_manager is None:
+            self.settings_manager = SettingsManager()
+        return generate_name_suggestions(path, self.settings_manager, self.op_extract(path))
+
+    def op_search(self, text, limit=200):
+        if self.search_index is None:
+            return []
+        return [list(row) for row in self.search_index.search(text, limit)]
+
+    def op_put(self, path, metadata):
+        if self.cache is not None:
+            self.cache.put(path, metadata)
+
+    def op_invalidate(self, path):
+        if self.cache is not None:
+            self.cache.invalidate(path)
+        if self.search_index is not None:
+            self.search_index.remove(path)
+
+    def op_rename(self, old_path, new_path):
+        if self.cache is not None:
+            self.cache.rename(old_path, new_path)
+        if self.search_index is not None:
+            self.search_index.rename(old_path, new_path)
+
+    def op_stats(self):
+        return {
+            "pid": os.getpid(),
+            "uptime": round(time.time() - self.started, 1),
+            "requests": self.requests,
+            "cache": self.cache.stats() if self.cache is not None else None,
+            "search_docs": self.search_index.count() if self.search_index is not None else None,
+            "scheduler": self.scheduler.metrics(),
+        }
+
+    def op_shutdown(self):
+        if self.server is not None:
+            # shutdown() waits for serve_forever(), which runs on another thread
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+        return True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        service = self.server.service
+        while True:
+            try:
+                frame = read_frame(self.rfile)
+            except DaemonError:
+                return
+            if frame is None:
+                return
+            codec, body = frame
+            try:
+                request = decode(codec, body)
+                reply = service.handle(request)
+            except Exception as e:
+                codec = _CODEC_JSON
+                reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            try:
+                self.wfile.write(encode(reply, codec))
+                self.wfile.flush()
+            except OSError:
+                return
+
+
+if unix_sockets_supported():
+    class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def __init__(self, socket_path, service):
+            self.service = service
+            service.server = self
+            _remove_stale_socket(socket_path)
+            old_umask = os.umask(0o177)  # socket is private to this user
+            try:
+                super().__init__(socket_path, _Handler)
+            finally:
+                os.umask(old_umask)
+
+        def server_close(self):
+            super().server_close()
+            try:
+                os.unlink(self.server_address)
+            except OSError:
+                pass
+else:
+    DaemonServer = None
+
+
+def _remove_stale_socket(socket_path):
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    probe.settimeout(CONNECT_TIMEOUT)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)  # left behind by a daemon that died
+        return
+    finally:
+        probe.close()
+    raise DaemonError(f"a daemon is already listening on {socket_path}")
+
+
+def serve(socket_path=None, workers=None, settings_manager=None):
+    """
+    Runs the daemon in the foreground until a client sends "shutdown"
+    (or Ctrl+C).
+    """
+    if DaemonServer is None:
+        raise DaemonError("Unix sockets are not available on this platform")
+    from .metadata_cache import configure_default_cache
+    from .metadata_engine import add_extraction_listener
+    from .scheduler import DEFAULT_WORKERS, configure_default_scheduler
+    from .search_index import get_default_search_index
+    from .settings_manager import SettingsManager
+
+    settings_manager = settings_manager or SettingsManager()
+    cache = configure_default_cache(
+        max_bytes=int(settings_manager.get_setting("metadata_cache_mb", 256)) * 1024 * 1024,
+        enabled=bool(settings_manager.get_setting("metadata_cache_enabled", True)),
+    )
+    search_index = get_default_search_index()
+    if search_index is not None:
+        add_extraction_listener(search_index.update)
+    # no user input here: background jobs only yield to interactive ones
+    scheduler = configure_default_scheduler(
+        workers=workers or int(settings_manager.get_setting("scheduler_workers", DEFAULT_WORKERS)),
+        idle_delay=0,
+    )
+
+    service = DaemonService(cache, search_index, scheduler, settings_manager)
+    server = DaemonServer(socket_path or default_socket_path(), service)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        scheduler.shutdown(wait=False)
+        if cache is not None:
+            cache.flush()
+
+
+# ------------------------------------------------------------
+# Client
+# ------------------------------------------------------------
+
+class DaemonClient:
+    """
+    Talks to a running daemon. Thread-safe: each thread gets its own
+    connection. Also offers the peek_many/search/invalidate/rename methods
+    the GUI uses on MetadataCache and SearchIndex, so it can be passed in
+    their place; like the cache, those degrade to "nothing known" instead
+    of raising when the daemon has gone away.
+    """
+
+    def __init__(self, socket_path=None, timeout=CALL_TIMEOUT):
+        self.socket_path = socket_path or default_socket_path()
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if not unix_sockets_supported():
+                raise DaemonUnavailable("Unix sockets are not available on this platform")
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(CONNECT_TIMEOUT)
+            try:
+                sock.connect(self.socket_path)
+            except OSError as e:
+                sock.close()
+                raise DaemonUnavailable(f"no daemon at {self.socket_path}: {e}") from e
+            sock.settimeout(self.timeout)
+            conn = self._local.conn = (sock, sock.makefile("rb"))
+        return conn
+
+    def _drop_connection(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn is not None:
+            for part in reversed(conn):
+                try:
+                    part.close()
+                except OSError:
+                    pass
+
+    def call(self, op, **args):
+        payload = encode({"op": op, "args": args})
+        for attempt in (0, 1):
+            sock, rfile = self._connection()
+            try:
+                sock.sendall(payload)
+                frame = read_frame(rfile)
+                if frame is None:
+                    raise DaemonUnavailable("daemon closed the connection")
+                break
+            except (OSError, DaemonUnavailable) as e:
+                # the daemon may have restarted since this connection was made
+                self._drop_connection()
+                if attempt:
+                    raise DaemonUnavailable(str(e)) from e
+        reply = decode(*frame)
+        if not reply.get("ok"):
+            raise DaemonError(reply.get("error") or "daemon error")
+        return reply.get("result")
+
+    def close(self):
+        self._drop_connection()
+
+    # ---- operations ---------------------------------------------------
+
+    def ping(self):
+        return self.call("ping")
+
+    def extract(self, path, priority="interactive", root=None):
+        return self.call("extract", path=path, priority=priority, root=root)
+
+    def extract_many(self, paths, priority="background", root=None):
+        return self.call("extract_many", paths=list(paths), priority=priority, root=root)
+
+    def suggest(self, path):
+        return self.call("suggest", path=path)
+
+    def search(self, text, limit=200):
+        try:
+            return self.call("search", text=text, limit=limit)
+        except DaemonUnavailable:
+            return []
+
+    def peek_many(self, entries):
+        try:
+            return self.call("peek_many", entries=[list(e) for e in entries])
+        except DaemonUnavailable:
+            return {}
+
+    def put(self, path, metadata):
+        self.call("put", path=path, metadata=metadata)
+
+    def invalidate(self, path):
+        try:
+            self.call("invalidate", path=path)
+        except DaemonUnavailable:
+            pass
+
+    def rename(self, old_path, new_path):
+        try:
+            self.call("rename", old_path=old_path, new_path=new_path)
+        except DaemonUnavailable:
+            pass
+
+    def stats(self):
+        return self.call("stats")
+
+    def cache_stats(self):
+        """MetadataCache.stats() of the daemon's cache."""
+        return (self.stats() or {}).get("cache")
+
+    def shutdown(self):
+        return self.call("shutdown")
+
+
+def extract_via(client, priority="interactive"):
+    """
+    extract(path) that asks client and falls back to extracting in this
+    process if the daemon has gone away. Run as a scheduler job, the
+    request takes the job's class at the time it runs (a background
+    re-extract promoted by a click is sent as interactive); priority is
+    used otherwise.
+    """
+    from .scheduler import PRIORITY_NAMES, current_job
+
+    def extract(path):
+        job = current_job()
+        try:
+            return client.extract(
+                path, priority=PRIORITY_NAMES[job.priority] if job is not None else priority
+            )
+        except DaemonUnavailable:
+            from .metadata_engine import extract_metadata
+            return extract_metadata(path)
+    return extract
+
+
+def connect_daemon(socket_path=None, timeout=CALL_TIMEOUT):
+    """
+    Returns a DaemonClient if a daemon answers at socket_path, else None.
+    Costs one stat() when no daemon is running.
+    """
+    socket_path = socket_path or default_socket_path()
+    if not unix_sockets_supported() or not os.path.exists(socket_path):
+        return None
+    client = DaemonClient(socket_path, timeout)
+    try:
+        client.ping()
+    except DaemonError:
+        client.close()
+        return None
+    return client
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m workspace_gui.daemon",
+        description="Run, query or stop the local extraction daemon.",
+    )
+    parser.add_argument("--socket", help=f"socket path (default: ${SOCKET_ENV} or {default_socket_path()})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_cmd = sub.add_parser("serve", help="run the daemon in the foreground")
+    serve_cmd.add_argument("-j", "--workers", type=int, default=None,
+                           help="scheduler worker threads (default: scheduler_workers setting)")
+    sub.add_parser("status", help="print daemon statistics")
+    sub.add_parser("stop", help="ask the daemon to exit")
+    extract_cmd = sub.add_parser("extract", help="print metadata for files")
+    extract_cmd.add_argument("paths", nargs="+")
+    suggest_cmd = sub.add_parser("suggest", help="print rename suggestions for a file")
+    suggest_cmd.add_argument("path")
+    search_cmd = sub.add_parser("search", help="full-text search")
+    search_cmd.add_argument("text", nargs="+")
+    search_cmd.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        print(f"listening on {args.socket or default_socket_path()}", file=sys.stderr)
+        try:
+            serve(args.socket, args.workers)
+        except KeyboardInterrupt:
+            pass
+        except DaemonError as e:
+            print(e, file=sys.stderr)
+            return 1
+        return 0
+
+    client = connect_daemon(args.socket)
+    if client is None:
+        print("no daemon running; start one with: python -m workspace_gui.daemon serve", file=sys.stderr)
+        return 1
+
+    try:
+        if args.command == "status":
+            print(json.dumps(client.stats(), indent=2))
+        elif args.command == "stop":
+            client.shutdown()
+        elif args.command == "extract":
+            paths = [os.path.abspath(p) for p in args.paths]
+            if len(paths) == 1:
+                results = {"metadata": {paths[0]: client.extract(paths[0])}, "errors": {}}
+            else:
+                results = client.extract_many(paths, priority="interactive")
+            for path, meta in results["metadata"].items():
+                print(json.dumps({"path": path, "metadata": meta}, default=str))
+            for path, error in results["errors"].items():
+                print(f"{path}: {error}", file=sys.stderr)
+        elif args.command == "suggest":
+            for name in client.suggest(os.path.abspath(args.path)):
+                print(name)
+        elif args.command == "search":
+            for path, title, category, snippet in client.search(" ".join(args.text), args.limit):
+                print(f"{category or '-':<12} {title or os.path.basename(path)}  {path}")
+    except DaemonError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Duplicate finder.
+
+    python -m workspace_gui.dedup <root> [--json] [--min-size BYTES]
+
+Files are grouped by size, then by a partial hash of their first and
+last blocks (thumbnails.content_signature), and only files that still
+collide are hashed in full, through mmap. Most files are never read past
+their first and last block.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Dict, List
+
+from .metadata_engine import extract_metadata, fs_date
+from .models import FileMetadata
+from .thumbnails import SIGNATURE_BLOCK, content_signature
+
+FULL_HASH_CHUNK = 8 * 1024 * 1024
+
+
+@dataclass
+class DuplicateGroup:
+    content_hash: str
+    size: int
+    paths: List[str] = field(default_factory=list)
+
+    @property
+    def wasted_bytes(self):
+        return self.size * (len(self.paths) - 1)
+
+
+def full_hash(path, size=None):
+    """
+    blake2b of the whole file. Memory-mapped so the kernel streams pages
+    straight into the hash; falls back to large buffered reads.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        if size is None:
+            size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return h.hexdigest()
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for offset in range(0, len(mm), FULL_HASH_CHUNK):
+                    h.update(mm[offset:offset + FULL_HASH_CHUNK])
+        except (OSError, ValueError):
+            f.seek(0)
+            for chunk in iter(lambda: f.read(FULL_HASH_CHUNK), b""):
+                h.update(chunk)
+    return h.hexdigest()
+
+
+def content_hashes(entries, progress=None, min_size=1):
+    """
+    Returns {path: content_hash} for every file that has at least one
+    byte-identical copy among entries ([(path, size, ...)]). Unique files
+    are left out; they never get a full read.
+    progress(stage, done, total) is called as candidates are hashed.
+    """
+    by_size = {}
+    for entry in entries:
+        path, size = entry[0], entry[1]
+        if size >= min_size:
+            by_size.setdefault(size, []).append(path)
+    candidates = [(size, paths) for size, paths in by_size.items() if len(paths) > 1]
+
+    # partial hash: first + last block
+    total = sum(len(paths) for _, paths in candidates)
+    done = 0
+    by_partial = {}
+    for size, paths in candidates:
+        st = SimpleNamespace(st_size=size)
+        for path in paths:
+            try:
+                key = content_signature(path, st)
+            except OSError:
+                continue
+            by_partial.setdefault(key, []).append((path, size))
+            done += 1
+            if progress:
+                progress("partial", done, total)
+
+    # full hash only where the partial hashes still collide; files that
+    # fit in the two signature blocks were already read completely
+    hashes = {}
+    total = sum(len(g) for g in by_partial.values() if len(g) > 1)
+    done = 0
+    for key, group in by_partial.items():
+        if len(group) < 2:
+            continue
+        size = group[0][1]
+        if size <= 2 * SIGNATURE_BLOCK:
+            for path, _ in group:
+                hashes[path] = key
+            done += len(group)
+            if progress:
+                progress("full", done, total)
+            continue
+        by_full = {}
+        for path, _ in group:
+            try:
+                by_full.setdefault(full_hash(path, size), []).append(path)
+            except OSError:
+                pass
+            done += 1
+            if progress:
+                progress("full", done, total)
+        for digest, paths in by_full.items():
+            if len(paths) > 1:
+                for path in paths:
+                    hashes[path] = digest
+    return hashes
+
+
+def find_duplicates(entries, progress=None, min_size=1) -> List[DuplicateGroup]:
+    """
+    Groups byte-identical files. entries: [(path, size, ...)], e.g. from
+    index.iter_files(). Largest waste first.
+    """
+    entries = list(entries)
+    sizes = {e[0]: e[1] for e in entries}
+    groups = {}
+    for path, digest in content_hashes(entries, progress, min_size).items():
+        group = groups.get(digest)
+        if group is None:
+            group = groups[digest] = DuplicateGroup(digest, sizes[path])
+        group.paths.append(path)
+    result = list(groups.values())
+    for group in result:
+        group.paths.sort()
+    result.sort(key=lambda g: (g.wasted_bytes, len(g.paths)), reverse=True)
+    return result
+
+
+def find_duplicates_in_tree(root, include_hidden=False, progress=None, min_size=1):
+    from .index import iter_files
+    return find_duplicates(iter_files(root, include_hidden=include_hidden), progress, min_size)
+
+
+# ------------------------------------------------------------
+# Extract once per unique content
+# ------------------------------------------------------------
+
+def extract_unique(paths, metadata_for=extract_metadata, progress=None) -> Dict[str, FileMetadata]:
+    """
+    Returns {path: FileMetadata} for paths, extracting each distinct
+    content once. Copies share the first copy's metadata, with the
+    title/date fields that came from the file name or mtime redone for
+    their own path, and carry content_hash.
+    progress(done, total) is called per path.
+    """
+    entries = []
+    for path in paths:
+        try:
+            entries.append((path, os.stat(path).st_size))
+        except OSError:
+            entries.append((path, -1))
+    hashes = content_hashes([e for e in entries if e[1] >= 0])
+
+    results = {}
+    extracted = {}
+    total = len(paths)
+    for i, path in enumerate(paths):
+        digest = hashes.get(path)
+        source = extracted.get(digest) if digest else None
+        if source is None:
+            raw = metadata_for(path) or {}
+            if digest:
+                extracted[digest] = (path, raw)
+        else:
+            raw = _rebase(source[1], source[0], path)
+        results[path] = FileMetadata(path=path, raw_metadata=raw, content_hash=digest)
+        if progress:
+            progress(i + 1, total)
+    return results
+
+
+def _rebase(meta, source_path, path):
+    """
+    Copy of meta for a duplicate at path. Fields the extractors derive
+    from the file name or mtime rather than the content are redone.
+    """
+    meta = dict(meta)
+    source_stem = os.path.splitext(os.path.basename(source_path))[0]
+    if meta.get("title") == source_stem:
+        meta["title"] = os.path.splitext(os.path.basename(path))[0]
+
+    try:
+        source_date, own_date = fs_date(source_path), fs_date(path)
+    except OSError:
+        return meta
+    for key in ("date_created", "date_modified"):
+        if meta.get(key) == source_date:
+            meta[key] = own_date
+    return meta
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m workspace_gui.dedup",
+        description="List byte-identical files under a folder.",
+    )
+    parser.add_argument("root", help="folder to scan")
+    parser.add_argument("--hidden", action="store_true",
+                        help="include dotfiles and dot-directories")
+    parser.add_argument("--min-size", type=int, default=1,
+                        help="ignore files smaller than this many bytes (default: 1)")
+    parser.add_argument("--json", action="store_true", help="print groups as JSON lines")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        parser.error(f"not a directory: {args.root}")
+
+    groups = find_duplicates_in_tree(args.root, args.hidden, min_size=args.min_size)
+    for group in groups:
+        if args.json:
+            print(json.dumps({"hash": group.content_hash, "size": group.size, "paths": group.paths}))
+        else:
+            print(f"{group.content_hash[:12]}  {group.size} bytes x {len(group.paths)}")
+            for path in group.paths:
+                print(f"    {path}")
+    wasted = sum(g.wasted_bytes for g in groups)
+    print(f"{len(groups)} duplicate groups, {wasted / 1e6:.1f} MB reclaimable", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+import os
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QTreeWidget, QTreeWidgetItem, QHeaderView, QProgressBar
+)
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+
+from .dedup import find_duplicates
+from .index import iter_files
+
+PATH_ROLE = Qt.ItemDataRole.UserRole
+
+
+class _ScanSignals(QObject):
+    progress = pyqtSignal(str, int, int)
+    finished = pyqtSignal(list)
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _ScanTask(QRunnable):
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+        self.signals = _ScanSignals()
+        self.cancelled = False
+
+    def run(self):
+        try:
+            groups = find_duplicates(self._entries(), progress=self._progress)
+        except (OSError, _Cancelled):
+            groups = []
+        self.signals.finished.emit(groups)
+
+    # both checked between files, so a cancelled scan stops within one
+    # file instead of hashing the rest of the tree
+    def _entries(self):
+        for entry in iter_files(self.root):
+            if self.cancelled:
+                raise _Cancelled()
+            yield entry
+
+    def _progress(self, stage, done, total):
+        if self.cancelled:
+            raise _Cancelled()
+        self.signals.progress.emit(stage, done, total)
+
+
+class DuplicatesDialog(QDialog):
+    """
+    Scans a folder tree for byte-identical files in the background and
+    lists them grouped by content hash, largest waste first.
+    Emits: file_selected(path: str) when a copy is double-clicked.
+    """
+    file_selected = pyqtSignal(str)
+
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Duplicates in {root}")
+        self.resize(900, 600)
+        self.root = root
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._task = None
+
+        self._init_ui()
+        self.scan()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel("Scanning…", self)
+        self.progress = QProgressBar(self)
+
+        self.tree = QTreeWidget(self)
+        self.tree.setHeaderLabels(["File", "Size", "Copies"])
+        header = self.tree.header()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        header.setSectionResizeMode(1, QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.ResizeToContents)
+        self.tree.setUniformRowHeights(True)
+        self.tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+
+        buttons = QHBoxLayout()
+        self.btn_rescan = QPushButton("Rescan", self)
+        self.btn_rescan.clicked.connect(self.scan)
+        btn_close = QPushButton("Close", self)
+        btn_close.clicked.connect(self.accept)
+        buttons.addStretch()
+        buttons.addWidget(self.btn_rescan)
+        buttons.addWidget(btn_close)
+
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.progress)
+        layout.addWidget(self.tree, 1)
+        layout.addLayout(buttons)
+
+    def scan(self):
+        if self._task is not None:
+            return
+        self.tree.clear()
+        self.btn_rescan.setEnabled(False)
+        self.progress.show()
+        self.summary_label.setText("Scanning…")
+
+        self._task = _ScanTask(self.root)
+        self._task.setAutoDelete(False)
+        self._task.signals.progress.connect(self.on_progress)
+        self._task.signals.finished.connect(self.on_finished)
+        self.pool.start(self._task)
+
+    def done(self, result):
+        # closing mid-scan: stop the scan so the pool doesn't block on it
+        if self._task is not None:
+            self._task.cancelled = True
+        super().done(result)
+
+    def on_progress(self, stage, done, total):
+        self.summary_label.setText(
+            "Comparing first/last blocks…" if stage == "partial" else "Hashing candidates…"
+        )
+        self.progress.setMaximum(max(total, 1))
+        self.progress.setValue(done)
+
+    def on_finished(self, groups):
+        self._task = None
+        self.btn_rescan.setEnabled(True)
+        self.progress.hide()
+
+        wasted = sum(g.wasted_bytes for g in groups)
+        self.summary_label.setText(
+            f"{len(groups)} groups of identical files, "
+            f"{wasted / 1e6:.1f} MB in redundant copies"
+        )
+        for group in groups:
+            parent = QTreeWidgetItem([
+                os.path.basename(group.paths[0]),
+                _format_size(group.size),
+                str(len(group.paths)),
+            ])
+            parent.setToolTip(0, group.content_hash)
+            for path in group.paths:
+                child = QTreeWidgetItem([os.path.relpath(path, self.root), "", ""])
+                child.setData(0, PATH_ROLE, path)
+                parent.addChild(child)
+            self.tree.addTopLevelItem(parent)
+
+    def on_item_double_clicked(self, item, column):
+        path = item.data(0, PATH_ROLE)
+        if path:
+            self.file_selected.emit(path)
+
+
+def _format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
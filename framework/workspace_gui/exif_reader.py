@@ -0,0 +1,158 @@
+"""
+Minimal EXIF reader that never decodes pixels.
+
+Walks JPEG segments up to the APP1/Exif block, or reads the IFDs of
+TIFF-based files (TIFF, DNG, CR2, NEF, ARW, ...) with a few seeks, and
+looks up only the requested tags. Returns None for formats it doesn't
+understand so callers can fall back to Pillow.
+"""
+import struct
+
+from .tracing import traced
+
+TAG_MODEL = 0x0110
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_DATETIME_ORIGINAL = 0x9003
+
+DEFAULT_TAGS = (TAG_DATETIME_ORIGINAL, TAG_MODEL)
+
+# Tags that live in the Exif sub-IFD rather than IFD0.
+EXIF_IFD_TAGS = {TAG_DATETIME_ORIGINAL, 0x9004, 0x829A, 0x829D, 0x8827}
+
+TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 7: 1, 9: 4, 10: 8}
+MAX_IFD_ENTRIES = 1024
+# a tag's value size comes from an untrusted 32-bit count; anything
+# larger isn't a date or a camera model, so it is skipped unread
+MAX_VALUE_BYTES = 64 * 1024
+# 0xFF fill bytes allowed before a JPEG marker
+MAX_FILL_BYTES = 4096
+
+
+class _BytesSource:
+    def __init__(self, data):
+        self.data = data
+
+    def read(self, offset, size):
+        return self.data[offset:offset + size]
+
+
+class _FileSource:
+    def __init__(self, f, base=0):
+        self.f = f
+        self.base = base
+
+    def read(self, offset, size):
+        self.f.seek(self.base + offset)
+        return self.f.read(size)
+
+
+@traced("exif.read_headers", arg=0)
+def read_exif(path, tags=DEFAULT_TAGS):
+    """
+    Returns {tag_id: value} for the requested tags that are present,
+    or None if the file isn't a JPEG/TIFF-style image.
+    """
+    with open(path, "rb") as f:
+        head = f.read(12)
+        if head[:2] == b"\xff\xd8":
+            tiff = _find_jpeg_exif(f)
+            if tiff is None:
+                return {}
+            return _read_tiff(_BytesSource(tiff), tags)
+        if head[:4] in (b"II*\x00", b"MM\x00*"):
+            return _read_tiff(_FileSource(f), tags)
+    return None
+
+
+def _find_jpeg_exif(f):
+    f.seek(2)
+    while True:
+        if f.read(1) != b"\xff":
+            return None
+        # markers may be preceded by any number of 0xFF fill bytes
+        kind = 0xFF
+        for _ in range(MAX_FILL_BYTES):
+            byte = f.read(1)
+            if not byte:
+                return None
+            kind = byte[0]
+            if kind != 0xFF:
+                break
+        if kind == 0xFF:
+            return None
+        # standalone markers carry no length
+        if kind == 0xD8 or 0xD0 <= kind <= 0xD7 or kind == 0x01:
+            continue
+        if kind in (0xD9, 0xDA):  # EOI / start of scan: no Exif before pixels
+            return None
+        raw_len = f.read(2)
+        if len(raw_len) < 2:
+            return None
+        (length,) = struct.unpack(">H", raw_len)
+        if length < 2:
+            return None
+        if kind == 0xE1:
+            segment = f.read(length - 2)
+            if segment[:6] == b"Exif\x00\x00":
+                return segment[6:]
+        else:
+            f.seek(length - 2, 1)
+
+
+def _read_tiff(src, tags):
+    header = src.read(0, 8)
+    if len(header) < 8:
+        return {}
+    endian = "<" if header[:2] == b"II" else ">"
+    (ifd0,) = struct.unpack(endian + "I", header[4:8])
+
+    wanted = set(tags)
+    in_exif = wanted & EXIF_IFD_TAGS
+    in_ifd0 = wanted - EXIF_IFD_TAGS
+    if in_exif:
+        in_ifd0.add(TAG_EXIF_IFD)
+
+    found = _read_ifd(src, endian, ifd0, in_ifd0)
+    exif_offset = found.pop(TAG_EXIF_IFD, None)
+    if in_exif and isinstance(exif_offset, int):
+        found.update(_read_ifd(src, endian, exif_offset, in_exif))
+    return found
+
+
+def _read_ifd(src, endian, offset, wanted):
+    raw = src.read(offset, 2)
+    if len(raw) < 2:
+        return {}
+    (count,) = struct.unpack(endian + "H", raw)
+    if count > MAX_IFD_ENTRIES:
+        return {}
+
+    entries = src.read(offset + 2, count * 12)
+    found = {}
+    for i in range(len(entries) // 12):
+        tag, typ, n, value = struct.unpack_from(endian + "HHI4s", entries, i * 12)
+        if tag not in wanted:
+            continue
+        size = TYPE_SIZES.get(typ, 1) * n
+        if size > MAX_VALUE_BYTES:
+            continue
+        if size > 4:
+            (ptr,) = struct.unpack(endian + "I", value)
+            value = src.read(ptr, size)
+            if len(value) < size:
+                continue  # points past the end of the file
+        found[tag] = _decode(endian, typ, n, value)
+        if len(found) == len(wanted):
+            break
+    return found
+
+
+def _decode(endian, typ, n, value):
+    if typ == 2:
+        return value[:n].split(b"\x00", 1)[0].decode("latin-1").strip()
+    if typ == 3:
+        return struct.unpack_from(endian + "H", value)[0]
+    if typ == 4:
+        return struct.unpack_from(endian + "I", value)[0]
+    return value
@@ -0,0 +1,146 @@
+import importlib
+import os
+import threading
+
+# How much of a file an extractor touches:
+#   header - fixed-size reads (zip directory, EXIF block, PE header, ...)
+#   full   - reads/parses content, bounded only by the streaming budgets
+COST_HEADER = "header"
+COST_FULL = "full"
+
+
+class Extractor:
+    """
+    Base class for extractor backends.
+    Subclasses set cost and implement extract(path) -> dict.
+    """
+    name = "extractor"
+    cost = COST_FULL
+
+    def extract(self, path):
+        raise NotImplementedError
+
+    def __call__(self, path):
+        return self.extract(path)
+
+
+class ExtractorRegistry:
+    """
+    Maps MIME types and file extensions to metadata extractors.
+    Targets are callables, Extractor subclasses or "package.module:attr"
+    strings; string targets are imported on first lookup, so a backend
+    whose files are never seen never costs an import. The cost is given
+    at registration so it can be queried without importing anything.
+    Lookup order: exact MIME type, MIME prefix ("image/*"), extension.
+    """
+
+    def __init__(self):
+        self._by_mime = {}
+        self._by_mime_prefix = {}
+        self._by_ext = {}
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def register(self, target, mimes=(), extensions=(), cost=None):
+        if cost is None:
+            cost = getattr(target, "cost", COST_FULL)
+        target = (target, cost)
+        for mime in mimes:
+            mime = mime.lower()
+            if mime.endswith("/*"):
+                self._by_mime_prefix[mime[:-1]] = target
+            else:
+                self._by_mime[mime] = target
+        for ext in extensions:
+            ext = ext.lower()
+            if not ext.startswith("."):
+                ext = "." + ext
+            self._by_ext[ext] = target
+        return target
+
+    def lookup(self, path, mime=None):
+        """
+        Returns the extractor callable for path, or None if nothing is
+        registered (or the backend failed to import).
+        """
+        entry = self._find(path, mime)
+        if entry is None:
+            return None
+        return self.resolve(entry[0])
+
+    def cost_for(self, path, mime=None):
+        """
+        Returns the declared cost of the extractor for path (without
+        importing it), or None if nothing is registered.
+        """
+        entry = self._find(path, mime)
+        return entry[1] if entry else None
+
+    def _find(self, path, mime):
+        target = None
+        if mime:
+            mime = mime.lower()
+            target = self._by_mime.get(mime)
+            if target is None:
+                for prefix, candidate in self._by_mime_prefix.items():
+                    if mime.startswith(prefix):
+                        target = candidate
+                        break
+        if target is None:
+            ext = os.path.splitext(path)[1].lower()
+            target = self._by_ext.get(ext)
+        return target
+
+    def resolve(self, target):
+        resolved = self._resolved.get(target)
+        if resolved is not None:
+            return resolved
+        with self._lock:
+            if target not in self._resolved:
+                if isinstance(target, str):
+                    module_name, _, attr = target.partition(":")
+                    try:
+                        module = importlib.import_module(module_name)
+                        self._resolved[target] = _instantiate(getattr(module, attr))
+                    except (ImportError, AttributeError):
+                        self._resolved[target] = None
+                else:
+                    self._resolved[target] = _instantiate(target)
+        return self._resolved[target]
+
+    def supported_extensions(self):
+        return sorted(self._by_ext)
+
+    def is_loaded(self, target):
+        return self._resolved.get(target) is not None
+
+
+def _instantiate(target):
+    if isinstance(target, type) and issubclass(target, Extractor):
+        return target()
+    return target
+
+
+registry = ExtractorRegistry()
+
+
+def register_extractor(target, mimes=(), extensions=(), cost=None):
+    return registry.register(target, mimes=mimes, extensions=extensions, cost=cost)
+
+
+_lazy_modules = {}
+
+
+def lazy_import(module_name, attr=None):
+    """
+    Imports an optional backend the first time it is needed.
+    Returns the module (or attr from it), or None when it isn't installed.
+    """
+    key = (module_name, attr)
+    if key not in _lazy_modules:
+        try:
+            module = importlib.import_module(module_name)
+            _lazy_modules[key] = getattr(module, attr) if attr else module
+        except Exception:
+            _lazy_modules[key] = None
+    return _lazy_modules[key]
@@ -0,0 +1,77 @@
+import mimetypes
+import os
+
+from ..extractor_registry import COST_HEADER, Extractor, lazy_import
+from ..metadata_engine import fs_date, safe_date
+
+
+class MediaExtractor(Extractor):
+    """
+    Audio/video tags via hachoir at its fastest quality setting, which
+    parses container headers and tag blocks but not the media stream.
+    """
+    name = "media"
+    cost = COST_HEADER
+
+    def extract(self, path):
+        mime, _ = mimetypes.guess_type(path)
+        category = (mime or "").split("/")[0] if mime else ""
+        if category not in ("audio", "video"):
+            category = "media"
+
+        modified = fs_date(path)
+        meta = {
+            "title": os.path.splitext(os.path.basename(path))[0],
+            "author": "",
+            "category": category,
+            "keywords": [],
+            "date_created": modified,
+            "date_modified": modified,
+            "duration": None,
+            "confidence": 0.40
+        }
+
+        create_parser = lazy_import("hachoir.parser", "createParser")
+        extract = lazy_import("hachoir.metadata", "extractMetadata")
+        if not create_parser or not extract:
+            return meta
+
+        try:
+            parser = create_parser(path)
+            if parser is None:
+                return meta
+            with parser:
+                info = extract(parser, 0.0)
+        except Exception:
+            return meta
+        if info is None:
+            return meta
+
+        def first(key):
+            return info.get(key) if info.has(key) else None
+
+        title = first("title")
+        if title:
+            meta["title"] = str(title)
+            meta["confidence"] += 0.15
+
+        author = first("author") or first("artist")
+        if author:
+            meta["author"] = str(author)
+
+        created = first("creation_date")
+        if created:
+            meta["date_created"] = safe_date(created)[:10]
+            meta["confidence"] += 0.10
+
+        duration = first("duration")
+        if duration is not None:
+            meta["duration"] = str(duration)
+
+        for key in ("album", "producer", "compression"):
+            val = first(key)
+            if val:
+                meta["keywords"].append(str(val))
+
+        meta["confidence"] = round(meta["confidence"], 2)
+        return meta
@@ -0,0 +1,120 @@
+import os
+import zipfile
+from xml.etree import ElementTree
+
+from ..extractor_registry import COST_HEADER, Extractor
+from ..metadata_engine import fs_date
+
+# Office Open XML files are zip archives. Title/author/dates live in
+# docProps/core.xml and page/slide counts in docProps/app.xml, so only
+# the zip central directory and those two small members are read; the
+# document body is never loaded (python-docx/openpyxl/python-pptx would
+# parse the whole package).
+CORE_PROPS = "docProps/core.xml"
+APP_PROPS = "docProps/app.xml"
+
+NS = {
+    "cp": "http://schemas.openxmlformats.org/package/2006/metadata/core-properties",
+    "dc": "http://purl.org/dc/elements/1.1/",
+    "dcterms": "http://purl.org/dc/terms/",
+    "ep": "http://schemas.openxmlformats.org/officeDocument/2006/extended-properties",
+}
+
+MAX_PROPS_BYTES = 1024 * 1024
+
+
+def _read_member(zf, name):
+    try:
+        info = zf.getinfo(name)
+    except KeyError:
+        return None
+    if info.file_size > MAX_PROPS_BYTES:
+        return None
+    return zf.read(info)
+
+
+def _text(root, tag):
+    el = root.find(tag, NS)
+    if el is None or not el.text:
+        return ""
+    return el.text.strip()
+
+
+class OfficeExtractor(Extractor):
+    name = "office"
+    cost = COST_HEADER
+    category = "document"
+    count_field = "Pages"
+
+    def extract(self, path):
+        modified = fs_date(path)
+        meta = {
+            "title": os.path.splitext(os.path.basename(path))[0],
+            "author": "",
+            "subject": "",
+            "category": self.category,
+            "keywords": [],
+            "date_created": modified,
+            "date_modified": modified,
+            "page_count": None,
+            "confidence": 0.45
+        }
+
+        try:
+            with zipfile.ZipFile(path) as zf:
+                core = _read_member(zf, CORE_PROPS)
+                app = _read_member(zf, APP_PROPS)
+        except (OSError, zipfile.BadZipFile):
+            return meta
+
+        if core:
+            try:
+                root = ElementTree.fromstring(core)
+            except ElementTree.ParseError:
+                root = None
+            if root is not None:
+                title = _text(root, "dc:title")
+                if title:
+                    meta["title"] = title
+                    meta["confidence"] += 0.15
+                meta["author"] = _text(root, "dc:creator")
+                meta["subject"] = _text(root, "dc:subject")
+                keywords = _text(root, "cp:keywords")
+                if keywords:
+                    sep = ";" if ";" in keywords else ","
+                    meta["keywords"] = [k.strip() for k in keywords.split(sep) if k.strip()]
+                created = _text(root, "dcterms:created")
+                if created:
+                    meta["date_created"] = created[:10]
+                    meta["confidence"] += 0.10
+                changed = _text(root, "dcterms:modified")
+                if changed:
+                    meta["date_modified"] = changed[:10]
+
+        if app and self.count_field:
+            try:
+                count = _text(ElementTree.fromstring(app), f"ep:{self.count_field}")
+                meta["page_count"] = int(count) if count else None
+            except (ElementTree.ParseError, ValueError):
+                pass
+
+        meta["confidence"] = round(meta["confidence"], 2)
+        return meta
+
+
+class DocxExtractor(OfficeExtractor):
+    name = "docx"
+    category = "document"
+    count_field = "Pages"
+
+
+class XlsxExtractor(OfficeExtractor):
+    name = "xlsx"
+    category = "spreadsheet"
+    count_field = None
+
+
+class PptxExtractor(OfficeExtractor):
+    name = "pptx"
+    category = "presentation"
+    count_field = "Slides"
@@ -0,0 +1,259 @@
+"""
+Structured fields from document text.
+
+One precompiled regex finds dates, currency amounts, invoice/permit
+numbers, project names and agency names in a single pass over each page
+or chunk. The text is lowercased first, which matches faster than
+IGNORECASE, and a guard skips positions inside words before any branch
+is tried. FieldRun keeps the best candidate per field as text streams in
+(like classifier.ClassificationRun), so extractors can stop reading once
+the fields are settled.
+
+Fields set by FieldRun.apply():
+  document_date    ISO date; labelled dates ("Invoice Date:", "Issued")
+                   beat unlabelled ones, earlier beats later
+  amount, currency "Amount due"/"Balance due" first, then "Total"/"Fee"
+                   with a currency or cents, else the largest amount
+                   with a currency
+  invoice_number, permit_number
+  project          from "Project:" / "Project Name:" lines
+  agency           first configured agency mentioned
+"""
+import re
+import threading
+from datetime import date
+
+from .tracing import traced
+
+# Agencies looked for when config/classification_rules.json has no
+# "agencies" list.
+DEFAULT_AGENCIES = [
+    "Missouri Department of Natural Resources",
+    "Department of Natural Resources",
+    "Natural Resources Conservation Service",
+    "U.S. Army Corps of Engineers",
+    "Army Corps of Engineers",
+    "Environmental Protection Agency",
+    "Internal Revenue Service",
+    "Department of Transportation",
+    "DNR", "USDA", "NRCS", "IRS", "EPA", "FEMA", "MoDOT",
+]
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+_MONTH = (r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|"
+          r"aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?")
+_DATE_LABEL = (r"(?:(?:invoice|issue|permit|effective|statement|document|billing|bill|report)"
+               r"\s+date|date\s+(?:issued|of\s+issue)|issued(?:\s+on)?|dated)")
+_DUE_LABEL = r"(?:amount\s+due|total\s+due|balance\s+due|grand\s+total)"
+_AMOUNT_LABEL = rf"(?:(?P<due_label>{_DUE_LABEL})|total|fee)"
+_CURRENCY = r"(?:[$€£]|usd|eur|gbp)"
+_NUMBER = r"\d{1,3}(?:,\d{3})+(?:\.\d{2})?|\d+(?:\.\d{2})?"
+_CURRENCY_CODES = {"$": "USD", "€": "EUR", "£": "GBP"}
+
+# labelled values score higher; within a score the first one wins
+DUE = 3             # amounts labelled as what is owed
+LABELLED = 2
+UNLABELLED = 1
+
+# text kept back from one chunk for the next, so a field split across
+# chunks is matched whole
+CARRY_CHARS = 256
+
+
+def _pattern(agencies):
+    date = (
+        rf"(?:(?P<date_label>{_DATE_LABEL})\s*[:\-]?\s*)?"
+        r"(?:(?P<iso_y>(?:19|20)\d\d)-(?P<iso_m>\d\d?)-(?P<iso_d>\d\d?)"
+        r"|(?P<us_m>\d\d?)/(?P<us_d>\d\d?)/(?P<us_y>(?:19|20)\d\d)"
+        rf"|(?P<long_mon>{_MONTH})\s+(?P<long_d>\d\d?)(?:st|nd|rd|th)?,?\s+(?P<long_y>(?:19|20)\d\d)"
+        rf"|(?P<dmy_d>\d\d?)(?:st|nd|rd|th)?\s+(?P<dmy_mon>{_MONTH}),?\s+(?P<dmy_y>(?:19|20)\d\d))"
+        r"(?!\d)"
+    )
+    amount = (
+        rf"(?:(?P<amount_label>{_AMOUNT_LABEL})\s*[:\-]?\s*(?P<label_cur>{_CURRENCY})?\s?(?P<label_amount>{_NUMBER})"
+        rf"|(?P<cur>{_CURRENCY})\s?(?P<amount>{_NUMBER}))(?![\d,])"
+    )
+    number = (
+        r"(?P<id_kind>invoice|inv|permit|licen[cs]e)\s*"
+        r"(?:no\b\.?|number|num\b\.?|#|id\b)\s*[:#]?\s*"
+        r"(?P<id>[a-z0-9](?:[a-z0-9\-/]{0,30}[a-z0-9])?)"
+    )
+    project = r"project(?:\s+name)?\s*:\s*(?P<project>[^\r\n]{2,80})"
+    parts = [date, amount, number, project]
+    if agencies:
+        names = sorted((a.lower() for a in agencies), key=len, reverse=True)
+        parts.append(r"(?P<agency>" + "|".join(re.escape(a) for a in names) + r")(?!\w)")
+    # every field starts a word (or at a currency sign)
+    return re.compile(r"(?<!\w)(?=[\w$€£])(?:" + "|".join(f"(?:{p})" for p in parts) + ")")
+
+
+class FieldExtractor:
+    """
+    The compiled pattern bank. Build once (get_field_extractor()) and
+    start() a FieldRun per document.
+    """
+
+    def __init__(self, agencies=None):
+        agencies = DEFAULT_AGENCIES if agencies is None else agencies
+        self.agencies = {a.lower(): a for a in agencies if a}
+        self.pattern = _pattern(list(self.agencies.values()))
+
+    def start(self):
+        return FieldRun(self)
+
+    def extract(self, text):
+        run = self.start()
+        run.feed(text)
+        return run.fields()
+
+
+class FieldRun:
+    """
+    Streaming state for one document: feed() pages or chunks, then
+    apply() the fields to a metadata dict.
+    """
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self._best = {}     # field -> (score, value)
+        self._carry = ""
+
+    @property
+    def decided(self):
+        """
+        True once a labelled date and a document number (or a labelled
+        amount) were found; later text is unlikely to improve on them.
+        """
+        best = self._best
+        dated = best.get("document_date", (0,))[0] >= LABELLED
+        numbered = ("invoice_number" in best or "permit_number" in best
+                    or best.get("amount", (0,))[0] >= LABELLED)
+        return dated and numbered
+
+    @traced("fields.feed")
+    def feed(self, text):
+        if not text:
+            return
+        window = self._carry + text
+        # scan up to the last line break near the end (labels and values
+        # share a line) and keep the rest for the next chunk; without one,
+        # keep about CARRY_CHARS, cut at a space
+        start = max(len(window) - CARRY_CHARS, 0)
+        cut = window.rfind("\n", start)
+        if cut < 0:
+            cut = window.find(" ", start) if start else 0
+            if cut < 0:
+                cut = start
+        self._carry = window[cut:]
+        self._scan(window[:cut])
+
+    def flush(self):
+        carry, self._carry = self._carry, ""
+        self._scan(carry)
+
+    def _scan(self, text):
+        lowered = text.lower()
+        # original case for project names, when lowering kept the offsets
+        source = text if len(lowered) == len(text) else lowered
+        for m in self.extractor.pattern.finditer(lowered):
+            g = m.groupdict()
+            if g["agency"]:
+                name = self.extractor.agencies.get(g["agency"], g["agency"])
+                self._offer("agency", UNLABELLED, name)
+            elif g["id"]:
+                if any(c.isdigit() for c in g["id"]):
+                    field = "invoice_number" if g["id_kind"].startswith("inv") else "permit_number"
+                    self._offer(field, UNLABELLED, g["id"].upper())
+            elif g["project"]:
+                project = source[m.start("project"):m.end("project")].strip(" .,;:-")
+                if project:
+                    self._offer("project", UNLABELLED, project)
+            elif g["label_amount"] or g["amount"]:
+                self._amount(g)
+            else:
+                self._date(g)
+
+    def _date(self, g):
+        if g["iso_y"]:
+            y, mo, d = g["iso_y"], g["iso_m"], g["iso_d"]
+        elif g["us_y"]:
+            y, mo, d = g["us_y"], g["us_m"], g["us_d"]
+        elif g["long_y"]:
+            y, mo, d = g["long_y"], _MONTHS[g["long_mon"][:3]], g["long_d"]
+        elif g["dmy_y"]:
+            y, mo, d = g["dmy_y"], _MONTHS[g["dmy_mon"][:3]], g["dmy_d"]
+        else:
+            return
+        try:
+            value = date(int(y), int(mo), int(d)).isoformat()
+        except ValueError:
+            return
+        self._offer("document_date", LABELLED if g["date_label"] else UNLABELLED, value)
+
+    def _amount(self, g):
+        if g["label_amount"]:
+            score, text, currency = LABELLED, g["label_amount"], g["label_cur"]
+            if g["due_label"]:
+                score = DUE
+            elif not currency and "." not in text:
+                return  # "Total 3 items", "fee schedule 2"
+        else:
+            score, text, currency = UNLABELLED, g["amount"], g["cur"]
+        value = float(text.replace(",", ""))
+        if not value:
+            return
+        current = self._best.get("amount")
+        if current is not None:
+            # labelled: the first one; unlabelled: the largest, which is
+            # usually the total
+            if current[0] > score:
+                return
+            if current[0] == score and (score > UNLABELLED or value <= current[1]):
+                return
+        self._best["amount"] = (score, value)
+        if currency:
+            self._best["currency"] = (score, _CURRENCY_CODES.get(currency, currency.upper()))
+
+    def _offer(self, field, score, value):
+        current = self._best.get(field)
+        if current is None or score > current[0]:
+            self._best[field] = (score, value)
+            return True
+        return False
+
+    def fields(self):
+        self.flush()
+        found = {field: value for field, (_, value) in self._best.items()}
+        if "amount" in found:
+            found["amount"] = f"{found['amount']:.2f}"
+        return found
+
+    def apply(self, meta):
+        """Sets the fields found on meta (existing values are replaced)."""
+        meta.update(self.fields())
+        return meta
+
+
+# ------------------------------------------------------------
+# Shared instance (pattern compiled once per process)
+# ------------------------------------------------------------
+
+_extractor = None
+_lock = threading.Lock()
+
+
+def get_field_extractor():
+    global _extractor
+    if _extractor is None:
+        with _lock:
+            if _extractor is None:
+                from .classifier import load_rules
+                try:
+                    agencies = load_rules().get("agencies")
+                except (OSError, ValueError):
+                    agencies = None
+                _extractor = FieldExtractor(agencies)
+    return _extractor
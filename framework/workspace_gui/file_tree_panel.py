@@ -1,29 +1,57 @@
 import os
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QTreeView, QFileSystemModel, QFileDialog, QLabel
+    QPushButton, QTreeView, QFileDialog, QLabel, QCheckBox, QComboBox
 )
-from PyQt6.QtCore import pyqtSignal, QModelIndex
+from PyQt6.QtCore import Qt, pyqtSignal, QModelIndex
+
+from .classifier import get_classifier
+from .duplicates_dialog import DuplicatesDialog
+from .lazy_tree_model import LazyFileTreeModel
+from .metadata_cache import get_default_cache
+from .metadata_engine import extract_metadata
+from .similar_dialog import SimilarDocumentsDialog
+
+# categories produced by the extractors themselves; rule categories are
+# added from the classifier
+BUILTIN_CATEGORIES = [
+    "document", "spreadsheet", "presentation", "image", "text",
+    "audio", "video", "media", "executable", "library",
+]
+ALL_CATEGORIES = "All categories"
+# files on each side of the selection whose previews are warmed up
+PREFETCH_RADIUS = 3
 
 
 class FileTreePanel(QWidget):
     """
     Left panel:
-      - Folder chooser button
-      - File system tree view
-    Emits: file_selected(path: str)
+      - Folder chooser, duplicate finder and similar-document buttons
+      - Filters: supported files only, cached category
+      - Lazy file tree (listed in the background, with cached
+        category/confidence columns)
+    Emits: file_selected(path: str), root_changed(path: str),
+           neighbours_selected(paths: list)  files next to the selection
+           files_renamed(list of (old_path, new_path))  cluster renames
     """
     file_selected = pyqtSignal(str)
+    root_changed = pyqtSignal(str)
+    neighbours_selected = pyqtSignal(list)
+    files_renamed = pyqtSignal(list)
 
-    def __init__(self, settings_manager, parent=None):
+    def __init__(self, settings_manager, parent=None, cache=None, extract=extract_metadata):
         super().__init__(parent)
         self.settings_manager = settings_manager
+        self.cache = cache if cache is not None else get_default_cache()
+        self.extract = extract
 
-        self.model = QFileSystemModel(self)
-        self.model.setRootPath(os.path.expanduser("~"))
-        self.model.setReadOnly(True)
+        self.model = LazyFileTreeModel(self.cache, self)
+        self.model.set_show_metadata_columns(
+            settings_manager.get_setting("tree_metadata_columns", True)
+        )
 
         self._init_ui()
+        self.model.set_root_path(os.path.expanduser("~"))
 
     def _init_ui(self):
         layout = QVBoxLayout(self)
@@ -34,18 +62,41 @@ class FileTreePanel(QWidget):
         self.current_root_label = QLabel("Root: ~", self)
         btn_choose_root = QPushButton("Choose Folder", self)
         btn_choose_root.clicked.connect(self.choose_root)
+        btn_duplicates = QPushButton("Find Duplicates…", self)
+        btn_duplicates.clicked.connect(self.find_duplicates)
+        btn_similar = QPushButton("Find Similar…", self)
+        btn_similar.clicked.connect(self.find_similar)
 
         top_bar.addWidget(self.current_root_label)
         top_bar.addStretch()
+        top_bar.addWidget(btn_duplicates)
+        top_bar.addWidget(btn_similar)
         top_bar.addWidget(btn_choose_root)
 
+        filter_bar = QHBoxLayout()
+        self.supported_only = QCheckBox("Supported files only", self)
+        self.supported_only.toggled.connect(self._apply_filters)
+        self.category_filter = QComboBox(self)
+        self.category_filter.addItem(ALL_CATEGORIES)
+        rule_categories = [c["name"] for c in get_classifier().categories]
+        for name in sorted(set(BUILTIN_CATEGORIES + rule_categories)):
+            self.category_filter.addItem(name)
+        self.category_filter.currentTextChanged.connect(self._apply_filters)
+
+        filter_bar.addWidget(self.supported_only)
+        filter_bar.addStretch()
+        filter_bar.addWidget(self.category_filter)
+
         self.tree = QTreeView(self)
         self.tree.setModel(self.model)
-        self.tree.setRootIndex(self.model.index(os.path.expanduser("~")))
+        # fixed row height lets the view skip per-row size hints,
+        # which keeps scrolling smooth in folders with huge listings
+        self.tree.setUniformRowHeights(True)
         self.tree.doubleClicked.connect(self.on_item_double_clicked)
-        self.tree.setHeaderHidden(True)
+        self.tree.setHeaderHidden(not self.model.show_metadata_columns)
 
         layout.addLayout(top_bar)
+        layout.addLayout(filter_bar)
         layout.addWidget(self.tree)
 
     def choose_root(self):
@@ -53,13 +104,65 @@ class FileTreePanel(QWidget):
             self, "Select Root Folder", os.path.expanduser("~")
         )
         if folder:
-            self.model.setRootPath(folder)
-            self.tree.setRootIndex(self.model.index(folder))
+            self.model.set_root_path(folder)
             self.current_root_label.setText(f"Root: {folder}")
+            self.root_changed.emit(folder)
+
+    def find_duplicates(self):
+        root = self.model.root_path()
+        if not root:
+            return
+        dialog = DuplicatesDialog(root, self)
+        dialog.file_selected.connect(self.file_selected)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+
+    def find_similar(self):
+        root = self.model.root_path()
+        if not root:
+            return
+        dialog = SimilarDocumentsDialog(
+            root, self.settings_manager, self, cache=self.cache, metadata_for=self.extract
+        )
+        dialog.file_selected.connect(self.file_selected)
+        dialog.renamed.connect(self.files_renamed)
+        dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dialog.show()
+
+    def _apply_filters(self, *_):
+        category = self.category_filter.currentText()
+        self.model.set_filters(
+            supported_only=self.supported_only.isChecked(),
+            categories=[] if category == ALL_CATEGORIES else [category],
+        )
+
+    def refresh_paths(self, paths):
+        """
+        Re-lists loaded folders affected by changes on disk.
+        Accepts paths or (old, new) pairs.
+        """
+        flat = []
+        for item in paths:
+            if isinstance(item, (tuple, list)):
+                flat.extend(item)
+            else:
+                flat.append(item)
+        self.model.refresh_dirs(flat)
 
     def on_item_double_clicked(self, index: QModelIndex):
         if not index.isValid():
             return
-        path = self.model.filePath(index)
-        if os.path.isfile(path):
-            self.file_selected.emit(path)
+        if not self.model.isDir(index):
+            self.file_selected.emit(self.model.filePath(index))
+            self.neighbours_selected.emit(self._neighbours(index))
+
+    def _neighbours(self, index):
+        parent = index.parent()
+        row = index.row()
+        paths = []
+        for offset in range(1, PREFETCH_RADIUS + 1):
+            for r in (row + offset, row - offset):
+                sibling = self.model.index(r, 0, parent)
+                if sibling.isValid() and not self.model.isDir(sibling):
+                    paths.append(self.model.filePath(sibling))
+        return paths
@@ -0,0 +1,258 @@
+"""
+Content-based file type detection.
+
+    python -m workspace_gui.filetype_detect <path>... [--mismatches]
+
+Reads the first SNIFF_BYTES of a file and matches them against one
+precompiled regex of magic signatures, so misnamed files (scanner output
+without an extension, PDFs saved as .dat, JPEGs saved as .png) still
+reach the right extractor. Results are cached per (path, size, mtime);
+detect_many() does a single small read per file and is cheap enough to
+run over whole trees.
+"""
+import argparse
+import mimetypes
+import os
+import re
+import sys
+from functools import lru_cache
+
+SNIFF_BYTES = 512
+CACHE_ENTRIES = 65536
+
+# (group, signature at offset 0, MIME type). Order matters: the first
+# alternative that matches wins, so specific container brands come
+# before the generic container.
+_SIGNATURES = [
+    ("pdf", rb"%PDF-", "application/pdf"),
+    ("jpeg", rb"\xff\xd8\xff", "image/jpeg"),
+    ("png", rb"\x89PNG\r\n\x1a\n", "image/png"),
+    ("gif", rb"GIF8[79]a", "image/gif"),
+    ("tiff", rb"II\*\x00|MM\x00\*", "image/tiff"),
+    ("bmp", rb"BM.{4}\x00\x00\x00\x00", "image/bmp"),
+    ("webp", rb"RIFF.{4}WEBP", "image/webp"),
+    ("wav", rb"RIFF.{4}WAVE", "audio/x-wav"),
+    ("avi", rb"RIFF.{4}AVI ", "video/x-msvideo"),
+    ("heic", rb".{4}ftyp(?:heic|heix|hevc|mif1)", "image/heic"),
+    ("m4a", rb".{4}ftypM4A ", "audio/mp4"),
+    ("mov", rb".{4}ftypqt  ", "video/quicktime"),
+    ("mp4", rb".{4}ftyp", "video/mp4"),
+    ("mp3", rb"ID3[\x02-\x04]\x00|\xff[\xfb\xf3\xf2]", "audio/mpeg"),
+    ("flac", rb"fLaC", "audio/flac"),
+    ("ogg", rb"OggS", "audio/ogg"),
+    ("mkv", rb"\x1a\x45\xdf\xa3", "video/x-matroska"),
+    ("exe", rb"MZ", "application/x-msdownload"),
+    ("docx", rb"PK\x03\x04.{26}(?:word/)", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    ("xlsx", rb"PK\x03\x04.{26}(?:xl/)", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    ("pptx", rb"PK\x03\x04.{26}(?:ppt/)", "application/vnd.openxmlformats-officedocument.presentationml.presentation"),
+    ("epub", rb"PK\x03\x04.{26}mimetypeapplication/epub\+zip", "application/epub+zip"),
+    ("zip", rb"PK\x03\x04|PK\x05\x06", "application/zip"),
+    ("ole", rb"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),
+    ("gzip", rb"\x1f\x8b", "application/gzip"),
+    ("bzip2", rb"BZh[1-9]", "application/x-bzip2"),
+    ("xz", rb"\xfd7zXZ\x00", "application/x-xz"),
+    ("sevenzip", rb"7z\xbc\xaf\x27\x1c", "application/x-7z-compressed"),
+    ("rar", rb"Rar!\x1a\x07", "application/vnd.rar"),
+    ("sqlite", rb"SQLite format 3\x00", "application/vnd.sqlite3"),
+    ("rtf", rb"\{\\rtf", "application/rtf"),
+]
+_SIGNATURE_RE = re.compile(
+    b"|".join(b"(?P<%s>%s)" % (name.encode(), pattern) for name, pattern, _ in _SIGNATURES),
+    re.DOTALL,
+)
+_MIME_BY_GROUP = {name: mime for name, _, mime in _SIGNATURES}
+
+PE_OFFSET_FIELD = 0x3C
+
+
+def _is_pe(header):
+    # "MZ" alone is two printable letters; a real executable points at
+    # its "PE\0\0" header from offset 0x3c
+    if len(header) < PE_OFFSET_FIELD + 4:
+        return False
+    offset = int.from_bytes(header[PE_OFFSET_FIELD:PE_OFFSET_FIELD + 4], "little")
+    if offset + 4 <= len(header):
+        return header[offset:offset + 4] == b"PE\x00\x00"
+    return not _looks_like_text(header)
+
+
+def _is_mpeg_frame(header):
+    if header[:3] == b"ID3":
+        return True
+    # bitrate index 15 and sample rate index 3 are reserved
+    return len(header) >= 3 and header[2] >> 4 != 0xF and (header[2] >> 2) & 3 != 3
+
+
+# Short signatures that also occur at the start of other files; a match
+# only counts when the rest of the header agrees.
+_VALIDATORS = {"exe": _is_pe, "mp3": _is_mpeg_frame}
+
+# Containers and plain text say little about what a file is for; they
+# never override a more specific type implied by the extension (.docx
+# whose first zip entry isn't under word/, .csv, .svg, ...).
+GENERIC_MIMES = {
+    "application/zip", "application/x-ole-storage", "application/gzip", "text/plain",
+}
+
+TAR_MAGIC_OFFSET = 257
+
+
+def sniff(header: bytes):
+    """MIME type implied by a file's leading bytes, or None."""
+    if not header:
+        return None
+    m = _SIGNATURE_RE.match(header)
+    if m:
+        validate = _VALIDATORS.get(m.lastgroup)
+        if validate is None or validate(header):
+            return _MIME_BY_GROUP[m.lastgroup]
+    if header[TAR_MAGIC_OFFSET:TAR_MAGIC_OFFSET + 5] == b"ustar":
+        return "application/x-tar"
+    # some producers put junk before the PDF header
+    if header.find(b"%PDF-", 0, SNIFF_BYTES) >= 0:
+        return "application/pdf"
+    if _looks_like_text(header):
+        return "text/plain"
+    return None
+
+
+def _looks_like_text(header):
+    if b"\x00" in header:
+        return False
+    try:
+        header.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # a multi-byte character cut off by the read limit is fine
+        if e.start < len(header) - 3:
+            return False
+    return True
+
+
+def read_header(path, limit=SNIFF_BYTES):
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        return os.read(fd, limit)
+    finally:
+        os.close(fd)
+
+
+@lru_cache(maxsize=CACHE_ENTRIES)
+def _sniff_cached(path, size, mtime_ns):
+    # (content MIME type, whether the header reads as text)
+    try:
+        header = read_header(path)
+    except OSError:
+        return None, False
+    return sniff(header), bool(header) and _looks_like_text(header)
+
+
+def _detect_cached(path, size, mtime_ns):
+    return _sniff_cached(path, size, mtime_ns)[0]
+
+
+def detect(path, st=None):
+    """
+    MIME type from the file's content (cached per path, size and mtime),
+    or None if unreadable or unrecognised.
+    """
+    if st is None:
+        st = os.stat(path)
+    return _detect_cached(path, st.st_size, st.st_mtime_ns)
+
+
+def guess_mime(path, st=None):
+    """
+    MIME type to dispatch extraction on: the extension's, unless the
+    content says otherwise (or the extension says nothing). A text
+    extension on a file that reads as text is always kept.
+    """
+    ext_mime, _ = mimetypes.guess_type(path)
+    try:
+        if st is None:
+            st = os.stat(path)
+        content_mime, is_text = _sniff_cached(path, st.st_size, st.st_mtime_ns)
+    except OSError:
+        return ext_mime
+    if content_mime is None or content_mime == ext_mime:
+        return ext_mime or content_mime
+    if ext_mime and (content_mime in GENERIC_MIMES or (is_text and ext_mime.startswith("text/"))):
+        return ext_mime
+    return content_mime
+
+
+def detect_many(entries):
+    """
+    Returns {path: content MIME type or None} for entries, which can be
+    os.DirEntry objects or (path, size, mtime_ns) tuples as yielded by
+    index.iter_files(). One read of SNIFF_BYTES per uncached file.
+    """
+    result = {}
+    for entry in entries:
+        if isinstance(entry, os.DirEntry):
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            path, size, mtime_ns = entry.path, st.st_size, st.st_mtime_ns
+        else:
+            path, size, mtime_ns = entry[0], entry[1], entry[2]
+        result[path] = _detect_cached(path, size, mtime_ns)
+    return result
+
+
+def detect_dir(path):
+    """detect_many() over the regular files directly inside path."""
+    with os.scandir(path) as it:
+        files = [e for e in it if e.is_file(follow_symlinks=False)]
+    return detect_many(files)
+
+
+def cache_info():
+    return _sniff_cached.cache_info()
+
+
+def clear_cache():
+    _sniff_cached.cache_clear()
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m workspace_gui.filetype_detect",
+        description="Detect file types from content and flag misnamed files.",
+    )
+    parser.add_argument("paths", nargs="+", help="files or folders (folders are walked)")
+    parser.add_argument("--mismatches", action="store_true",
+                        help="only list files whose content disagrees with their extension")
+    args = parser.parse_args(argv)
+
+    from .index import iter_files
+
+    entries = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            entries.extend(iter_files(path))
+        elif os.path.isfile(path):
+            st = os.stat(path)
+            entries.append((path, st.st_size, st.st_mtime_ns))
+        else:
+            print(f"not found: {path}", file=sys.stderr)
+
+    mismatches = 0
+    for path, content_mime in detect_many(entries).items():
+        ext_mime, _ = mimetypes.guess_type(path)
+        dispatched = guess_mime(path)
+        mismatch = dispatched != ext_mime
+        mismatches += mismatch
+        if mismatch or not args.mismatches:
+            flag = "  <- extension says " + (ext_mime or "nothing") if mismatch else ""
+            print(f"{content_mime or '?':40}  {path}{flag}")
+    print(f"{len(entries)} files, {mismatches} misnamed or without extension", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+Headless bulk indexer.
+
+    python -m workspace_gui.index <root> [-o index.jsonl] [-j WORKERS] [--store DIR]
+                                  [--metadata-only]
+
+Walks <root> with os.scandir, extracts metadata for every file on a
+process pool and appends one JSON record per file to the output as it
+goes. Re-running against the same output resumes: files whose size and
+mtime match an existing record are skipped.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, ProcessPoolExecutor, wait
+from types import SimpleNamespace
+
+from .metadata_engine import extract_uncached, set_full_text
+
+DEFAULT_OUTPUT = "workspace_index.jsonl"
+PROGRESS_INTERVAL = 5.0
+
+
+def iter_files(root, include_hidden=False, exclude=()):
+    """
+    Yields (path, size, mtime_ns) for every regular file under root.
+    Symlinks are not followed; unreadable directories are skipped.
+    """
+    exclude = {os.path.abspath(p) for p in exclude}
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        for entry in entries:
+            if not include_hidden and entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    if entry.path in exclude or os.path.abspath(entry.path) in exclude:
+                        continue
+                    st = entry.stat(follow_symlinks=False)
+                    yield entry.path, st.st_size, st.st_mtime_ns
+            except OSError:
+                continue
+
+
+def load_index(output_path):
+    """
+    Reads an existing JSONL index into {path: (size, mtime_ns)}.
+    Later records win; a torn final line from an interrupted run is ignored.
+    """
+    done = {}
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if "error" in rec:
+                continue
+            done[rec["path"]] = (rec["size"], rec["mtime_ns"])
+    return done
+
+
+def _extract_one(path):
+    # runs in a worker process; the parent owns the cache and the output
+    try:
+        meta, body = extract_uncached(path)
+        return path, meta, body, None
+    except Exception as e:
+        return path, None, None, f"{type(e).__name__}: {e}"
+
+
+class IndexStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.indexed = 0
+        self.skipped = 0
+        self.errors = 0
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def files_per_sec(self):
+        elapsed = self.elapsed
+        return self.indexed / elapsed if elapsed > 0 else 0.0
+
+    def summary(self):
+        return (
+            f"indexed {self.indexed} files, skipped {self.skipped}, "
+            f"errors {self.errors} in {self.elapsed:.1f}s "
+            f"({self.files_per_sec:.1f} files/s)"
+        )
+
+
+def index_tree(root, output_path=DEFAULT_OUTPUT, workers=None, cache=None,
+               include_hidden=False, progress=None, search_index=None, full_text=True):
+    """
+    Indexes every file under root into output_path (JSONL) and returns
+    IndexStats. If cache is a MetadataCache and/or search_index a
+    SearchIndex, results are stored there too, so the GUI starts warm.
+    progress(stats) is called every few seconds.
+    With full_text=False, PDFs are indexed from their /Info, XMP and page
+    tree and page text is read only when classification needs it.
+    """
+    workers = workers or os.cpu_count() or 1
+    done = load_index(output_path)
+    stats = IndexStats()
+    last_report = time.perf_counter()
+
+    pending = {}
+    files = iter_files(root, include_hidden=include_hidden, exclude=[output_path])
+
+    with open(output_path, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=set_full_text,
+                                initargs=(full_text,)) as pool:
+
+        def drain(block):
+            nonlocal last_report
+            finished, _ = wait(
+                list(pending), return_when=FIRST_COMPLETED if block else ALL_COMPLETED
+            )
+            for fut in finished:
+                size, mtime_ns = pending.pop(fut)
+                path, meta, body, error = fut.result()
+                rec = {"path": path, "size": size, "mtime_ns": mtime_ns}
+                if error:
+                    rec["error"] = error
+                    stats.errors += 1
+                else:
+                    rec["metadata"] = meta
+                    stats.indexed += 1
+                    st = SimpleNamespace(st_size=size, st_mtime_ns=mtime_ns)
+                    if cache is not None:
+                        cache.put(path, meta, st)
+                    if search_index is not None:
+                        search_index.update(path, meta, st, commit=False, body=body)
+                out.write(json.dumps(rec, default=str) + "\n")
+            out.flush()
+            if search_index is not None:
+                search_index.commit()
+
+            now = time.perf_counter()
+            if progress and now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                progress(stats)
+
+        # keep a bounded window in flight so a 50k-file tree doesn't queue
+        # every future up front
+        window = workers * 4
+        for path, size, mtime_ns in files:
+            if done.get(path) == (size, mtime_ns):
+                stats.skipped += 1
+                continue
+            pending[pool.submit(_extract_one, path)] = (size, mtime_ns)
+            if len(pending) >= window:
+                drain(block=True)
+
+        if pending:
+            drain(block=False)
+
+    if cache is not None:
+        cache.flush()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m workspace_gui.index",
+        description="Extract metadata for a whole directory tree.",
+    )
+    parser.add_argument("root", help="folder to index")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT,
+                        help=f"JSONL index to write/resume (default: {DEFAULT_OUTPUT})")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--hidden", action="store_true",
+                        help="include dotfiles and dot-directories")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="don't store results in the GUI metadata cache")
+    parser.add_argument("--no-search", action="store_true",
+                        help="don't add results to the GUI search index")
+    parser.add_argument("--store", metavar="DIR",
+                        help="also save a columnar metadata store (needs NumPy)")
+    parser.add_argument("--metadata-only", action="store_true",
+                        help="skip PDF page text unless classification needs it "
+                             "(implies --no-cache --no-search)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        parser.error(f"not a directory: {args.root}")
+
+    if args.metadata_only:
+        # records without excerpts must not mask a later full extraction
+        args.no_cache = args.no_search = True
+
+    cache = None
+    if not args.no_cache:
+        from .metadata_cache import get_default_cache
+        cache = get_default_cache()
+
+    search_index = None
+    if not args.no_search:
+        from .search_index import get_default_search_index
+        search_index = get_default_search_index()
+
+    def report(stats):
+        print(stats.summary(), file=sys.stderr, flush=True)
+
+    try:
+        stats = index_tree(
+            args.root, args.output, workers=args.workers, cache=cache,
+            include_hidden=args.hidden, progress=report, search_index=search_index,
+            full_text=not args.metadata_only,
+        )
+    except KeyboardInterrupt:
+        print("interrupted; re-run the same command to resume", file=sys.stderr)
+        return 130
+
+    report(stats)
+
+    if args.store:
+        from .metadata_store import MetadataStore
+        store = MetadataStore.from_index(args.output)
+        store.save(args.store)
+        print(f"store: {len(store)} rows -> {args.store}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,29 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QSplitter
 from PyQt6.QtCore import Qt
 
+from .daemon import extract_via
 from .file_tree_panel import FileTreePanel
 from .preview_panel import PreviewPanel
 from .rename_panel import RenamePanel
+from .search_index import get_default_search_index
+from .search_panel import SearchPanel
+from .selection import SelectionPipeline
+from .metadata_cache import get_default_cache
+from .metadata_engine import extract_metadata
+from .startup_profile import section
+from .thumbnail_loader import ThumbnailLoader
+from .thumbnails import ThumbnailCache
+from .watcher import IncrementalUpdater, WorkspaceWatcher
 from .todo_panel import TodoPanel
 
 
-def create_main_widget(parent, settings_manager):
+def create_main_widget(parent, settings_manager, daemon=None):
     """
     Builds the main layout:
-      [ FileTree | (Preview + Rename stacked) ]
+      [ (Search + FileTree) | (Preview + Rename stacked) ]
       [                Todo                  ]
+    With a DaemonClient, extraction, cache lookups and search go to the
+    daemon instead of this process.
     """
 
     root = QWidget(parent)
@@ -22,32 +34,109 @@ def create_main_widget(parent, settings_manager):
     # Top splitter: left (tree) / right (preview+rename)
     top_splitter = QSplitter(Qt.Orientation.Horizontal, root)
 
-    file_tree = FileTreePanel(settings_manager, top_splitter)
+    if daemon is not None:
+        cache = search_index = daemon
+        extract = extract_via(daemon)
+        extract_background = extract_via(daemon, priority="background")
+    else:
+        cache = get_default_cache()
+        search_index = get_default_search_index()
+        extract = extract_background = extract_metadata
+
+    # Left column: search box above the file tree
+    left_splitter = QSplitter(Qt.Orientation.Vertical, top_splitter)
+
+    with section("widget: SearchPanel"):
+        search_panel = SearchPanel(settings_manager, search_index, left_splitter)
+    with section("widget: FileTreePanel"):
+        file_tree = FileTreePanel(
+            settings_manager, left_splitter, cache=cache, extract=extract_background
+        )
+
+    left_splitter.addWidget(search_panel)
+    left_splitter.addWidget(file_tree)
+    left_splitter.setStretchFactor(0, 1)
+    left_splitter.setStretchFactor(1, 3)
 
     right_container = QWidget(top_splitter)
     right_layout = QVBoxLayout(right_container)
     right_layout.setContentsMargins(0, 0, 0, 0)
     right_layout.setSpacing(5)
 
-    preview_panel = PreviewPanel(settings_manager, right_container)
-    rename_panel = RenamePanel(settings_manager, right_container)
+    with section("widget: PreviewPanel"):
+        preview_panel = PreviewPanel(settings_manager, right_container)
+    with section("widget: RenamePanel"):
+        rename_panel = RenamePanel(settings_manager, right_container, extract=extract_background)
 
     right_layout.addWidget(preview_panel, 2)
     right_layout.addWidget(rename_panel, 1)
 
-    top_splitter.addWidget(file_tree)
+    top_splitter.addWidget(left_splitter)
     top_splitter.addWidget(right_container)
     top_splitter.setStretchFactor(0, 1)
     top_splitter.setStretchFactor(1, 2)
 
     # Todo panel at bottom
-    todo_panel = TodoPanel(settings_manager, root)
+    with section("widget: TodoPanel"):
+        todo_panel = TodoPanel(settings_manager, root)
 
     main_layout.addWidget(top_splitter, 3)
     main_layout.addWidget(todo_panel, 1)
 
-    # wiring: when file selected in tree -> preview + rename update
-    file_tree.file_selected.connect(preview_panel.on_file_selected)
-    file_tree.file_selected.connect(rename_panel.on_file_selected)
+    # wiring: file selected in tree -> extract once (off the GUI thread)
+    #         -> preview + rename update
+    selection = SelectionPipeline(root, extract=extract)
+    file_tree.file_selected.connect(selection.on_file_selected)
+    search_panel.file_selected.connect(selection.on_file_selected)
+    for panel in (preview_panel, rename_panel):
+        selection.loading.connect(panel.on_loading)
+        selection.metadata_ready.connect(panel.on_metadata_ready)
+        selection.extraction_failed.connect(panel.on_extraction_failed)
+    root.selection = selection
+
+    # thumbnails: requested with the selection, neighbours prefetched
+    thumbnails = ThumbnailLoader(_thumbnail_cache(settings_manager), parent=root)
+    selection.loading.connect(thumbnails.request)
+    file_tree.neighbours_selected.connect(thumbnails.prefetch)
+    thumbnails.thumbnail_ready.connect(preview_panel.on_thumbnail_ready)
+    root.thumbnails = thumbnails
+
+    # keep cache + search index in sync with the chosen root folder and
+    # with renames done from the rename panel
+    # the daemon keeps its own search index in step with its cache
+    updater = IncrementalUpdater(
+        cache, None if daemon is not None else search_index, root, extract=extract_background
+    )
+    rename_panel.file_renamed.connect(updater.on_file_renamed)
+    updater.set_root(file_tree.model.root_path())
+    file_tree.root_changed.connect(updater.set_root)
+    rename_panel.file_renamed.connect(
+        lambda old, new: file_tree.refresh_paths([old, new])
+    )
+
+    def on_files_renamed(pairs):
+        # batch renames of a similar-documents cluster
+        for old_path, new_path in pairs:
+            updater.on_file_renamed(old_path, new_path)
+        file_tree.refresh_paths(pairs)
+    file_tree.files_renamed.connect(on_files_renamed)
+
+    if settings_manager.get_setting("watch_filesystem", True):
+        watcher = WorkspaceWatcher(root)
+        updater.connect_watcher(watcher)
+        file_tree.root_changed.connect(watcher.watch)
+        watcher.files_changed.connect(file_tree.refresh_paths)
+        watcher.files_removed.connect(file_tree.refresh_paths)
+        watcher.files_renamed.connect(file_tree.refresh_paths)
+        root.watcher = watcher
+    root.updater = updater
 
     return root
+
+
+def _thumbnail_cache(settings_manager):
+    max_mb = settings_manager.get_setting("thumbnail_cache_mb", 64)
+    try:
+        return ThumbnailCache(max_bytes=int(max_mb) * 1024 * 1024)
+    except OSError:
+        return None
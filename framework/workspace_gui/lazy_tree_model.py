@@ -0,0 +1,395 @@
+import itertools
+import mimetypes
+import os
+
+from PyQt6.QtCore import (
+    QAbstractItemModel, QModelIndex, QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+)
+from PyQt6.QtWidgets import QApplication, QStyle
+
+from .extractor_registry import registry
+from .filetype_detect import detect
+from .tracing import traced
+
+BATCH_SIZE = 500
+
+COLUMN_NAME = 0
+COLUMN_CATEGORY = 1
+COLUMN_CONFIDENCE = 2
+HEADERS = ["Name", "Category", "Confidence"]
+
+
+class _Node:
+    __slots__ = (
+        "name", "path", "is_dir", "parent", "children", "row",
+        "size", "mtime_ns", "category", "confidence", "loaded", "loading", "key",
+    )
+
+    def __init__(self, name, path, is_dir, parent=None, size=0, mtime_ns=0):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.parent = parent
+        self.children = []
+        self.row = 0
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.category = ""
+        self.confidence = None
+        self.loaded = False
+        self.loading = False
+        self.key = None     # set by the model; never reused, unlike id()
+
+
+_supported_by_ext = {}
+
+
+def is_supported(name):
+    """True if some registered extractor handles this file name."""
+    ext = os.path.splitext(name)[1].lower()
+    supported = _supported_by_ext.get(ext)
+    if supported is None:
+        mime, _ = mimetypes.guess_type("x" + ext)
+        supported = registry.cost_for("x" + ext, mime) is not None
+        _supported_by_ext[ext] = supported
+    return supported
+
+
+def _supported_by_content(path, st):
+    # only files whose extension says nothing get sniffed (scanner output
+    # without one, ".dat" dumps); known-but-unsupported types stay hidden
+    ext = os.path.splitext(path)[1].lower()
+    if mimetypes.guess_type("x" + ext)[0] not in (None, "application/octet-stream"):
+        return False
+    mime = detect(path, st)
+    return mime is not None and registry.cost_for(path, mime) is not None
+
+
+# ------------------------------------------------------------
+# Background listing
+# ------------------------------------------------------------
+
+class _ListSignals(QObject):
+    batch = pyqtSignal(int, int, list)
+    finished = pyqtSignal(int, int)
+
+
+class _ListTask(QRunnable):
+    """
+    Lists one directory with os.scandir and reports entries in batches of
+    (name, is_dir, size, mtime_ns, category, confidence). Category and
+    confidence come from the metadata cache, never from the files.
+    """
+
+    def __init__(self, generation, node_id, path, cache, supported_only, categories):
+        super().__init__()
+        self.generation = generation
+        self.node_id = node_id
+        self.path = path
+        self.cache = cache
+        self.supported_only = supported_only
+        self.categories = categories
+        self.signals = _ListSignals()
+
+    def run(self):
+        batch = []
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if entry.name.startswith("."):
+                        continue
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        if not is_dir:
+                            if not entry.is_file(follow_symlinks=False):
+                                continue
+                            st = entry.stat(follow_symlinks=False)
+                            if self.supported_only and not is_supported(entry.name) \
+                                    and not _supported_by_content(entry.path, st):
+                                continue
+                            batch.append((entry.name, False, st.st_size, st.st_mtime_ns, "", None))
+                        else:
+                            batch.append((entry.name, True, 0, 0, "", None))
+                    except OSError:
+                        continue
+                    if len(batch) >= BATCH_SIZE:
+                        self._emit(batch)
+                        batch = []
+        except OSError:
+            pass
+        if batch:
+            self._emit(batch)
+        self.signals.finished.emit(self.generation, self.node_id)
+
+    def _emit(self, batch):
+        if self.cache is not None:
+            wanted = [
+                (os.path.join(self.path, name), size, mtime)
+                for name, is_dir, size, mtime, _, _ in batch if not is_dir
+            ]
+            known = self.cache.peek_many(wanted) if wanted else {}
+            if known or self.categories:
+                enriched = []
+                for name, is_dir, size, mtime, _, _ in batch:
+                    meta = known.get(os.path.join(self.path, name)) if not is_dir else None
+                    category = (meta or {}).get("category") or ""
+                    if self.categories and not is_dir and category not in self.categories:
+                        continue
+                    enriched.append(
+                        (name, is_dir, size, mtime, category, (meta or {}).get("confidence"))
+                    )
+                batch = enriched
+        elif self.categories:
+            batch = [b for b in batch if b[1]]
+        if batch:
+            self.signals.batch.emit(self.generation, self.node_id, batch)
+
+
+# ------------------------------------------------------------
+# Model
+# ------------------------------------------------------------
+
+class LazyFileTreeModel(QAbstractItemModel):
+    """
+    File tree for huge and slow folders:
+      - directories are listed on a worker thread, on first expand, and
+        inserted in batches so the view never waits for a full listing
+      - optional filters: supported extensions only, and/or a set of
+        cached categories
+      - optional Category/Confidence columns served from the metadata
+        cache, without opening the files
+    """
+
+    def __init__(self, cache=None, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.supported_only = False
+        self.categories = set()
+        self.show_metadata_columns = True
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(2)
+
+        self._generation = 0
+        self._tasks = {}
+        self._nodes = {}
+        self._node_keys = itertools.count()
+        self._dirs_by_path = {}
+        self._root = None
+
+        style = QApplication.style()
+        self._dir_icon = style.standardIcon(QStyle.StandardPixmap.SP_DirIcon)
+        self._file_icon = style.standardIcon(QStyle.StandardPixmap.SP_FileIcon)
+
+    # ---- configuration ------------------------------------------------
+
+    def set_root_path(self, path):
+        self.beginResetModel()
+        self._generation += 1
+        self._nodes.clear()
+        self._dirs_by_path.clear()
+        self._root = _Node(os.path.basename(path) or path, path, True)
+        self._register(self._root)
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def root_path(self):
+        return self._root.path if self._root else None
+
+    def set_filters(self, supported_only=None, categories=None):
+        if supported_only is not None:
+            self.supported_only = supported_only
+        if categories is not None:
+            self.categories = set(categories)
+        if self._root is not None:
+            self.set_root_path(self._root.path)
+
+    def set_show_metadata_columns(self, show):
+        self.beginResetModel()
+        self.show_metadata_columns = show
+        self.endResetModel()
+
+    # ---- helpers ------------------------------------------------------
+
+    def _register(self, node):
+        node.key = next(self._node_keys)
+        self._nodes[node.key] = node
+        if node.is_dir:
+            self._dirs_by_path[node.path] = node
+
+    def _node(self, index):
+        if not index.isValid():
+            return self._root
+        return index.internalPointer()
+
+    def _index_of(self, node, column=0):
+        if node is None or node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, column, node)
+
+    def filePath(self, index):
+        node = self._node(index)
+        return node.path if node else ""
+
+    def isDir(self, index):
+        node = self._node(index)
+        return bool(node and node.is_dir)
+
+    # ---- QAbstractItemModel -------------------------------------------
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self._node(parent)
+        if node is None or row < 0 or row >= len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer()
+        return self._index_of(node.parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() and parent.column() != 0:
+            return 0
+        node = self._node(parent)
+        return len(node.children) if node else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(HEADERS) if self.show_metadata_columns else 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        if node is None or not node.is_dir:
+            return False
+        return bool(node.children) or not node.loaded
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        return bool(node and node.is_dir and not node.loaded and not node.loading)
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        if node is None or not node.is_dir or node.loaded or node.loading:
+            return
+        node.loading = True
+        task = _ListTask(
+            self._generation, node.key, node.path, self.cache,
+            self.supported_only, self.categories,
+        )
+        task.setAutoDelete(False)
+        task.signals.batch.connect(self._on_batch)
+        task.signals.finished.connect(self._on_finished)
+        self._tasks[id(task)] = task
+        task.signals.finished.connect(lambda *_: self._tasks.pop(id(task), None))
+        self.pool.start(task)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        column = index.column()
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == COLUMN_NAME:
+                return node.name
+            if column == COLUMN_CATEGORY:
+                return node.category
+            if column == COLUMN_CONFIDENCE:
+                return f"{node.confidence:.2f}" if node.confidence is not None else ""
+        elif role == Qt.ItemDataRole.DecorationRole and column == COLUMN_NAME:
+            return self._dir_icon if node.is_dir else self._file_icon
+        elif role == Qt.ItemDataRole.ToolTipRole and column == COLUMN_NAME:
+            return node.path
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return HEADERS[section]
+        return None
+
+    # ---- listing results ----------------------------------------------
+
+    @traced("ui.tree.insert_batch")
+    def _on_batch(self, generation, node_id, entries):
+        if generation != self._generation:
+            return
+        node = self._nodes.get(node_id)
+        if node is None:
+            return
+
+        first = len(node.children)
+        self.beginInsertRows(self._index_of(node), first, first + len(entries) - 1)
+        for i, (name, is_dir, size, mtime_ns, category, confidence) in enumerate(entries):
+            child = _Node(name, os.path.join(node.path, name), is_dir, node, size, mtime_ns)
+            child.row = first + i
+            child.category = category
+            child.confidence = confidence
+            node.children.append(child)
+            self._register(child)
+        self.endInsertRows()
+
+    def _on_finished(self, generation, node_id):
+        if generation != self._generation:
+            return
+        node = self._nodes.get(node_id)
+        if node is None:
+            return
+        node.loading = False
+        node.loaded = True
+
+        # batches arrive in directory order; sort once at the end
+        # (folders first, then case-insensitive name) keeping selections
+        if len(node.children) > 1:
+            self.layoutAboutToBeChanged.emit()
+            old = {id(c): c.row for c in node.children}
+            node.children.sort(key=lambda c: (not c.is_dir, c.name.lower()))
+            for row, child in enumerate(node.children):
+                child.row = row
+            persistent = self.persistentIndexList()
+            if persistent:
+                moved_from, moved_to = [], []
+                for idx in persistent:
+                    child = idx.internalPointer()
+                    if child is not None and child.parent is node and old.get(id(child)) != child.row:
+                        moved_from.append(idx)
+                        moved_to.append(self.createIndex(child.row, idx.column(), child))
+                self.changePersistentIndexList(moved_from, moved_to)
+            self.layoutChanged.emit()
+        elif not node.children and node is not self._root:
+            # let the view drop the expand arrow
+            index = self._index_of(node)
+            self.dataChanged.emit(index, index)
+
+    def refresh_dirs(self, paths):
+        """
+        Re-lists already-loaded directories where any of paths appeared
+        or disappeared (e.g. after a watcher event or a rename). Plain
+        content changes don't trigger a re-list.
+        """
+        by_folder = {}
+        for path in paths:
+            by_folder.setdefault(os.path.dirname(path), []).append(path)
+
+        for folder, changed in by_folder.items():
+            node = self._dirs_by_path.get(folder)
+            if node is None or not node.loaded:
+                continue
+            names = {c.name for c in node.children}
+            if all((os.path.basename(p) in names) == os.path.lexists(p) for p in changed):
+                continue
+            if node.children:
+                self.beginRemoveRows(self._index_of(node), 0, len(node.children) - 1)
+                for child in node.children:
+                    self._forget(child)
+                node.children = []
+                self.endRemoveRows()
+            node.loaded = False
+            self.fetchMore(self._index_of(node))
+
+    def _forget(self, node):
+        self._nodes.pop(node.key, None)
+        if node.is_dir:
+            self._dirs_by_path.pop(node.path, None)
+        for child in node.children:
+            self._forget(child)
@@ -1,8 +1,34 @@
-from PyQt6.QtWidgets import QMainWindow
+from PyQt6.QtWidgets import QApplication, QMainWindow, QDockWidget
+from PyQt6.QtCore import QEvent, QObject, Qt
+from . import tracing
 from .layout import create_main_widget
+from .daemon import connect_daemon
+from .metadata_cache import configure_default_cache
+from .metadata_engine import add_extraction_listener
+from .performance_panel import PerformancePanel
+from .scheduler import configure_default_scheduler
+from .search_index import get_default_search_index
 from .settings_manager import SettingsManager
 
 
+_ACTIVITY_EVENTS = {
+    QEvent.Type.MouseButtonPress, QEvent.Type.KeyPress, QEvent.Type.Wheel,
+}
+
+
+class _ActivityFilter(QObject):
+    """Tells the scheduler about input so background jobs hold off."""
+
+    def __init__(self, scheduler, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+
+    def eventFilter(self, obj, event):
+        if event.type() in _ACTIVITY_EVENTS:
+            self.scheduler.note_user_activity()
+        return False
+
+
 class MainWindow(QMainWindow):
     """
     Main window for the Framework GUI.
@@ -10,6 +36,7 @@ class MainWindow(QMainWindow):
       - left: file tree / inventory
       - right: preview + rename suggestions
       - bottom: to-do list
+      - dock (View menu): performance panel
     """
 
     def __init__(self, parent=None):
@@ -20,11 +47,87 @@ class MainWindow(QMainWindow):
         # Settings manager (loads config/settings.json)
         self.settings_manager = SettingsManager()
 
+        # A running daemon (python -m workspace_gui.daemon serve) already
+        # owns a warm cache and search index; use it instead of our own
+        self.daemon = None
+        if self.settings_manager.get_setting("use_daemon", True):
+            self.daemon = connect_daemon()
+
+        # Persistent metadata cache (config/metadata_cache.sqlite). With a
+        # daemon, it is the only writer: the in-process default cache is
+        # disabled so nothing here (panels, dialogs, the fallback when the
+        # daemon goes away) opens the same file with its own LRU state.
+        self.metadata_cache = None
+        if self.daemon is None:
+            self.metadata_cache = configure_default_cache(
+                max_bytes=int(self.settings_manager.get_setting("metadata_cache_mb", 256)) * 1024 * 1024,
+                enabled=bool(self.settings_manager.get_setting("metadata_cache_enabled", True)),
+            )
+        else:
+            configure_default_cache(enabled=False)
+
+        # One scheduler for all file work: clicks before prefetch before
+        # background re-extraction
+        io_mb = float(self.settings_manager.get_setting("background_io_mb_per_sec", 0))
+        self.scheduler = configure_default_scheduler(
+            workers=int(self.settings_manager.get_setting("scheduler_workers", 3)),
+            root_io_rate=io_mb * 1024 * 1024 if io_mb > 0 else None,
+            idle_delay=int(self.settings_manager.get_setting("background_idle_ms", 1500)) / 1000,
+        )
+        self._activity_filter = _ActivityFilter(self.scheduler, self)
+        app = QApplication.instance()
+        if app is not None:
+            app.installEventFilter(self._activity_filter)
+
+        # Search index is updated as files are extracted
+        self.search_index = None
+        if self.daemon is None:
+            self.search_index = get_default_search_index()
+            if self.search_index is not None:
+                add_extraction_listener(self.search_index.update)
+
         # Central layout widget
-        self.central = create_main_widget(self, self.settings_manager)
+        self.central = create_main_widget(self, self.settings_manager, self.daemon)
         self.setCentralWidget(self.central)
 
+        self._init_performance_dock()
         self._init_status_bar()
 
+    def _init_performance_dock(self):
+        if self.settings_manager.get_setting("tracing_enabled", False):
+            tracing.enable()
+
+        sources = {}
+        if self.metadata_cache is not None:
+            sources["Metadata cache"] = self.metadata_cache.stats
+        elif self.daemon is not None:
+            sources["Metadata cache (daemon)"] = self.daemon.cache_stats
+        thumbnail_cache = getattr(self.central.thumbnails, "cache", None)
+        if thumbnail_cache is not None:
+            sources["Thumbnail cache"] = thumbnail_cache.stats
+
+        self.performance_panel = PerformancePanel(
+            self.settings_manager, sources, self, scheduler=self.scheduler
+        )
+        self.performance_dock = QDockWidget("Performance", self)
+        self.performance_dock.setObjectName("performance_dock")
+        self.performance_dock.setWidget(self.performance_panel)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.performance_dock)
+        self.performance_dock.hide()
+
+        view_menu = self.menuBar().addMenu("View")
+        view_menu.addAction(self.performance_dock.toggleViewAction())
+
     def _init_status_bar(self):
-        self.statusBar().showMessage("Ready")
+        if self.daemon is not None:
+            self.statusBar().showMessage(f"Ready (daemon at {self.daemon.socket_path})")
+        else:
+            self.statusBar().showMessage("Ready")
+
+    def closeEvent(self, event):
+        self.scheduler.shutdown(wait=False)
+        if self.daemon is not None:
+            self.daemon.close()
+        if self.metadata_cache is not None:
+            self.metadata_cache.flush()
+        super().closeEvent(event)
@@ -0,0 +1,382 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MEMORY_ENTRIES = 4096
+
+# Access times are written back in batches so a hit never waits on a disk write.
+_TOUCH_FLUSH_EVERY = 256
+
+
+def default_cache_path():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, "config", "metadata_cache.sqlite")
+
+
+def file_stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def retitled(metadata, old_path, new_path):
+    """
+    Copy of metadata for a file renamed from old_path to new_path, with a
+    title taken from the old file name (what extractors fall back to)
+    replaced by the new name; None if the title came from the content.
+    """
+    if not metadata or metadata.get("title") != file_stem(old_path):
+        return None
+    return dict(metadata, title=file_stem(new_path))
+
+
+class MetadataCache:
+    """
+    Persistent cache of extract_metadata() results.
+      - keyed by path, validated against (size, mtime_ns) from os.stat
+      - SQLite on disk, small in-memory LRU in front of it
+      - evicts least recently used rows once the byte budget is exceeded
+    Returned dicts are shared; treat them as read-only.
+    """
+
+    def __init__(self, db_path=None, max_bytes=DEFAULT_MAX_BYTES,
+                 memory_entries=DEFAULT_MEMORY_ENTRIES):
+        self.db_path = db_path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.RLock()
+        self._memory = OrderedDict()
+        self._touched = {}
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)"
+        )
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()
+        self.total_bytes = row[0]
+
+    # ------------------------------------------------------------
+    # Lookup / store
+    # ------------------------------------------------------------
+
+    def get(self, path, st=None):
+        """
+        Returns the cached metadata for path, or None when missing or stale.
+        Pass an os.stat_result to avoid a second stat.
+        """
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+
+        with self._lock:
+            meta = self._lookup(path, st.st_size, st.st_mtime_ns)
+            if meta is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return meta
+
+    def put(self, path, metadata, st=None):
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return
+
+        data = json.dumps(metadata, default=str, separators=(",", ":"))
+        nbytes = len(data)
+
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT nbytes FROM entries WHERE path = ?", (path,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(path, size, mtime_ns, data, nbytes, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (path, st.st_size, st.st_mtime_ns, data, nbytes, time.time()),
+            )
+            self.total_bytes += nbytes - (old[0] if old else 0)
+            self._touched.pop(path, None)
+            self._remember(path, st.st_size, st.st_mtime_ns, metadata)
+
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def get_or_extract(self, path, extractor):
+        """
+        Returns cached metadata for path, calling extractor(path) and storing
+        the result only when the file changed since it was last seen.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return extractor(path)
+
+        meta = self.get(path, st)
+        if meta is not None:
+            return meta
+
+        meta = extractor(path)
+        if meta is not None:
+            self.put(path, meta, st)
+        return meta
+
+    def peek_many(self, entries):
+        """
+        Bulk lookup for listings: entries is [(path, size, mtime_ns)].
+        Returns {path: metadata} for the ones cached and still current.
+        Doesn't touch the files or count towards hits/misses.
+        """
+        found = {}
+        with self._lock:
+            missing = []
+            for path, size, mtime_ns in entries:
+                entry = self._memory.get(path)
+                if entry is not None and entry[0] == size and entry[1] == mtime_ns:
+                    found[path] = entry[2]
+                else:
+                    missing.append((path, size, mtime_ns))
+
+            wanted = {p: (s, m) for p, s, m in missing}
+            paths = list(wanted)
+            # stay under SQLite's bound-parameter limit
+            for i in range(0, len(paths), 500):
+                chunk = paths[i:i + 500]
+                rows = self._conn.execute(
+                    "SELECT path, size, mtime_ns, data FROM entries WHERE path IN (%s)"
+                    % ",".join("?" * len(chunk)),
+                    chunk,
+                )
+                for path, size, mtime_ns, data in rows:
+                    if wanted[path] != (size, mtime_ns):
+                        continue
+                    try:
+                        found[path] = json.loads(data)
+                    except ValueError:
+                        continue
+        return found
+
+    def invalidate(self, path):
+        with self._lock:
+            self._memory.pop(path, None)
+            self._touched.pop(path, None)
+            row = self._conn.execute(
+                "SELECT nbytes FROM entries WHERE path = ?", (path,)
+            ).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM entries WHERE path = ?", (path,))
+                self._conn.commit()
+                self.total_bytes -= row[0]
+
+    def rename(self, old_path, new_path):
+        """
+        Moves the entry for a renamed file; renames keep size and mtime,
+        so the stored result stays valid under the new path. A title that
+        was only the old file name becomes the new one.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM entries WHERE path = ?", (old_path,)
+            ).fetchone()
+            if row is None:
+                return  # already moved (e.g. reported by the app and the watcher)
+            entry = self._memory.pop(old_path, None)
+            self._touched.pop(old_path, None)
+            replaced = self._conn.execute(
+                "SELECT nbytes FROM entries WHERE path = ?", (new_path,)
+            ).fetchone()
+            if replaced:
+                self._conn.execute("DELETE FROM entries WHERE path = ?", (new_path,))
+                self.total_bytes -= replaced[0]
+            try:
+                meta = retitled(json.loads(row[0]), old_path, new_path)
+            except ValueError:
+                meta = None
+            if meta is None:
+                self._conn.execute(
+                    "UPDATE entries SET path = ? WHERE path = ?", (new_path, old_path)
+                )
+            else:
+                data = json.dumps(meta, default=str, separators=(",", ":"))
+                self.total_bytes += len(data) - len(row[0])
+                self._conn.execute(
+                    "UPDATE entries SET path = ?, data = ?, nbytes = ? WHERE path = ?",
+                    (new_path, data, len(data), old_path),
+                )
+                if entry is not None:
+                    entry = (entry[0], entry[1], meta)
+            self._conn.commit()
+            self._memory.pop(new_path, None)
+            if entry is not None:
+                self._remember(new_path, *entry)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": entries,
+                "memory_entries": len(self._memory),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def flush(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+    # ------------------------------------------------------------
+    # Internals (caller holds the lock)
+    # ------------------------------------------------------------
+
+    def _lookup(self, path, size, mtime_ns):
+        entry = self._memory.get(path)
+        if entry is not None:
+            if entry[0] == size and entry[1] == mtime_ns:
+                self._memory.move_to_end(path)
+                self._touch(path)
+                return entry[2]
+            del self._memory[path]
+
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, data FROM entries WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None or row[0] != size or row[1] != mtime_ns:
+            return None
+
+        try:
+            meta = json.loads(row[2])
+        except ValueError:
+            return None
+
+        self._remember(path, size, mtime_ns, meta)
+        self._touch(path)
+        return meta
+
+    def _remember(self, path, size, mtime_ns, meta):
+        self._memory[path] = (size, mtime_ns, meta)
+        self._memory.move_to_end(path)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _touch(self, path):
+        self._touched[path] = time.time()
+        if len(self._touched) >= _TOUCH_FLUSH_EVERY:
+            self._flush_touched()
+            self._conn.commit()
+
+    def _flush_touched(self):
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE entries SET last_access = ? WHERE path = ?",
+            [(ts, p) for p, ts in self._touched.items()],
+        )
+        self._touched.clear()
+
+    def _evict(self):
+        # Drop to 90% of the budget so a full cache doesn't evict on every put.
+        self._flush_touched()
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute(
+            "SELECT path, nbytes FROM entries ORDER BY last_access ASC"
+        )
+        victims = []
+        for path, nbytes in rows:
+            if self.total_bytes <= target:
+                break
+            victims.append((path,))
+            self.total_bytes -= nbytes
+            self._memory.pop(path, None)
+
+        if victims:
+            self._conn.executemany("DELETE FROM entries WHERE path = ?", victims)
+            self.evictions += len(victims)
+
+
+# ------------------------------------------------------------
+# Process-wide default cache
+# ------------------------------------------------------------
+
+_default_cache = None
+_default_lock = threading.Lock()
+_default_disabled = False
+
+
+def configure_default_cache(db_path=None, max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+    """
+    Replaces the cache used by metadata_engine.extract_metadata().
+    """
+    global _default_cache, _default_disabled
+    with _default_lock:
+        if _default_cache is not None:
+            _default_cache.close()
+            _default_cache = None
+        _default_disabled = not enabled
+        if enabled:
+            try:
+                _default_cache = MetadataCache(db_path, max_bytes=max_bytes)
+            except (OSError, sqlite3.Error):
+                _default_cache = None
+                _default_disabled = True
+    return _default_cache
+
+
+def get_default_cache():
+    global _default_cache, _default_disabled
+    if _default_cache is not None or _default_disabled:
+        return _default_cache
+    with _default_lock:
+        if _default_cache is None and not _default_disabled:
+            try:
+                _default_cache = MetadataCache()
+            except (OSError, sqlite3.Error):
+                _default_disabled = True
+    return _default_cache
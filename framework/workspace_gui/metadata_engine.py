@@ -1,19 +1,57 @@
+import codecs
 import os
-import mimetypes
+import struct
+import threading
 from datetime import datetime
 
-try:
-    from extract_pdf_metadata import get_pdf_metadata
-    from extract_text_from_pdf import extract_pdf_text
-except:
-    get_pdf_metadata = None
-    extract_pdf_text = None
+from .classifier import get_classifier
+from .exif_reader import TAG_DATETIME_ORIGINAL, TAG_EXIF_IFD, TAG_MODEL, read_exif
+from .extractor_registry import COST_FULL, COST_HEADER, lazy_import, registry
+from .field_extractor import get_field_extractor
+from .filetype_detect import guess_mime
+from .metadata_cache import get_default_cache
+from .pdf_fast import read_pdf_info
+from .scheduler import BACKGROUND, INTERACTIVE, current_job, file_io_bytes, get_default_scheduler
+from .tracing import enabled as tracing_enabled, span, traced
 
-try:
-    from PIL import Image
-    from PIL.ExifTags import TAGS
-except:
-    Image = None
+# Heavy backends (PyPDF2, Pillow, your PDF helper scripts) are imported
+# through lazy_import() inside the extractors, on first use.
+
+
+# Streaming budgets: classification stops after this much text even if
+# nothing conclusive was found, so memory stays flat for huge files.
+TEXT_CHUNK_SIZE = 64 * 1024
+TEXT_BYTE_BUDGET = 1024 * 1024
+PDF_PAGE_BUDGET = 25
+
+# Structured fields (document date, amounts, IDs) are looked for on the
+# first pages / bytes only; reading stops there unless the
+# classification still needs more text.
+FIELD_PAGE_BUDGET = 3
+FIELD_TEXT_BUDGET = 128 * 1024
+
+# Leading text kept in metadata["excerpt"] (cached, written to index
+# records; enough for the preview and similarity signatures).
+EXCERPT_CHARS = 4 * 1024
+
+# Leading text handed to extraction listeners for the search index. It
+# travels in meta[BODY_FIELD] only from the extractor to
+# extract_uncached(), which takes it out, so it is never cached.
+BODY_CHARS = 32 * 1024
+BODY_FIELD = "body"
+
+# Set by an extractor that skipped the slow text pass for an interactive
+# request; taken out by _extract_and_notify(), which then queues the full
+# extraction in the background instead of caching the partial result.
+TEXT_DEFERRED_FIELD = "text_deferred"
+
+_extraction_listeners = []
+_local = threading.local()
+
+# When False, PDFs are classified from /Info and XMP alone, and page text
+# is only read if those give no title or no category (metadata-only
+# indexing). See set_full_text().
+_full_text = True
 
 
 def safe_date(dt):
@@ -24,27 +62,125 @@ def safe_date(dt):
     return str(dt)
 
 
-def extract_metadata(path: str) -> dict:
-    ext = os.path.splitext(path)[1].lower()
+@traced("extract_metadata", arg=0)
+def extract_metadata(path: str, use_cache: bool = True) -> dict:
+    """
+    Returns metadata for path, served from the persistent cache when the
+    file is unchanged since it was last extracted.
+    """
+    cache = get_default_cache() if use_cache else None
+    if cache is None:
+        return _extract_and_notify(path)[0]
+    try:
+        st = os.stat(path)
+    except OSError:
+        return _extract_and_notify(path)[0]
+    meta = cache.get(path, st)
+    if meta is None:
+        meta, complete = _extract_and_notify(path)
+        if complete:
+            cache.put(path, meta, st)
+    return meta
+
+
+def add_extraction_listener(listener):
+    """
+    listener(path, metadata, body=text) is called after every fresh
+    (non-cached) extraction, on whichever thread ran it; body is up to
+    BODY_CHARS of the document's text ("" if none was read).
+    """
+    if listener not in _extraction_listeners:
+        _extraction_listeners.append(listener)
+
+
+def remove_extraction_listener(listener):
+    if listener in _extraction_listeners:
+        _extraction_listeners.remove(listener)
 
-    mime, _ = mimetypes.guess_type(path)
 
-    if mime and "pdf" in mime:
-        return extract_pdf_metadata_full(path)
+def set_full_text(enabled: bool):
+    """
+    Toggles PDF page-text extraction for this process. With it off,
+    results may have no excerpt, so don't store them in the GUI cache.
+    """
+    global _full_text
+    _full_text = bool(enabled)
 
-    if mime and mime.startswith("image/"):
-        return extract_image_metadata(path)
 
-    if ext in [".txt", ".md"]:
-        return extract_textfile_metadata(path)
+def full_text_enabled() -> bool:
+    return _full_text
 
+
+def _extract_and_notify(path: str):
+    # (metadata, complete); incomplete results are neither cached nor
+    # passed to listeners, the background job does both later
+    meta, body = extract_uncached(path)
+    if meta.pop(TEXT_DEFERRED_FIELD, False):
+        get_default_scheduler().submit(
+            _extract_deferred_text, path, key=("extract_text", path), priority=BACKGROUND,
+            root=os.path.dirname(path), io_bytes=file_io_bytes(path), name="extract_text",
+        )
+        return meta, False
+    for listener in list(_extraction_listeners):
+        try:
+            listener(path, meta, body=body)
+        except Exception:
+            pass
+    return meta, True
+
+
+def _extract_deferred_text(path):
+    _local.no_defer = True
+    try:
+        return extract_metadata(path)
+    finally:
+        _local.no_defer = False
+
+
+def _may_defer_text():
+    """
+    True while extracting for an interactive scheduler job (a selection),
+    where a fast partial result beats waiting for page text.
+    """
+    if getattr(_local, "no_defer", False):
+        return False
+    job = current_job()
+    return job is not None and job.priority == INTERACTIVE
+
+
+def extract_uncached(path: str):
+    """
+    Fresh extraction without cache or listeners. Returns (metadata, body):
+    the body text is kept out of metadata so only the search index
+    stores it.
+    """
+    meta = _extract_uncached(path)
+    body = meta.pop(BODY_FIELD, None) or ""
+    return meta, body
+
+
+def _extract_uncached(path: str) -> dict:
+    # extension first, corrected by the file's magic bytes when they disagree
+    with span("filetype.guess_mime"):
+        mime = guess_mime(path)
+
+    extractor = registry.lookup(path, mime) or extract_fallback_metadata
+    if not tracing_enabled():
+        return extractor(path)
+    name = getattr(extractor, "name", None) or getattr(extractor, "__name__", "extractor")
+    with span("extract." + name, path=os.path.basename(path)):
+        return extractor(path)
+
+
+def extract_fallback_metadata(path):
     # fallback: just use filename
+    modified = fs_date(path)
     return {
         "title": os.path.splitext(os.path.basename(path))[0],
         "category": "",
         "author": "",
-        "date_created": fs_date(path),
-        "date_modified": fs_date(path),
+        "date_created": modified,
+        "date_modified": modified,
         "keywords": [],
         "confidence": 0.30
     }
@@ -54,142 +190,231 @@ def extract_metadata(path: str) -> dict:
 # PDF LOGIC
 # ------------------------------------------------------------
 
-def extract_pdf_metadata_full(path):
+def extract_pdf_metadata_full(path, page_budget=PDF_PAGE_BUDGET):
+    modified = fs_date(path)
     meta = {
         "title": "",
         "author": "",
         "subject": "",
         "keywords": [],
-        "date_created": fs_date(path),
-        "date_modified": fs_date(path),
+        "date_created": modified,
+        "date_modified": modified,
         "page_count": None,
         "category": "document",
         "confidence": 0.60
     }
 
-    # Use your real PDF metadata
-    if get_pdf_metadata:
-        pdf_meta = get_pdf_metadata(path)
-        if pdf_meta:
-            meta["title"] = pdf_meta.get("title") or meta["title"]
-            meta["author"] = pdf_meta.get("author") or meta["author"]
-            meta["subject"] = pdf_meta.get("subject") or meta["subject"]
-            meta["keywords"] = pdf_meta.get("keywords", [])
-
-    # Get text to improve intelligence
-    text = ""
-    if extract_pdf_text:
-        try:
-            text = extract_pdf_text(path)
-        except:
-            text = ""
-
-    # Simple NLP heuristic:
-    # classify document type
-    lowered = text.lower()
-
-    if "permit" in lowered:
-        meta["category"] = "permit"
-        meta["confidence"] += 0.15
-
-    if "invoice" in lowered or "amount due" in lowered:
-        meta["category"] = "invoice"
-        meta["confidence"] += 0.20
-
-    if "contract" in lowered or "terms" in lowered:
-        meta["category"] = "contract"
-        meta["confidence"] += 0.20
-
-    # detect agency keywords
-    agencies = ["dnr", "usda", "irs", "missouri", "department"]
-    for a in agencies:
-        if a in lowered:
-            meta["keywords"].append(a)
+    # Trailer, /Info/XMP and page tree straight from the file; the helper
+    # script (which parses the whole document) only if that fails
+    info = read_pdf_info(path)
+    if info is not None:
+        for key in ("title", "author", "subject", "keywords", "page_count"):
+            if info[key]:
+                meta[key] = info[key]
+        if info["date_created"]:
+            meta["date_created"] = info["date_created"]
+    else:
+        get_pdf_metadata = lazy_import("extract_pdf_metadata", "get_pdf_metadata")
+        if get_pdf_metadata:
+            pdf_meta = get_pdf_metadata(path)
+            if pdf_meta:
+                meta["title"] = pdf_meta.get("title") or meta["title"]
+                meta["author"] = pdf_meta.get("author") or meta["author"]
+                meta["subject"] = pdf_meta.get("subject") or meta["subject"]
+                meta["keywords"] = pdf_meta.get("keywords", [])
+
+    # Stream page text through the classification rules
+    # (config/classification_rules.json); stop once the category can no
+    # longer change and a title is known.
+    # A selection whose title, date and page count came from the fast
+    # path gets them now; page text follows in a background job.
+    deferred = (
+        _full_text and info is not None and meta["title"] and info["date_created"]
+        and meta["page_count"] and _may_defer_text()
+    )
+    run = get_classifier().start()
+    fields = get_field_extractor().start()
+    first_line = None
+    body = _Excerpt()
+    if not _full_text or deferred:
+        # the document's own fields may already decide it
+        own_text = " ".join([meta["title"], meta["subject"]] + list(meta["keywords"]))
+        run.feed(own_text)
+        fields.feed(own_text)
+    try:
+        if deferred:
+            meta[TEXT_DEFERRED_FIELD] = True
+        elif _full_text or not (meta["title"] and run.categorized):
+            for i, page_text in enumerate(iter_pdf_pages(path, page_budget, meta)):
+                if first_line is None and page_text:
+                    first_line = page_text.split("\n")[0].strip()[:80]
+                body.add(page_text)
+                run.feed(page_text)
+                if i < FIELD_PAGE_BUDGET and not fields.decided:
+                    fields.feed(page_text)
+                fields_done = fields.decided or i + 1 >= FIELD_PAGE_BUDGET
+                if run.decided and (meta["title"] or first_line) and fields_done:
+                    break
+    except Exception:
+        pass
+
+    run.apply(meta)
+    fields.apply(meta)
+    _set_text(meta, body.text())
 
     # fallback title from first line
-    if not meta["title"] and text:
-        first = text.split("\n")[0].strip()[:80]
-        meta["title"] = first
+    if not meta["title"] and first_line:
+        meta["title"] = first_line
 
     return meta
 
 
+def iter_pdf_pages(path, page_budget=PDF_PAGE_BUDGET, meta=None):
+    """
+    Yields the text of up to page_budget pages, one page at a time.
+    Fills meta["page_count"] when the PDF backend exposes it.
+    """
+    PdfReader = lazy_import("PyPDF2", "PdfReader")
+    extract_pdf_text = lazy_import("extract_text_from_pdf", "extract_pdf_text")
+    if PdfReader is not None:
+        # given a path, PyPDF2 reads the whole file into memory; from an
+        # open file it only reads the objects the pages need. The file
+        # stays open until the caller stops iterating.
+        with open(path, "rb") as f:
+            reader = PdfReader(f)
+            pages = reader.pages
+            if meta is not None and meta.get("page_count") is None:
+                meta["page_count"] = len(pages)
+            for i, page in enumerate(pages):
+                if i >= page_budget:
+                    break
+                with span("pdf.page_text", page=i):
+                    text = page.extract_text() or ""
+                yield text
+    elif extract_pdf_text:
+        # helper only returns the whole document; nothing to stream
+        with span("pdf.document_text"):
+            text = extract_pdf_text(path) or ""
+        yield text
+
+
 # ------------------------------------------------------------
 # IMAGE / EXIF LOGIC
 # ------------------------------------------------------------
 
 def extract_image_metadata(path):
+    modified = fs_date(path)
     meta = {
         "title": os.path.splitext(os.path.basename(path))[0],
         "author": "",
         "category": "image",
         "keywords": [],
-        "date_created": fs_date(path),
-        "date_modified": fs_date(path),
+        "date_created": modified,
+        "date_modified": modified,
         "confidence": 0.50
     }
 
-    if not Image:
+    # Fast path: read just the Exif block / IFDs, no pixel decoding.
+    try:
+        exif = read_exif(path, (TAG_DATETIME_ORIGINAL, TAG_MODEL))
+    except (OSError, struct.error):
+        exif = None
+    if exif is None:
+        exif = _read_exif_with_pillow(path)
+    if not exif:
         return meta
 
-    try:
-        img = Image.open(path)
-        exif = img._getexif()
-        if not exif:
-            return meta
-
-        cleaned = {}
-        for tag, val in exif.items():
-            name = TAGS.get(tag, tag)
-            cleaned[name] = val
-
-        # date
-        dt = cleaned.get("DateTimeOriginal")
-        if dt:
-            meta["date_created"] = dt.split(" ")[0].replace(":", "-")
-            meta["confidence"] += 0.20
-
-        # camera info
-        camera = cleaned.get("Model")
-        if camera:
-            meta["keywords"].append(camera)
+    # date
+    dt = exif.get(TAG_DATETIME_ORIGINAL)
+    if dt and isinstance(dt, str):
+        meta["date_created"] = dt.split(" ")[0].replace(":", "-")
+        meta["confidence"] += 0.20
 
-        return meta
+    # camera info
+    camera = exif.get(TAG_MODEL)
+    if camera and isinstance(camera, str):
+        meta["keywords"].append(camera)
 
-    except:
-        return meta
+    return meta
+
+
+@traced("exif.pillow")
+def _read_exif_with_pillow(path):
+    # formats the header reader doesn't know (PNG, WebP, HEIC via plugins, ...)
+    Image = lazy_import("PIL.Image")
+    if not Image:
+        return {}
+    try:
+        with Image.open(path) as img:
+            exif = img.getexif()
+            found = {}
+            if TAG_MODEL in exif:
+                found[TAG_MODEL] = exif[TAG_MODEL]
+            dt = exif.get_ifd(TAG_EXIF_IFD).get(TAG_DATETIME_ORIGINAL)
+            if dt:
+                found[TAG_DATETIME_ORIGINAL] = dt
+            return found
+    except Exception:
+        return {}
 
 
 # ------------------------------------------------------------
 # TEXTFILE LOGIC
 # ------------------------------------------------------------
 
-def extract_textfile_metadata(path):
+def extract_textfile_metadata(path, byte_budget=TEXT_BYTE_BUDGET):
+    modified = fs_date(path)
     meta = {
         "title": os.path.splitext(os.path.basename(path))[0],
         "author": "",
         "category": "text",
         "keywords": [],
-        "date_created": fs_date(path),
-        "date_modified": fs_date(path),
+        "date_created": modified,
+        "date_modified": modified,
         "confidence": 0.40
     }
 
+    # Read in chunks up to byte_budget; stop as soon as the heading has
+    # been seen and the category and fields are decided.
+    run = get_classifier().start()
+    fields = get_field_extractor().start()
+    first_line = None
+    body = _Excerpt()
+    has_header = False
+    tail = ""
+    read = 0
+    # the budgets count bytes read, so the file is decoded incrementally
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
     try:
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            text = f.read()
+        with open(path, "rb") as f:
+            while read < byte_budget:
+                raw = f.read(min(TEXT_CHUNK_SIZE, byte_budget - read))
+                if not raw:
+                    break
+                read += len(raw)
+                chunk = decoder.decode(raw)
+                if first_line is None:
+                    first_line = chunk.split("\n")[0]
+                if not has_header:
+                    has_header = "# " in tail + chunk
+                    tail = chunk[-1:]
+                body.add(chunk)
+                run.feed(chunk)
+                if read - len(raw) < FIELD_TEXT_BUDGET and not fields.decided:
+                    fields.feed(chunk)
+                fields_done = fields.decided or read >= FIELD_TEXT_BUDGET
+                if has_header and run.decided and fields_done:
+                    break
     except:
         return meta
 
-    lowered = text.lower()
-
-    if "# " in text:
-        header = text.split("\n")[0].replace("#", "").strip()
+    if has_header:
+        header = first_line.replace("#", "").strip()
         meta["title"] = header
 
-    if "todo" in lowered:
-        meta["keywords"].append("todo")
-        meta["category"] = "notes"
+    run.apply(meta)
+    fields.apply(meta)
+    _set_text(meta, body.text())
 
     return meta
 
@@ -198,6 +423,71 @@ def extract_textfile_metadata(path):
 # Helpers
 # ------------------------------------------------------------
 
+class _Excerpt:
+    """Collects the first BODY_CHARS characters of streamed text."""
+
+    def __init__(self, limit=BODY_CHARS):
+        self.limit = limit
+        self.parts = []
+        self.size = 0
+
+    def add(self, text):
+        if self.size >= self.limit or not text:
+            return
+        text = text[:self.limit - self.size]
+        self.parts.append(text)
+        self.size += len(text)
+
+    def text(self):
+        return "".join(self.parts)
+
+
+def _set_text(meta, text):
+    meta["excerpt"] = text[:EXCERPT_CHARS]
+    meta[BODY_FIELD] = text
+
+
+@traced("fs_date")
 def fs_date(path):
     ts = os.path.getmtime(path)
     return datetime.fromtimestamp(ts).strftime("%Y-%m-%d")
+
+
+# ------------------------------------------------------------
+# Built-in extractors
+# ------------------------------------------------------------
+
+registry.register(extract_pdf_metadata_full, mimes=["application/pdf"],
+                  extensions=[".pdf"], cost=COST_FULL)
+registry.register(extract_image_metadata, mimes=["image/*"], cost=COST_HEADER)
+registry.register(extract_textfile_metadata, mimes=["text/plain"],
+                  extensions=[".txt", ".md"], cost=COST_FULL)
+
+# Optional backends, imported the first time a matching file is extracted.
+_backends = __package__ + ".extractors"
+
+registry.register(
+    _backends + ".office:DocxExtractor", cost=COST_HEADER,
+    mimes=["application/vnd.openxmlformats-officedocument.wordprocessingml.document"],
+    extensions=[".docx", ".docm", ".dotx"],
+)
+registry.register(
+    _backends + ".office:XlsxExtractor", cost=COST_HEADER,
+    mimes=["application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"],
+    extensions=[".xlsx", ".xlsm", ".xltx"],
+)
+registry.register(
+    _backends + ".office:PptxExtractor", cost=COST_HEADER,
+    mimes=["application/vnd.openxmlformats-officedocument.presentationml.presentation"],
+    extensions=[".pptx", ".pptm", ".potx"],
+)
+registry.register(
+    _backends + ".media:MediaExtractor", cost=COST_HEADER,
+    mimes=["audio/*", "video/*"],
+    extensions=[".mp3", ".flac", ".ogg", ".m4a", ".wav", ".mp4", ".mkv", ".mov", ".avi", ".webm"],
+)
+registry.register(
+    _backends + ".executable:ExecutableExtractor", cost=COST_HEADER,
+    mimes=["application/x-msdownload", "application/x-dosexec"],
+    extensions=[".exe", ".dll", ".sys", ".ocx"],
+)
@@ -0,0 +1,528 @@
+"""
+Columnar, in-memory metadata store.
+
+    python -m workspace_gui.metadata_store build index.jsonl -o store/
+    python -m workspace_gui.metadata_store query store/ --category invoice \\
+        --year 2023 --min-confidence 0.7 --sort date
+
+Holds one row per file in NumPy arrays instead of one dict per file:
+  - size, mtime_ns, date, modified, confidence, page_count as typed columns
+  - category, author and keywords as codes into interned string tables,
+    keywords in CSR form (offsets + codes)
+  - path and title as one UTF-8 blob plus offsets
+Filters and sorts are vectorized; save()/load() use one .npy file per
+column, memory-mapped on load, so a saved store reopens instantly.
+"""
+import argparse
+import json
+import os
+import sys
+from functools import lru_cache
+
+import numpy as np
+
+NO_CODE = -1
+FORMAT_VERSION = 1
+
+COLUMNS = (
+    "size", "mtime_ns", "date", "modified", "confidence", "page_count",
+    "category", "author", "keyword_offsets", "keyword_codes",
+    "path_offsets", "path_blob", "title_offsets", "title_blob",
+)
+
+
+class StringTable:
+    """Interns strings to dense int codes."""
+
+    __slots__ = ("strings", "_codes")
+
+    def __init__(self, strings=()):
+        self.strings = list(strings)
+        self._codes = {s: i for i, s in enumerate(self.strings)}
+
+    def code(self, text):
+        if not text:
+            return NO_CODE
+        code = self._codes.get(text)
+        if code is None:
+            code = self._codes[text] = len(self.strings)
+            self.strings.append(text)
+        return code
+
+    def lookup(self, text):
+        """Code for text, or None if it was never interned."""
+        return self._codes.get(text)
+
+    def __getitem__(self, code):
+        return self.strings[code] if code >= 0 else ""
+
+    def __len__(self):
+        return len(self.strings)
+
+
+def _date_or_nat(value):
+    if not value:
+        return "NaT"
+    # "2023:05:01" (EXIF) and "2023-05-01" are both accepted
+    return _valid_day(str(value)[:10].replace(":", "-"))
+
+
+@lru_cache(maxsize=65536)
+def _valid_day(text):
+    try:
+        np.datetime64(text, "D")
+    except ValueError:
+        return "NaT"
+    return text
+
+
+def _pack_strings(strings):
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return offsets, blob
+
+
+# ------------------------------------------------------------
+# Building
+# ------------------------------------------------------------
+
+class MetadataStoreBuilder:
+    """
+    Collects rows in plain lists, then freezes them into a MetadataStore.
+    """
+
+    def __init__(self):
+        self.categories = StringTable()
+        self.authors = StringTable()
+        self.keywords = StringTable()
+        self._paths = []
+        self._titles = []
+        self._size = []
+        self._mtime = []
+        self._date = []
+        self._modified = []
+        self._confidence = []
+        self._pages = []
+        self._category = []
+        self._author = []
+        self._kw_counts = []
+        self._kw_codes = []
+
+    def add(self, path, metadata, size=0, mtime_ns=0):
+        meta = metadata or {}
+        self._paths.append(path)
+        self._titles.append(str(meta.get("title") or ""))
+        self._size.append(size)
+        self._mtime.append(mtime_ns)
+        self._date.append(_date_or_nat(meta.get("document_date") or meta.get("date_created")))
+        self._modified.append(_date_or_nat(meta.get("date_modified")))
+        confidence = meta.get("confidence")
+        self._confidence.append(np.nan if confidence is None else float(confidence))
+        self._pages.append(meta.get("page_count") or 0)
+        self._category.append(self.categories.code(meta.get("category")))
+        self._author.append(self.authors.code(str(meta.get("author") or "")))
+        codes = {self.keywords.code(str(k).lower()) for k in meta.get("keywords") or [] if k}
+        codes.discard(NO_CODE)
+        self._kw_counts.append(len(codes))
+        self._kw_codes.extend(sorted(codes))
+
+    def __len__(self):
+        return len(self._paths)
+
+    def build(self):
+        columns = {
+            "size": np.array(self._size, dtype=np.int64),
+            "mtime_ns": np.array(self._mtime, dtype=np.int64),
+            "date": np.array(self._date, dtype="datetime64[D]"),
+            "modified": np.array(self._modified, dtype="datetime64[D]"),
+            "confidence": np.array(self._confidence, dtype=np.float32),
+            "page_count": np.array(self._pages, dtype=np.int32),
+            "category": np.array(self._category, dtype=np.int32),
+            "author": np.array(self._author, dtype=np.int32),
+            "keyword_codes": np.array(self._kw_codes, dtype=np.int32),
+        }
+        offsets = np.zeros(len(self._kw_counts) + 1, dtype=np.int64)
+        np.cumsum(self._kw_counts, out=offsets[1:])
+        columns["keyword_offsets"] = offsets
+        columns["path_offsets"], columns["path_blob"] = _pack_strings(self._paths)
+        columns["title_offsets"], columns["title_blob"] = _pack_strings(self._titles)
+        return MetadataStore(columns, self.categories, self.authors, self.keywords)
+
+
+# ------------------------------------------------------------
+# Store
+# ------------------------------------------------------------
+
+class MetadataStore:
+    """
+    Read-only columnar table of file metadata. Build it with
+    MetadataStoreBuilder, from_records(), from_index() or load().
+    Row selections are arrays of row indices.
+    """
+
+    def __init__(self, columns, categories, authors, keywords):
+        self.columns = columns
+        self.categories = categories
+        self.authors = authors
+        self.keywords = keywords
+        for name, array in columns.items():
+            setattr(self, name, array)
+        self._path_index = None
+        self._kw_rows = None
+
+    def __len__(self):
+        return len(self.size)
+
+    def __getitem__(self, i):
+        return MetadataRow(self, int(i))
+
+    def rows(self, indices=None):
+        if indices is None:
+            indices = range(len(self))
+        return [MetadataRow(self, int(i)) for i in indices]
+
+    # ---- construction ---------------------------------------------
+
+    @classmethod
+    def from_records(cls, records):
+        """records: iterable of (path, metadata, size, mtime_ns)."""
+        builder = MetadataStoreBuilder()
+        for path, meta, size, mtime_ns in records:
+            builder.add(path, meta, size, mtime_ns)
+        return builder.build()
+
+    @classmethod
+    def from_index(cls, jsonl_path):
+        """Builds a store from a `python -m workspace_gui.index` JSONL file;
+        later records for the same path win."""
+        latest = {}
+        with open(jsonl_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if "metadata" in rec:
+                    latest[rec["path"]] = (rec["path"], rec["metadata"], rec["size"], rec["mtime_ns"])
+        return cls.from_records(latest.values())
+
+    # ---- per-row access -------------------------------------------
+
+    def path(self, i):
+        return self._string(self.path_blob, self.path_offsets, i)
+
+    def title(self, i):
+        return self._string(self.title_blob, self.title_offsets, i)
+
+    def keywords_of(self, i):
+        start, end = self.keyword_offsets[i], self.keyword_offsets[i + 1]
+        return [self.keywords[c] for c in self.keyword_codes[start:end]]
+
+    @staticmethod
+    def _string(blob, offsets, i):
+        return bytes(blob[offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+    def find(self, path):
+        """Row index of path, or None. Builds a path index on first use."""
+        if self._path_index is None:
+            self._path_index = {self.path(i): i for i in range(len(self))}
+        return self._path_index.get(path)
+
+    # ---- vectorized queries ---------------------------------------
+
+    def mask(self, category=None, author=None, keyword=None, year=None,
+             date_from=None, date_to=None, min_confidence=None, max_confidence=None,
+             min_size=None, max_size=None):
+        """
+        Boolean mask over all rows; every given condition must hold.
+        category/author/keyword may be a string or a list of strings.
+        Dates are "YYYY-MM-DD" strings (inclusive).
+        """
+        n = len(self)
+        result = np.ones(n, dtype=bool)
+
+        if category is not None:
+            result &= np.isin(self.category, self._codes(self.categories, category))
+        if author is not None:
+            result &= np.isin(self.author, self._codes(self.authors, author))
+        if keyword is not None:
+            codes = self._codes(self.keywords, keyword, lower=True)
+            hits = np.isin(self.keyword_codes, codes)
+            has = np.zeros(n, dtype=bool)
+            has[self._keyword_rows()[hits]] = True
+            result &= has
+        if year is not None:
+            # range comparisons are much cheaper than converting to years
+            in_years = np.zeros(n, dtype=bool)
+            for y in np.atleast_1d(year):
+                start = np.datetime64(f"{int(y):04d}-01-01", "D")
+                end = np.datetime64(f"{int(y) + 1:04d}-01-01", "D")
+                in_years |= (self.date >= start) & (self.date < end)
+            result &= in_years
+        if date_from is not None:
+            result &= self.date >= np.datetime64(date_from, "D")
+        if date_to is not None:
+            result &= self.date <= np.datetime64(date_to, "D")
+        if min_confidence is not None:
+            result &= self.confidence >= min_confidence
+        if max_confidence is not None:
+            result &= self.confidence <= max_confidence
+        if min_size is not None:
+            result &= self.size >= min_size
+        if max_size is not None:
+            result &= self.size <= max_size
+        return result
+
+    def _keyword_rows(self):
+        # owning row of every entry in keyword_codes (expanded CSR offsets)
+        if self._kw_rows is None:
+            counts = np.diff(self.keyword_offsets)
+            self._kw_rows = np.repeat(np.arange(len(self), dtype=np.int32), counts)
+        return self._kw_rows
+
+    def where(self, **conditions):
+        """Row indices matching mask(**conditions)."""
+        return np.flatnonzero(self.mask(**conditions))
+
+    def sort(self, indices=None, by="date", descending=False):
+        """
+        Returns indices ordered by a column (date, modified, confidence,
+        size, mtime_ns, page_count, category, author, path or title).
+        Missing dates and confidences sort last.
+        """
+        if indices is None:
+            indices = np.arange(len(self))
+        indices = np.asarray(indices)
+
+        if by in ("path", "title"):
+            getter = self.path if by == "path" else self.title
+            keys = np.array([getter(i).lower() for i in indices], dtype=object)
+            order = np.argsort(keys, kind="stable")
+            return indices[order[::-1] if descending else order]
+
+        if by in ("category", "author"):
+            codes = np.asarray(self.columns[by])[indices]
+            table = self.categories if by == "category" else self.authors
+            missing = codes < 0
+            values = self._ranks(table)[codes]
+        else:
+            values = np.asarray(self.columns[by])[indices]
+            if values.dtype.kind == "M":
+                missing = np.isnat(values)
+                values = values.astype(np.int64)
+            elif values.dtype.kind == "f":
+                missing = np.isnan(values)
+            else:
+                missing = np.zeros(len(values), dtype=bool)
+            values = np.where(missing, 0, values)
+        key = -values if descending else values
+        return indices[np.lexsort((key, missing))]
+
+    @staticmethod
+    def _ranks(table):
+        # alphabetical rank of each code; index -1 (NO_CODE) maps to 0
+        ranks = np.zeros(len(table) + 1, dtype=np.int64)
+        order = sorted(range(len(table)), key=lambda c: table.strings[c].lower())
+        ranks[np.array(order, dtype=np.int64)] = np.arange(len(order))
+        return ranks
+
+    @staticmethod
+    def _codes(table, values, lower=False):
+        if isinstance(values, str):
+            values = [values]
+        codes = []
+        for v in values:
+            code = table.lookup(v.lower() if lower else v)
+            if code is not None:
+                codes.append(code)
+        return np.array(codes, dtype=np.int32)
+
+    def counts_by_category(self, indices=None):
+        codes = self.category if indices is None else self.category[indices]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.categories))
+        return {self.categories[c]: int(n) for c, n in enumerate(counts) if n}
+
+    # ---- persistence ----------------------------------------------
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name, array in self.columns.items():
+            np.save(os.path.join(directory, f"{name}.npy"), np.asarray(array))
+        with open(os.path.join(directory, "tables.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": FORMAT_VERSION,
+                "rows": len(self),
+                "categories": self.categories.strings,
+                "authors": self.authors.strings,
+                "keywords": self.keywords.strings,
+            }, f)
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Opens a saved store; columns are memory-mapped unless mmap=False."""
+        with open(os.path.join(directory, "tables.json"), "r", encoding="utf-8") as f:
+            tables = json.load(f)
+        if tables.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported store version: {tables.get('version')}")
+        mode = "r" if mmap else None
+        columns = {
+            name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+            for name in COLUMNS
+        }
+        return cls(
+            columns,
+            StringTable(tables["categories"]),
+            StringTable(tables["authors"]),
+            StringTable(tables["keywords"]),
+        )
+
+    def nbytes(self):
+        return sum(int(a.nbytes) for a in self.columns.values())
+
+
+class MetadataRow:
+    """
+    Lightweight view of one row. Quacks like FileMetadata (path, get(),
+    raw_metadata) so it can be passed to the naming code directly.
+    """
+
+    __slots__ = ("store", "index")
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def path(self):
+        return self.store.path(self.index)
+
+    @property
+    def title(self):
+        return self.store.title(self.index)
+
+    @property
+    def category(self):
+        return self.store.categories[self.store.category[self.index]]
+
+    @property
+    def author(self):
+        return self.store.authors[self.store.author[self.index]]
+
+    @property
+    def keywords(self):
+        return self.store.keywords_of(self.index)
+
+    @property
+    def confidence(self):
+        value = float(self.store.confidence[self.index])
+        return None if np.isnan(value) else round(value, 2)
+
+    @property
+    def date(self):
+        value = self.store.date[self.index]
+        return None if np.isnat(value) else str(value)
+
+    @property
+    def modified(self):
+        value = self.store.modified[self.index]
+        return None if np.isnat(value) else str(value)
+
+    @property
+    def size(self):
+        return int(self.store.size[self.index])
+
+    @property
+    def page_count(self):
+        return int(self.store.page_count[self.index])
+
+    @property
+    def raw_metadata(self):
+        return {
+            "title": self.title,
+            "author": self.author,
+            "category": self.category,
+            "keywords": self.keywords,
+            "confidence": self.confidence,
+            "date_created": self.date,
+            "date_modified": self.modified,
+            "page_count": self.page_count or None,
+        }
+
+    def get(self, key, default=None):
+        attr = _ROW_FIELDS.get(key)
+        if attr is None:
+            return default
+        value = getattr(self, attr)
+        if key == "page_count":
+            value = int(value) or None
+        return default if value is None else value
+
+    def __repr__(self):
+        return f"MetadataRow({self.index}, {self.path!r})"
+
+
+# metadata dict keys served by MetadataRow.get()
+_ROW_FIELDS = {
+    "title": "title",
+    "author": "author",
+    "category": "category",
+    "keywords": "keywords",
+    "confidence": "confidence",
+    "date_created": "date",
+    "date_modified": "modified",
+    "page_count": "page_count",
+}
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m workspace_gui.metadata_store",
+        description="Build and query a columnar metadata store.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="build a store from an index JSONL file")
+    build.add_argument("index", help="JSONL written by python -m workspace_gui.index")
+    build.add_argument("-o", "--output", required=True, help="store directory")
+
+    query = sub.add_parser("query", help="filter a saved store")
+    query.add_argument("store", help="store directory")
+    query.add_argument("--category", action="append")
+    query.add_argument("--author", action="append")
+    query.add_argument("--keyword", action="append")
+    query.add_argument("--year", type=int, action="append")
+    query.add_argument("--from", dest="date_from", help="YYYY-MM-DD")
+    query.add_argument("--to", dest="date_to", help="YYYY-MM-DD")
+    query.add_argument("--min-confidence", type=float)
+    query.add_argument("--sort", default="date")
+    query.add_argument("--desc", action="store_true")
+    query.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        store = MetadataStore.from_index(args.index)
+        store.save(args.output)
+        print(f"{len(store)} rows, {store.nbytes() / 1e6:.1f} MB -> {args.output}", file=sys.stderr)
+        return 0
+
+    store = MetadataStore.load(args.store)
+    rows = store.where(
+        category=args.category, author=args.author, keyword=args.keyword, year=args.year,
+        date_from=args.date_from, date_to=args.date_to, min_confidence=args.min_confidence,
+    )
+    rows = store.sort(rows, by=args.sort, descending=args.desc)
+    for i in rows[:args.limit]:
+        row = store[i]
+        print(f"{row.date or '----------'}  {row.category:<12} {row.confidence or 0:.2f}  {row.path}")
+    print(f"{len(rows)} matching rows", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
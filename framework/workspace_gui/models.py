@@ -1,8 +1,13 @@
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Optional
 
 
 @dataclass
 class FileMetadata:
     path: str
     raw_metadata: Dict
+    # set when the file was hashed by the duplicate finder (dedup.py)
+    content_hash: Optional[str] = None
+
+    def get(self, key, default=None):
+        return self.raw_metadata.get(key, default)
@@ -0,0 +1,610 @@
+"""
+Fast PDF metadata reader.
+
+Reads only what listings need: the trailer, the cross-reference data,
+the /Info dictionary (or the XMP packet) and /Count of the page tree.
+Page content streams are never touched. The file is memory-mapped, so
+only the few pages of it that are parsed are actually read.
+
+Handles classic xref tables, xref streams and object streams (PDF 1.5+),
+incremental updates (/Prev chains) and UTF-16 / PDFDocEncoding strings.
+Encrypted files report only their page count (strings in them are
+encrypted); anything malformed returns None so callers can fall back to
+a full parser.
+"""
+import mmap
+import re
+import zlib
+from datetime import date
+
+from .tracing import traced
+
+TAIL_BYTES = 4096
+MAX_XREF_SECTIONS = 64
+MAX_NESTING = 64            # arrays/dictionaries inside each other
+
+_WS = b" \t\r\n\f\0"
+_EOL_BYTES = (b"\r", b"\n")
+_DELIMS = b"()<>[]{}/%"
+_NUMBER_RE = re.compile(rb"[+-]?(\d+\.?\d*|\.\d+)")
+_REF_RE = re.compile(rb"\s*(\d+)\s+(\d+)\s+R")
+_REF_RUN_RE = re.compile(rb"(?:\s*\d+\s+\d+\s+R(?![A-Za-z0-9]))+")
+_REF_ITEM_RE = re.compile(rb"(\d+)\s+(\d+)\s+R")
+_OBJ_RE = re.compile(rb"(\d+)\s+(\d+)\s+obj")
+_SUBSECTION_RE = re.compile(rb"(\d+)\s+(\d+)")
+_STARTXREF_RE = re.compile(rb"startxref\s+(\d+)")
+_PDF_DATE_RE = re.compile(r"D?:?(\d{4})(\d{2})?(\d{2})?")
+
+# elements may carry attributes or namespace declarations
+# (<dc:title xmlns:dc="...">)
+_XMP_FIELDS = {
+    "title": re.compile(r"<dc:title\b[^>]*>.*?<rdf:li[^>]*>(.*?)</rdf:li>", re.S),
+    "author": re.compile(r"<dc:creator\b[^>]*>.*?<rdf:li[^>]*>(.*?)</rdf:li>", re.S),
+    "subject": re.compile(r"<dc:description\b[^>]*>.*?<rdf:li[^>]*>(.*?)</rdf:li>", re.S),
+    "keywords": re.compile(r"<pdf:Keywords\b[^>]*>(.*?)</pdf:Keywords>", re.S),
+    "created": re.compile(r"<xmp:CreateDate\b[^>]*>(.*?)</xmp:CreateDate>", re.S),
+    "modified": re.compile(r"<xmp:ModifyDate\b[^>]*>(.*?)</xmp:ModifyDate>", re.S),
+}
+
+
+class PdfFormatError(Exception):
+    pass
+
+
+class Ref:
+    __slots__ = ("num", "gen")
+
+    def __init__(self, num, gen):
+        self.num = num
+        self.gen = gen
+
+    def __repr__(self):
+        return f"Ref({self.num}, {self.gen})"
+
+
+class Name(str):
+    pass
+
+
+# ------------------------------------------------------------
+# Object parser
+# ------------------------------------------------------------
+
+class _Parser:
+    """Minimal recursive-descent parser for PDF objects over a buffer."""
+
+    def __init__(self, data, pos=0, skip=()):
+        self.data = data
+        self.pos = pos
+        self.skip = skip    # dictionary keys whose values aren't built
+        self.depth = 0
+
+    def skip_ws(self):
+        data, n = self.data, len(self.data)
+        pos = self.pos
+        while pos < n:
+            c = data[pos]
+            if c in _WS:
+                pos += 1
+            elif c == 0x25:  # % comment
+                while pos < n and data[pos] not in b"\r\n":
+                    pos += 1
+            else:
+                break
+        self.pos = pos
+
+    def parse(self):
+        self.skip_ws()
+        data = self.data
+        if self.pos >= len(data):
+            raise PdfFormatError("unexpected end of data")
+        c = data[self.pos]
+
+        if c == 0x2F:  # /
+            return self._name()
+        if c == 0x3C:  # <
+            if data[self.pos + 1:self.pos + 2] == b"<":
+                return self._nested(self._dict)
+            return self._hex_string()
+        if c == 0x28:  # (
+            return self._literal_string()
+        if c == 0x5B:  # [
+            return self._nested(self._array)
+
+        m = _REF_RE.match(data, self.pos)
+        if m:
+            self.pos = m.end()
+            return Ref(int(m.group(1)), int(m.group(2)))
+        m = _NUMBER_RE.match(data, self.pos)
+        if m:
+            self.pos = m.end()
+            text = m.group(0)
+            return float(text) if b"." in text else int(text)
+        for word, value in ((b"true", True), (b"false", False), (b"null", None)):
+            if data[self.pos:self.pos + len(word)] == word:
+                self.pos += len(word)
+                return value
+        raise PdfFormatError(f"unexpected byte {c!r} at {self.pos}")
+
+    def _nested(self, parse):
+        # bounded so crafted files fail as malformed, not with RecursionError
+        if self.depth >= MAX_NESTING:
+            raise PdfFormatError(f"objects nested too deeply at {self.pos}")
+        self.depth += 1
+        try:
+            return parse()
+        finally:
+            self.depth -= 1
+
+    def _array(self):
+        data = self.data
+        self.pos += 1
+        items = []
+        while True:
+            # /Kids and friends: take a run of references in one match
+            m = _REF_RUN_RE.match(data, self.pos)
+            if m:
+                items.extend(Ref(int(n), int(g)) for n, g in _REF_ITEM_RE.findall(m.group(0)))
+                self.pos = m.end()
+            self.skip_ws()
+            if data[self.pos:self.pos + 1] == b"]":
+                self.pos += 1
+                return items
+            items.append(self.parse())
+
+    def _name(self):
+        data = self.data
+        start = self.pos = self.pos + 1
+        n = len(data)
+        while self.pos < n and data[self.pos] not in _WS and data[self.pos] not in _DELIMS:
+            self.pos += 1
+        raw = bytes(data[start:self.pos])
+        if b"#" in raw:
+            raw = re.sub(rb"#([0-9A-Fa-f]{2})", lambda m: bytes([int(m.group(1), 16)]), raw)
+        return Name(raw.decode("latin-1"))
+
+    def _dict(self):
+        self.pos += 2
+        result = {}
+        while True:
+            self.skip_ws()
+            if self.data[self.pos:self.pos + 2] == b">>":
+                self.pos += 2
+                return result
+            key = self.parse()
+            if not isinstance(key, Name):
+                raise PdfFormatError("dictionary key is not a name")
+            if key in self.skip:
+                self._skip_value()
+            else:
+                result[str(key)] = self.parse()
+
+    def _skip_value(self):
+        self.skip_ws()
+        if self.data[self.pos:self.pos + 1] != b"[":
+            self.parse()
+            return
+        self.pos += 1
+        while True:
+            m = _REF_RUN_RE.match(self.data, self.pos)
+            if m:
+                self.pos = m.end()
+            self.skip_ws()
+            if self.data[self.pos:self.pos + 1] == b"]":
+                self.pos += 1
+                return
+            self.parse()
+
+    def _hex_string(self):
+        end = self.data.find(b">", self.pos)
+        if end < 0:
+            raise PdfFormatError("unterminated hex string")
+        digits = re.sub(rb"\s", b"", bytes(self.data[self.pos + 1:end]))
+        if len(digits) % 2:
+            digits += b"0"
+        self.pos = end + 1
+        return bytes.fromhex(digits.decode("ascii"))
+
+    def _literal_string(self):
+        data = self.data
+        pos = self.pos + 1
+        depth = 1
+        out = bytearray()
+        n = len(data)
+        while pos < n:
+            c = data[pos]
+            if c == 0x5C:  # backslash
+                pos += 1
+                e = data[pos]
+                if e in b"nrtbf":
+                    out += {0x6E: b"\n", 0x72: b"\r", 0x74: b"\t", 0x62: b"\b", 0x66: b"\f"}[e]
+                elif 0x30 <= e <= 0x37:
+                    digits = bytes(data[pos:pos + 3])
+                    m = re.match(rb"[0-7]{1,3}", digits)
+                    out.append(int(m.group(0), 8) & 0xFF)
+                    pos += len(m.group(0)) - 1
+                elif e in b"\r\n":
+                    if e == 0x0D and data[pos + 1:pos + 2] == b"\n":
+                        pos += 1
+                else:
+                    out.append(e)
+            elif c == 0x28:
+                depth += 1
+                out.append(c)
+            elif c == 0x29:
+                depth -= 1
+                if depth == 0:
+                    self.pos = pos + 1
+                    return bytes(out)
+                out.append(c)
+            else:
+                out.append(c)
+            pos += 1
+        raise PdfFormatError("unterminated string")
+
+
+# ------------------------------------------------------------
+# Document
+# ------------------------------------------------------------
+
+class _Document:
+    """
+    Cross-reference sections are indexed, not expanded: classic tables are
+    kept as (first, count, pos, stride) subsections and read one 20-byte
+    entry at a time, xref streams are decoded once and their rows read on
+    demand. Looking up the handful of objects metadata needs never walks
+    the whole table.
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.sections = []       # newest first
+        self._locations = {}
+        self._objstm_cache = {}
+        self.trailer = {}
+        self._read_xref_chain()
+
+    # ---- xref -------------------------------------------------------
+
+    def _read_xref_chain(self):
+        data = self.data
+        tail_start = max(0, len(data) - TAIL_BYTES)
+        matches = list(_STARTXREF_RE.finditer(data, tail_start))
+        if not matches:
+            raise PdfFormatError("no startxref")
+        offset = int(matches[-1].group(1))
+
+        seen = set()
+        for _ in range(MAX_XREF_SECTIONS):
+            if offset in seen or offset >= len(data):
+                break
+            seen.add(offset)
+            parser = _Parser(data, offset)
+            parser.skip_ws()
+            if data[parser.pos:parser.pos + 4] == b"xref":
+                trailer = self._read_xref_table(parser.pos + 4)
+            else:
+                trailer = self._read_xref_stream(parser.pos)
+            # newest section first: its trailer keys win
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            stm = trailer.get("XRefStm")
+            if isinstance(stm, int) and stm not in seen:
+                # hybrid files: the stream supplements this table
+                seen.add(stm)
+                self._read_xref_stream(stm)
+            prev = trailer.get("Prev")
+            if not isinstance(prev, int):
+                break
+            offset = prev
+
+    def _read_xref_table(self, pos):
+        data = self.data
+        parser = _Parser(data, pos)
+        subsections = []
+        while True:
+            parser.skip_ws()
+            if data[parser.pos:parser.pos + 7] == b"trailer":
+                parser.pos += 7
+                self.sections.append(("table", subsections))
+                return parser.parse()
+            m = _SUBSECTION_RE.match(data, parser.pos)
+            if not m:
+                raise PdfFormatError("bad xref subsection")
+            first, count = int(m.group(1)), int(m.group(2))
+            parser.pos = m.end()
+            parser.skip_ws()
+            # entries are 20 bytes by the spec; some writers emit 19
+            stride = 19 if count and data[parser.pos + 19:parser.pos + 20] not in _EOL_BYTES else 20
+            subsections.append((first, count, parser.pos, stride))
+            parser.pos += stride * count
+
+    def _read_xref_stream(self, pos):
+        head, raw = self._stream_at(pos)
+        if head.get("Type") != "XRef":
+            raise PdfFormatError("expected an xref stream")
+        rows = self._decode(head, raw)
+        index = head.get("Index") or [0, head["Size"]]
+        subsections = []
+        at = 0
+        row = sum(head["W"])
+        for first, count in zip(index[0::2], index[1::2]):
+            subsections.append((first, count, at))
+            at += row * count
+        self.sections.append(("stream", (rows, head["W"], subsections)))
+        return head
+
+    def locate(self, num):
+        """
+        ("offset", byte_offset), ("objstm", stream_num, index) or None,
+        from the newest section that mentions num.
+        """
+        if num in self._locations:
+            return self._locations[num]
+        location = None
+        for kind, payload in self.sections:
+            found, location = (self._locate_in_table if kind == "table"
+                               else self._locate_in_stream)(payload, num)
+            if found:
+                break
+        self._locations[num] = location
+        return location
+
+    def _locate_in_table(self, subsections, num):
+        for first, count, pos, stride in subsections:
+            if first <= num < first + count:
+                at = pos + stride * (num - first)
+                entry = bytes(self.data[at:at + 18])
+                if len(entry) < 18:
+                    raise PdfFormatError("truncated xref")
+                if entry[17:18] == b"n":
+                    return True, ("offset", int(entry[:10]))
+                return True, None
+        return False, None
+
+    def _locate_in_stream(self, payload, num):
+        rows, widths, subsections = payload
+        row = sum(widths)
+        for first, count, at in subsections:
+            if first <= num < first + count:
+                at += row * (num - first)
+                if at + row > len(rows):
+                    return True, None
+                fields = []
+                for w in widths:
+                    fields.append(int.from_bytes(rows[at:at + w], "big") if w else None)
+                    at += w
+                kind = 1 if fields[0] is None else fields[0]
+                if kind == 1:
+                    return True, ("offset", fields[1])
+                if kind == 2:
+                    return True, ("objstm", fields[1], fields[2])
+                return True, None
+        return False, None
+
+    # ---- objects ----------------------------------------------------
+
+    def _stream_at(self, pos):
+        parser = _Parser(self.data, pos)
+        parser.skip_ws()
+        m = _OBJ_RE.match(self.data, parser.pos)
+        if not m:
+            raise PdfFormatError(f"no object at {pos}")
+        parser.pos = m.end()
+        head = parser.parse()
+        if not isinstance(head, dict):
+            raise PdfFormatError("stream without dictionary")
+        parser.skip_ws()
+        if self.data[parser.pos:parser.pos + 6] != b"stream":
+            raise PdfFormatError("missing stream keyword")
+        start = parser.pos + 6
+        if self.data[start:start + 2] == b"\r\n":
+            start += 2
+        elif self.data[start:start + 1] in (b"\n", b"\r"):
+            start += 1
+        length = self.resolve(head.get("Length"))
+        if not isinstance(length, int):
+            end = self.data.find(b"endstream", start)
+            length = end - start
+        return head, bytes(self.data[start:start + length])
+
+    def _decode(self, head, raw):
+        filters = head.get("Filter")
+        if filters is None:
+            return raw
+        if not isinstance(filters, list):
+            filters = [filters]
+        for f in filters:
+            if f != "FlateDecode":
+                raise PdfFormatError(f"unsupported filter {f}")
+            raw = zlib.decompress(raw)
+        params = head.get("DecodeParms")
+        if isinstance(params, dict) and params.get("Predictor", 1) >= 10:
+            raw = _png_unpredict(raw, params.get("Columns", 1))
+        return raw
+
+    def resolve(self, value, skip=()):
+        for _ in range(32):
+            if not isinstance(value, Ref):
+                break
+            value = self.get_object(value.num, skip)
+        return value
+
+    def get_object(self, num, skip=()):
+        location = self.locate(num)
+        if location is None:
+            return None
+        if location[0] == "objstm":
+            return self._from_object_stream(num, location[1], skip)
+        parser = _Parser(self.data, location[1], skip)
+        parser.skip_ws()
+        m = _OBJ_RE.match(self.data, parser.pos)
+        if not m or int(m.group(1)) != num:
+            raise PdfFormatError(f"object {num} not at its xref offset")
+        parser.pos = m.end()
+        return parser.parse()
+
+    def _from_object_stream(self, num, stream_num, skip=()):
+        entry = self._objstm_cache.get(stream_num)
+        if entry is None:
+            location = self.locate(stream_num)
+            if location is None or location[0] != "offset":
+                raise PdfFormatError("object stream not found")
+            head, raw = self._stream_at(location[1])
+            data = self._decode(head, raw)
+            header = _Parser(data[:head["First"]])
+            pairs = []
+            for _ in range(head["N"]):
+                pairs.append((header.parse(), header.parse()))
+            entry = self._objstm_cache[stream_num] = (data, head["First"], dict(pairs))
+        data, first, positions = entry
+        position = positions.get(num)
+        if position is None:
+            return None
+        return _Parser(data, first + position, skip).parse()
+
+    def stream(self, ref):
+        if not isinstance(ref, Ref):
+            return None
+        location = self.locate(ref.num)
+        if location is None or location[0] != "offset":
+            return None
+        head, raw = self._stream_at(location[1])
+        return self._decode(head, raw)
+
+
+def _png_unpredict(data, columns):
+    row = columns + 1
+    out = bytearray()
+    prev = bytearray(columns)
+    for i in range(0, len(data), row):
+        kind, line = data[i], bytearray(data[i + 1:i + row])
+        if kind == 2:  # Up
+            for j in range(len(line)):
+                line[j] = (line[j] + prev[j]) & 0xFF
+        elif kind != 0:
+            raise PdfFormatError(f"unsupported PNG predictor {kind}")
+        out += line
+        prev = line
+    return bytes(out)
+
+
+# ------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------
+
+def decode_text(value):
+    """PDF text string (bytes) -> str: UTF-16 with BOM, UTF-8 with BOM,
+    otherwise PDFDocEncoding (close enough to latin-1 for metadata)."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, bytes):
+        return str(value)
+    if value.startswith(b"\xfe\xff"):
+        return value[2:].decode("utf-16-be", errors="replace").strip("\0").strip()
+    if value.startswith(b"\xff\xfe"):
+        return value[2:].decode("utf-16-le", errors="replace").strip("\0").strip()
+    if value.startswith(b"\xef\xbb\xbf"):
+        return value[3:].decode("utf-8", errors="replace").strip()
+    return value.decode("latin-1").strip("\0").strip()
+
+
+def pdf_date(value):
+    """ "D:20230115093000+01'00'" -> "2023-01-15" (or "" if unparseable). """
+    m = _PDF_DATE_RE.match(decode_text(value).strip())
+    if not m:
+        return ""
+    year, month, day = m.group(1), m.group(2) or "01", m.group(3) or "01"
+    return _valid_date(int(year), int(month), int(day))
+
+
+def _xmp_date(text):
+    m = re.match(r"(\d{4})-(\d{2})-(\d{2})", text.strip())
+    return _valid_date(*(int(g) for g in m.groups())) if m else ""
+
+
+def _valid_date(year, month, day):
+    # "00" months/days and the like are written by some producers
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return ""
+
+
+@traced("pdf.fast_info", arg=0)
+def read_pdf_info(path):
+    """
+    Returns {"title", "author", "subject", "keywords", "date_created",
+    "date_modified", "page_count", "encrypted"} read from the trailer,
+    /Info, XMP and the page tree, or None if the file can't be parsed
+    this way. Missing fields are "" (or None for page_count).
+    """
+    try:
+        with open(path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data.find(b"%PDF-", 0, 1024) < 0:
+                    return None
+                return _read_info(_Document(data))
+    except (OSError, ValueError, PdfFormatError, zlib.error, KeyError, TypeError, IndexError,
+            RecursionError):
+        return None
+
+
+def _read_info(doc):
+    result = {
+        "title": "", "author": "", "subject": "", "keywords": [],
+        "date_created": "", "date_modified": "", "page_count": None,
+        "encrypted": "Encrypt" in doc.trailer,
+    }
+    if result["encrypted"]:
+        # strings are encrypted; only the page count is trustworthy
+        info = {}
+    else:
+        info = doc.resolve(doc.trailer.get("Info")) or {}
+
+    if isinstance(info, dict):
+        result["title"] = decode_text(doc.resolve(info.get("Title")))
+        result["author"] = decode_text(doc.resolve(info.get("Author")))
+        result["subject"] = decode_text(doc.resolve(info.get("Subject")))
+        keywords = decode_text(doc.resolve(info.get("Keywords")))
+        result["keywords"] = [k.strip() for k in re.split(r"[,;]", keywords) if k.strip()]
+        result["date_created"] = pdf_date(doc.resolve(info.get("CreationDate")))
+        result["date_modified"] = pdf_date(doc.resolve(info.get("ModDate")))
+
+    root = doc.resolve(doc.trailer.get("Root"))
+    if isinstance(root, dict):
+        # /Kids can hold thousands of references; only /Count is needed
+        pages = doc.resolve(root.get("Pages"), skip=("Kids",))
+        if isinstance(pages, dict):
+            count = doc.resolve(pages.get("Count"))
+            if isinstance(count, int):
+                result["page_count"] = count
+
+        # XMP fills whatever /Info left empty
+        if not result["encrypted"] and not (result["title"] and result["author"]):
+            try:
+                xmp = doc.stream(root.get("Metadata"))
+            except (PdfFormatError, zlib.error):
+                xmp = None
+            if xmp:
+                _merge_xmp(result, xmp.decode("utf-8", errors="replace"))
+    return result
+
+
+def _merge_xmp(result, xml):
+    found = {}
+    for field, pattern in _XMP_FIELDS.items():
+        m = pattern.search(xml)
+        if m:
+            found[field] = re.sub(r"<[^>]+>", "", m.group(1)).strip()
+    for field in ("title", "author", "subject"):
+        if not result[field] and found.get(field):
+            result[field] = found[field]
+    if not result["keywords"] and found.get("keywords"):
+        result["keywords"] = [k.strip() for k in re.split(r"[,;]", found["keywords"]) if k.strip()]
+    if not result["date_created"] and found.get("created"):
+        result["date_created"] = _xmp_date(found["created"])
+    if not result["date_modified"] and found.get("modified"):
+        result["date_modified"] = _xmp_date(found["modified"])
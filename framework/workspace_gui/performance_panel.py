@@ -0,0 +1,157 @@
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QCheckBox, QPushButton, QLabel,
+    QTableWidget, QTableWidgetItem, QHeaderView, QTabWidget, QFileDialog
+)
+from PyQt6.QtCore import QTimer
+
+from . import tracing
+
+REFRESH_MS = 1000
+RECENT_ROWS = 200
+
+
+class PerformancePanel(QWidget):
+    """
+    Live view of the tracing ring buffer:
+      - last RECENT_ROWS operations (newest first)
+      - per-stage totals (count, total, mean, max)
+      - cache hit rates from stats_sources: {label: callable -> stats dict}
+      - scheduler queue depths and wait times, if a scheduler is given
+    Recording can be toggled and the buffer exported as a Chrome trace.
+    """
+
+    def __init__(self, settings_manager, stats_sources=None, parent=None, scheduler=None):
+        super().__init__(parent)
+        self.settings_manager = settings_manager
+        self.stats_sources = stats_sources or {}
+        self.scheduler = scheduler
+        self._last_count = None
+
+        self._init_ui()
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(5)
+
+        top_bar = QHBoxLayout()
+        self.record_box = QCheckBox("Record", self)
+        self.record_box.setChecked(tracing.enabled())
+        self.record_box.toggled.connect(self.set_recording)
+        btn_clear = QPushButton("Clear", self)
+        btn_clear.clicked.connect(self.clear)
+        btn_export = QPushButton("Export Chrome Trace…", self)
+        btn_export.clicked.connect(self.export_trace)
+
+        top_bar.addWidget(self.record_box)
+        top_bar.addStretch()
+        top_bar.addWidget(btn_clear)
+        top_bar.addWidget(btn_export)
+
+        self.tabs = QTabWidget(self)
+        self.recent_table = self._make_table(["Operation", "ms", "Thread", "Details"])
+        self.summary_table = self._make_table(["Stage", "Calls", "Total ms", "Mean ms", "Max ms"])
+        self.tabs.addTab(self.recent_table, "Recent")
+        self.tabs.addTab(self.summary_table, "Breakdown")
+        self.queue_table = self._make_table(
+            ["Class", "Queued", "Running", "Done", "Deduped", "Cancelled",
+             "Mean wait ms", "p95 wait ms", "Max wait ms"]
+        )
+        self.tabs.addTab(self.queue_table, "Queues")
+
+        self.cache_label = QLabel(self)
+        self.cache_label.setWordWrap(True)
+
+        layout.addLayout(top_bar)
+        layout.addWidget(self.tabs, 1)
+        layout.addWidget(self.cache_label)
+
+    def _make_table(self, headers):
+        table = QTableWidget(0, len(headers), self)
+        table.setHorizontalHeaderLabels(headers)
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        return table
+
+    def set_recording(self, on: bool):
+        if on:
+            tracing.enable()
+        else:
+            tracing.disable()
+
+    def clear(self):
+        tracing.clear()
+        self._last_count = None
+        self.refresh()
+
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Chrome Trace", "workspace_trace.json", "JSON (*.json)"
+        )
+        if path:
+            tracing.export_chrome_trace(path)
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        self._refresh_caches()
+        self._refresh_queues()
+        events = tracing.events()
+        # skip repainting the tables when nothing new was recorded
+        marker = (len(events), events[-1][1] if events else None)
+        if marker == self._last_count:
+            return
+        self._last_count = marker
+
+        recent = events[-RECENT_ROWS:][::-1]
+        self.recent_table.setRowCount(len(recent))
+        for row, (name, _, duration, tid, args) in enumerate(recent):
+            details = ", ".join(f"{k}={v}" for k, v in (args or {}).items())
+            for col, value in enumerate((name, f"{duration / 1e6:.3f}", str(tid), details)):
+                self.recent_table.setItem(row, col, QTableWidgetItem(value))
+
+        rows = tracing.summary(events)
+        self.summary_table.setRowCount(len(rows))
+        for row, (name, count, total, mean, peak) in enumerate(rows):
+            values = (name, str(count), f"{total:.1f}", f"{mean:.3f}", f"{peak:.3f}")
+            for col, value in enumerate(values):
+                self.summary_table.setItem(row, col, QTableWidgetItem(value))
+
+    def _refresh_queues(self):
+        if self.scheduler is None:
+            return
+        metrics = self.scheduler.metrics()
+        classes = metrics["classes"]
+        self.queue_table.setRowCount(len(classes))
+        for row, (name, m) in enumerate(classes.items()):
+            if name == "background" and metrics["paused"] and m["queued"]:
+                name += " (paused)"
+            values = (
+                name, str(m["queued"]), str(m["running"]), str(m["completed"]),
+                str(m["deduplicated"]), str(m["cancelled"]),
+                f"{m['wait_mean_ms']:.1f}", f"{m['wait_p95_ms']:.1f}", f"{m['wait_max_ms']:.1f}",
+            )
+            for col, value in enumerate(values):
+                self.queue_table.setItem(row, col, QTableWidgetItem(value))
+
+    def _refresh_caches(self):
+        parts = []
+        for label, source in self.stats_sources.items():
+            try:
+                stats = source()
+            except Exception:
+                continue
+            if not stats:
+                continue
+            parts.append(
+                f"{label}: {stats.get('hit_rate', 0.0) * 100:.0f}% hits "
+                f"({stats.get('hits', 0)}/{stats.get('hits', 0) + stats.get('misses', 0)}), "
+                f"{stats.get('entries', 0)} entries, {stats.get('bytes', 0) / 1e6:.1f} MB"
+            )
+        self.cache_label.setText("\n".join(parts) or "No caches")
@@ -1,13 +1,17 @@
 import os
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTextEdit
 from PyQt6.QtCore import Qt
-from .metadata_engine import extract_metadata
+from PyQt6.QtGui import QPixmap
+
+from .tracing import traced
+
+EXCERPT_PREVIEW_CHARS = 600
 
 
 class PreviewPanel(QWidget):
     """
-    Shows basic metadata and info for the selected file.
-    Later: PDF thumbnails, image previews, etc.
+    Shows a thumbnail (images, PDFs) and basic metadata for the
+    selected file.
     """
 
     def __init__(self, settings_manager, parent=None):
@@ -27,20 +31,50 @@ class PreviewPanel(QWidget):
             Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
         )
 
+        self.thumbnail_label = QLabel(self)
+        self.thumbnail_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.thumbnail_label.hide()
+
         self.meta_view = QTextEdit(self)
         self.meta_view.setReadOnly(True)
         self.meta_view.setPlaceholderText("Metadata and quick info will appear here.")
 
         layout.addWidget(self.title_label)
+        layout.addWidget(self.thumbnail_label)
         layout.addWidget(self.meta_view)
 
-    def on_file_selected(self, path: str):
+    def on_loading(self, path: str):
+        self.current_path = path
+        self.title_label.setText(os.path.basename(path))
+        self.meta_view.setText("Loading metadata…")
+        self.thumbnail_label.clear()
+        self.thumbnail_label.hide()
+
+    @traced("ui.preview.thumbnail")
+    def on_thumbnail_ready(self, path: str, image):
+        if path != self.current_path:
+            return
+        self.thumbnail_label.setPixmap(QPixmap.fromImage(image))
+        self.thumbnail_label.show()
+
+    def on_extraction_failed(self, path: str, error: str):
+        if path != self.current_path:
+            return
+        self.meta_view.setText(f"(Metadata extraction failed: {error})")
+
+    @traced("ui.preview.metadata")
+    def on_metadata_ready(self, file_metadata):
+        path = file_metadata.path
         self.current_path = path
         self.title_label.setText(os.path.basename(path))
 
-        metadata = extract_metadata(path)  # stub for now
+        metadata = file_metadata.raw_metadata
         if not metadata:
             self.meta_view.setText("(No metadata extracted yet.)")
         else:
-            text_lines = [f"{k}: {v}" for k, v in metadata.items()]
+            text_lines = [f"{k}: {v}" for k, v in metadata.items() if k != "excerpt"]
+            excerpt = metadata.get("excerpt")
+            if excerpt:
+                text_lines.append("")
+                text_lines.append(excerpt[:EXCERPT_PREVIEW_CHARS].strip())
             self.meta_view.setText("\n".join(text_lines))
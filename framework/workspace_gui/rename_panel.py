@@ -1,20 +1,77 @@
 import os
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QLabel, QListWidget,
-    QLineEdit, QPushButton, QHBoxLayout, QMessageBox
+    QLineEdit, QPushButton, QHBoxLayout, QMessageBox, QFileDialog, QProgressDialog
 )
+from PyQt6.QtCore import QObject, pyqtSignal
+from .batch_rename import list_folder_files, plan_batch_rename
+from .batch_rename_dialog import BatchRenameDialog
+from .metadata_engine import extract_metadata
 from .rules_engine import generate_name_suggestions
+from .scheduler import PREFETCH, get_default_scheduler
+from .tracing import traced
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _PlanSignals(QObject):
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(object, list)
+    failed = pyqtSignal(object, str)
+
+
+class _PlanTask:
+    """
+    Builds a batch rename plan as a scheduler job. cancelled is checked
+    after each file's metadata is loaded.
+    """
+
+    def __init__(self, paths, settings_manager, extract):
+        self.paths = paths
+        self.settings_manager = settings_manager
+        self.extract = extract
+        self.cancelled = False
+        self.job = None
+        self.signals = _PlanSignals()
+
+    def run(self):
+        return plan_batch_rename(
+            self.paths, self.settings_manager, metadata_for=self.extract,
+            progress=self._progress,
+        )
+
+    def _progress(self, done, total):
+        if self.cancelled:
+            raise _Cancelled()
+        self.signals.progress.emit(done, total)
+
+    def report(self, job):
+        # worker thread
+        if isinstance(job.error, _Cancelled):
+            return
+        if job.error is not None:
+            self.signals.failed.emit(self, str(job.error))
+        else:
+            self.signals.finished.emit(self, job.result)
 
 
 class RenamePanel(QWidget):
     """
     Shows auto-generated rename suggestions and allows manual override.
+    Emits: file_renamed(old_path: str, new_path: str)
     """
+    file_renamed = pyqtSignal(str, str)
 
-    def __init__(self, settings_manager, parent=None):
+    def __init__(self, settings_manager, parent=None, extract=extract_metadata, scheduler=None):
         super().__init__(parent)
         self.settings_manager = settings_manager
         self.current_path = None
+        self.extract = extract  # extract_metadata, or a DaemonClient's extract
+        self.scheduler = scheduler or get_default_scheduler()
+        self._plan = None
+        self._plan_progress = None
 
         self._init_ui()
 
@@ -32,8 +89,11 @@ class RenamePanel(QWidget):
         self.manual_input.setPlaceholderText("Manual filename (no path, just name.ext)")
 
         buttons_layout = QHBoxLayout()
+        self.btn_batch = QPushButton("Batch Rename Folder…", self)
+        self.btn_batch.clicked.connect(self.batch_rename_folder)
         self.btn_apply = QPushButton("Apply Rename", self)
         self.btn_apply.clicked.connect(self.apply_rename)
+        buttons_layout.addWidget(self.btn_batch)
         buttons_layout.addStretch()
         buttons_layout.addWidget(self.btn_apply)
 
@@ -43,15 +103,36 @@ class RenamePanel(QWidget):
         layout.addWidget(self.manual_input)
         layout.addLayout(buttons_layout)
 
-    def on_file_selected(self, path: str):
+    def on_loading(self, path: str):
         self.current_path = path
         self.suggestions_list.clear()
         self.manual_input.clear()
+        self.suggestions_list.addItem("Loading suggestions…")
+        self.suggestions_list.setEnabled(False)
+        self.btn_apply.setEnabled(False)
+
+    def on_extraction_failed(self, path: str, error: str):
+        if path != self.current_path:
+            return
+        self.suggestions_list.clear()
+        self.suggestions_list.setEnabled(True)
+        self.btn_apply.setEnabled(True)
+
+    @traced("ui.rename.metadata")
+    def on_metadata_ready(self, file_metadata):
+        path = file_metadata.path
+        self.current_path = path
+        self.suggestions_list.clear()
+        self.suggestions_list.setEnabled(True)
+        self.btn_apply.setEnabled(True)
+        self.manual_input.clear()
 
         if not path:
             return
 
-        suggestions = generate_name_suggestions(path, self.settings_manager)
+        suggestions = generate_name_suggestions(
+            path, self.settings_manager, metadata=file_metadata
+        )
         for s in suggestions:
             self.suggestions_list.addItem(s)
 
@@ -80,6 +161,84 @@ class RenamePanel(QWidget):
         try:
             os.rename(self.current_path, new_path)
             QMessageBox.information(self, "Renamed", f"Renamed to:\n{new_name}")
-            self.current_path = new_path
+            old_path, self.current_path = self.current_path, new_path
+            self.file_renamed.emit(old_path, new_path)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to rename file:\n{e}")
+
+    def batch_rename_folder(self):
+        start = os.path.dirname(self.current_path) if self.current_path else os.path.expanduser("~")
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder to Rename", start)
+        if not folder:
+            return
+        try:
+            paths = list_folder_files(folder)
+        except OSError as e:
+            QMessageBox.critical(self, "Error", f"Failed to list folder:\n{e}")
+            return
+        if not paths:
+            QMessageBox.information(self, "Batch Rename", "No files in that folder.")
+            return
+        self.open_batch_rename(paths)
+
+    def open_batch_rename(self, paths):
+        """
+        Builds the plan on the shared scheduler (metadata extraction for
+        every file) and opens the review dialog once it is ready.
+        """
+        if self._plan is not None:
+            return  # one plan at a time
+        task = self._plan = _PlanTask(paths, self.settings_manager, self.extract)
+        task.signals.progress.connect(self._on_plan_progress)
+        task.signals.finished.connect(self._on_plan_finished)
+        task.signals.failed.connect(self._on_plan_failed)
+
+        progress = self._plan_progress = QProgressDialog(
+            "Building rename plan…", "Cancel", 0, len(paths), self
+        )
+        progress.setMinimumDuration(300)
+        progress.canceled.connect(self._cancel_plan)
+
+        task.job = self.scheduler.submit(
+            task.run, priority=PREFETCH, root=os.path.dirname(paths[0]),
+            callback=task.report, name="plan_batch_rename",
+        )
+
+    def _cancel_plan(self):
+        task = self._plan
+        if task is None:
+            return
+        task.cancelled = True
+        self.scheduler.cancel(task.job, task.report)
+        self._end_plan()
+
+    def _end_plan(self):
+        self._plan = None
+        if self._plan_progress is not None:
+            progress, self._plan_progress = self._plan_progress, None
+            progress.canceled.disconnect(self._cancel_plan)
+            progress.close()
+
+    def _on_plan_progress(self, done, total):
+        if self._plan_progress is not None:
+            self._plan_progress.setValue(done)
+
+    def _on_plan_finished(self, task, ops):
+        if task is not self._plan:
+            return  # cancelled
+        self._end_plan()
+        dialog = BatchRenameDialog(ops, self)
+        dialog.renamed.connect(self._on_batch_renamed)
+        dialog.exec()
+
+    def _on_plan_failed(self, task, error):
+        if task is not self._plan:
+            return
+        self._end_plan()
+        QMessageBox.critical(self, "Error", f"Failed to build the rename plan:\n{error}")
+
+    def _on_batch_renamed(self, pairs):
+        for old_path, new_path in pairs:
+            if old_path == self.current_path:
+                self.current_path = new_path
+            self.file_renamed.emit(old_path, new_path)
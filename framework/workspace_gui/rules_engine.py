@@ -1,51 +1,243 @@
 import os
+import re
 import datetime
+from functools import lru_cache
+from string import Formatter
 
 from .metadata_engine import extract_metadata
+from .models import FileMetadata
+from .tracing import traced
+
+BAD_CHARS = r'\/:*?"<>|'
+_BAD_CHARS_RE = re.compile("[" + re.escape(BAD_CHARS) + "]")
+
+# apply_style splits on any whitespace (tabs and newlines too), "-" and
+# "_" after sanitizing; doing both in one regex keeps it to a single pass
+# over the text.
+_STYLE_SPLIT_RE = re.compile(r"[\s\-_" + re.escape(BAD_CHARS) + r"]+")
+
+# runs of separators left behind by empty template fields
+_SEP_RUN_RE = re.compile(r"([_\-. ])[_\-. ]+")
+_SEPARATORS = "_-. "
+
+# settings "order" entries -> template fields
+ORDER_FIELDS = {
+    "date": "date",
+    "project_name": "project",
+    "project": "project",
+    "category": "category",
+    "version": "version",
+    "title": "title",
+    "author": "author",
+    "year": "year",
+    "agency": "agency",
+    "number": "number",
+}
+
+# fields taken verbatim; everything else goes through apply_style
+UNSTYLED_FIELDS = {"date", "year", "version"}
 
 
 def sanitize_component(text: str) -> str:
     if not text:
         return ""
-    bad_chars = r'\/:*?"<>|'
-    for c in bad_chars:
-        text = text.replace(c, "_")
+    text = _BAD_CHARS_RE.sub("_", text)
     return text.strip().replace(" ", "-")
 
 
-def generate_name_suggestions(path: str, settings_manager):
-    base_dir, old_name = os.path.split(path)
-    stem, ext = os.path.splitext(old_name)
+# ------------------------------------------------------------
+# Compiled naming templates
+# ------------------------------------------------------------
+
+class CompiledTemplate:
+    """
+    A naming preset such as "{date}_{project}_{title}_{version}" parsed
+    once into literal/field pairs. Empty fields are dropped together with
+    the separator run they leave behind.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        self.parts = [
+            (literal, field)
+            for literal, field, _spec, _conv in Formatter().parse(template)
+        ]
+        self.fields = [f for _, f in self.parts if f]
+
+    def render(self, values: dict) -> str:
+        out = []
+        for literal, field in self.parts:
+            out.append(literal)
+            if field:
+                out.append(values.get(field) or "")
+        name = _SEP_RUN_RE.sub(r"\1", "".join(out))
+        return name.strip(_SEPARATORS)
+
+
+@lru_cache(maxsize=128)
+def compile_template(template: str) -> CompiledTemplate:
+    return CompiledTemplate(template)
+
+
+def template_from_order(order) -> str:
+    fields = [ORDER_FIELDS[o] for o in order if o in ORDER_FIELDS]
+    return "_".join("{" + f + "}" for f in fields)
+
+
+# Heuristic suggestions offered after the presets.
+FALLBACK_TEMPLATES = (
+    "{date}_{title}",
+    "{date}_{category}_{title}",
+    "{keyword}_{title}",
+)
+
+
+def document_date(metadata: dict) -> str:
+    """
+    The date a document is about: the one found in its text (invoice or
+    permit date, see field_extractor), else its creation date.
+    """
+    return metadata.get("document_date") or metadata.get("date_created") or ""
+
+
+@lru_cache(maxsize=16)
+def _strftime_pattern(date_format: str) -> str:
+    return date_format.replace("YYYY", "%Y").replace("MM", "%m").replace("DD", "%d")
+
+
+def format_date(date: str, date_format: str) -> str:
+    if not date or date_format == "YYYY-MM-DD":
+        return date or ""
+    try:
+        dt = datetime.datetime.strptime(date[:10], "%Y-%m-%d")
+    except ValueError:
+        return date
+    return dt.strftime(_strftime_pattern(date_format))
 
-    metadata = extract_metadata(path)
 
-    title = metadata.get("title") or stem
-    category = metadata.get("category") or ""
-    author = metadata.get("author") or ""
-    date = metadata.get("date_created") or ""
-    keywords = metadata.get("keywords") or []
+class NamingContext:
+    """
+    Settings-derived naming state (style, date format, include_* flags and
+    the compiled templates), built once per batch instead of per file.
+    """
 
-    # Simple smart guesses
-    primary_keyword = keywords[0] if keywords else ""
-    doc_type = category
+    def __init__(self, settings_manager):
+        get = settings_manager.get_setting
+        self.style = get("naming_style", "snake_case")
+        self.date_format = get("date_format", "YYYY-MM-DD")
+        self.include_date = get("include_date", True)
+        self.include_project = get("include_project_name", True)
+        self.include_version = get("include_version", True)
+        self.include_category = get("include_category", True)
 
-    # Build patterns
-    suggestions = []
+        presets = getattr(settings_manager, "presets", {}) or {}
+        default = get("default_preset")
+        names = ([default] if default in presets else []) + [
+            n for n in presets if n != default
+        ]
+        self.templates = [compile_template(presets[n]) for n in names]
+        if not self.templates:
+            self.templates = [compile_template(template_from_order(get("order", [])))]
 
-    # 1) Date + title
-    if date:
-        suggestions.append(f"{date}_{title}{ext}")
+    def field_values(self, path: str, metadata: dict) -> dict:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        date = document_date(metadata)
+        keywords = metadata.get("keywords") or []
 
-    # 2) Date + category + title
-    if date and doc_type:
-        suggestions.append(f"{date}_{doc_type}_{title}{ext}")
+        values = {
+            "title": metadata.get("title") or stem,
+            "author": metadata.get("author") or "",
+            "category": metadata.get("category") if self.include_category else "",
+            # the project named in the document, else the parent folder
+            "project": (
+                metadata.get("project")
+                or os.path.basename(os.path.dirname(os.path.abspath(path)))
+                if self.include_project else ""
+            ),
+            "version": metadata.get("version") if self.include_version else "",
+            "date": format_date(date, self.date_format) if self.include_date else "",
+            "year": date[:4] if date[:4].isdigit() else "",
+            "keyword": keywords[0] if keywords else "",
+            "agency": metadata.get("agency") or "",
+            "number": metadata.get("invoice_number") or metadata.get("permit_number") or "",
+        }
 
-    # 3) Keyword + title
-    if primary_keyword:
-        suggestions.append(f"{primary_keyword}_{title}{ext}")
+        style = self.style
+        for key, val in values.items():
+            if val and key not in UNSTYLED_FIELDS:
+                values[key] = apply_style(val, style)
+            elif not val:
+                values[key] = ""
+        return values
 
-    # 4) Fallback: formatted stem
-    suggestions.append(f"{stem.replace(' ','_')}{ext}")
+    def render_all(self, path: str, metadata: dict, values=None):
+        ext = os.path.splitext(path)[1]
+        if values is None:
+            values = self.field_values(path, metadata)
+        names = []
+        for template in self.templates:
+            name = template.render(values)
+            if name:
+                names.append(name + ext)
+        return names
+
+    def render_fallbacks(self, path: str, values: dict):
+        """
+        FALLBACK_TEMPLATES whose fields all have a value, then the styled
+        file stem; same styling and sanitizing as the presets.
+        """
+        stem, ext = os.path.splitext(os.path.basename(path))
+        names = []
+        for template in map(compile_template, FALLBACK_TEMPLATES):
+            if all(values.get(f) for f in template.fields):
+                names.append(template.render(values) + ext)
+        stem = apply_style(stem, self.style)
+        if stem:
+            names.append(stem + ext)
+        return names
+
+
+@traced("naming.names_for_folder")
+def generate_names_for_folder(paths, settings_manager, metadata_list=None, preset=None):
+    """
+    Renders one name per path with a single compiled preset (the default
+    preset unless given). metadata_list, when passed, must line up with
+    paths; otherwise metadata is extracted (cache-backed) per file.
+    """
+    ctx = NamingContext(settings_manager)
+    if preset is not None:
+        template = compile_template(settings_manager.get_preset(preset) or preset)
+    else:
+        template = ctx.templates[0]
+
+    names = []
+    for i, path in enumerate(paths):
+        metadata = metadata_list[i] if metadata_list is not None else extract_metadata(path)
+        if isinstance(metadata, FileMetadata):
+            metadata = metadata.raw_metadata
+        ext = os.path.splitext(path)[1]
+        name = template.render(ctx.field_values(path, metadata or {}))
+        names.append((name + ext) if name else os.path.basename(path))
+    return names
+
+
+@traced("naming.suggestions", arg=0)
+def generate_name_suggestions(path: str, settings_manager, metadata=None):
+    """
+    Builds rename suggestions for path. Pass metadata (a FileMetadata or
+    the raw dict) when it was already extracted to skip a second extraction.
+    The default preset comes first, then the other presets, then a few
+    heuristic fallbacks.
+    """
+    if metadata is None:
+        metadata = extract_metadata(path)
+    elif isinstance(metadata, FileMetadata):
+        metadata = metadata.raw_metadata
+    metadata = metadata or {}
+
+    ctx = NamingContext(settings_manager)
+    values = ctx.field_values(path, metadata)
+    suggestions = ctx.render_all(path, metadata, values) + ctx.render_fallbacks(path, values)
 
     # Dedupe + clean
     cleaned = []
@@ -67,21 +259,38 @@ def _get_date_from_metadata_or_fs(path: str, date_format: str) -> str:
     return dt.strftime("%Y-%m-%d")
 
 
+def _join_snake(parts):
+    return "_".join(p.lower() for p in parts)
+
+
+def _join_kebab(parts):
+    return "-".join(p.lower() for p in parts)
+
+
+def _join_camel(parts):
+    if not parts:
+        return ""
+    return parts[0].lower() + "".join(p.capitalize() for p in parts[1:])
+
+
+def _join_pascal(parts):
+    return "".join(p.capitalize() for p in parts)
+
+
+_STYLE_JOINERS = {
+    "snake_case": _join_snake,
+    "kebab_case": _join_kebab,
+    "camelCase": _join_camel,
+    "PascalCase": _join_pascal,
+}
+
+
+@lru_cache(maxsize=8192)
 def apply_style(text: str, style: str) -> str:
-    text = sanitize_component(text)
-    parts = [p for p in text.replace("-", " ").replace("_", " ").split(" ") if p]
-
-    if style == "snake_case":
-        return "_".join(p.lower() for p in parts)
-    if style == "kebab_case":
-        return "-".join(p.lower() for p in parts)
-    if style == "camelCase":
-        if not parts:
-            return ""
-        first = parts[0].lower()
-        rest = [p.capitalize() for p in parts[1:]]
-        return first + "".join(rest)
-    if style == "PascalCase":
-        return "".join(p.capitalize() for p in parts)
-
-    return "_".join(parts)
+    if not text:
+        return ""
+    parts = [p for p in _STYLE_SPLIT_RE.split(text.strip()) if p]
+    joiner = _STYLE_JOINERS.get(style)
+    if joiner is None:
+        return "_".join(parts)
+    return joiner(parts)
@@ -0,0 +1,450 @@
+"""
+Shared job scheduler.
+
+Every piece of background work that touches files (extraction for the
+selection, thumbnails, watcher re-extraction, ...) goes through one
+JobScheduler, so a click never waits behind thousands of queued files:
+
+  - three priority classes: INTERACTIVE > PREFETCH > BACKGROUND
+  - one worker is kept free for interactive jobs
+  - non-interactive jobs are limited per root folder, both in how many run
+    at once and in bytes per second
+  - identical pending jobs (same key) run once; submitting a key again
+    with a higher priority promotes the pending job
+  - BACKGROUND jobs wait while the user has been active recently
+  - queue depth and wait-time metrics per class
+
+Qt-free; callbacks run on the worker thread (emit a signal from them to
+get back to the GUI thread).
+"""
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from .tracing import span
+
+INTERACTIVE = 0
+PREFETCH = 1
+BACKGROUND = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", PREFETCH: "prefetch", BACKGROUND: "background"}
+
+DEFAULT_WORKERS = 3
+ROOT_CONCURRENCY = 2
+IDLE_DELAY = 1.5            # seconds without user input before background resumes
+WAIT_SAMPLES = 512
+
+_PENDING, _RUNNING, _DONE, _CANCELLED = "pending", "running", "done", "cancelled"
+
+_local = threading.local()
+
+
+def current_job():
+    """The Job being run on this worker thread, or None outside a job."""
+    return getattr(_local, "job", None)
+
+
+class Job:
+    """
+    One unit of work. result/error are set once done; wait() blocks
+    until then.
+    """
+    __slots__ = (
+        "key", "fn", "args", "priority", "root", "io_bytes", "name",
+        "callbacks", "state", "result", "error",
+        "submitted", "started", "finished", "_event",
+    )
+
+    def __init__(self, key, fn, args, priority, root, io_bytes, name):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.root = root
+        self.io_bytes = io_bytes
+        self.name = name
+        self.callbacks = []
+        self.state = _PENDING
+        self.result = None
+        self.error = None
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self._event = threading.Event()
+
+    @property
+    def done(self):
+        return self.state in (_DONE, _CANCELLED)
+
+    @property
+    def cancelled(self):
+        return self.state == _CANCELLED
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def __repr__(self):
+        return f"Job({self.name!r}, {PRIORITY_NAMES[self.priority]}, {self.state})"
+
+
+class _ClassStats:
+    __slots__ = ("submitted", "deduplicated", "completed", "failed", "cancelled", "running", "waits")
+
+    def __init__(self):
+        self.submitted = 0
+        self.deduplicated = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.running = 0
+        self.waits = deque(maxlen=WAIT_SAMPLES)
+
+
+class _RootBudget:
+    """Token bucket of bytes per second for one root."""
+    __slots__ = ("tokens", "updated", "running")
+
+    def __init__(self, rate):
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.running = 0
+
+    def refill(self, rate, now):
+        self.tokens = min(rate, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+
+
+class JobScheduler:
+    """
+    workers: threads in total (at least one is reserved for INTERACTIVE)
+    root_concurrency: running PREFETCH/BACKGROUND jobs per root
+    root_io_rate: bytes/s of PREFETCH/BACKGROUND io_bytes per root
+                  (None = unlimited)
+    idle_delay: seconds after note_user_activity() before BACKGROUND
+                jobs are started again
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, root_concurrency=ROOT_CONCURRENCY,
+                 root_io_rate=None, idle_delay=IDLE_DELAY):
+        self.workers = max(2, int(workers))
+        self.root_concurrency = max(1, int(root_concurrency))
+        self.root_io_rate = root_io_rate or None
+        self.idle_delay = idle_delay
+
+        self._cond = threading.Condition()
+        # priority -> root -> key -> job; roots are served round-robin
+        self._queues = {p: OrderedDict() for p in PRIORITY_NAMES}
+        self._pending = {}
+        self._roots = {}
+        self._stats = {p: _ClassStats() for p in PRIORITY_NAMES}
+        self._seq = itertools.count()
+        self._last_activity = 0.0
+        self._paused = False
+        self._shutdown = False
+
+        self._threads = []
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"scheduler-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    # ---- submitting -------------------------------------------------
+
+    def submit(self, fn, *args, key=None, priority=BACKGROUND, root=None,
+               io_bytes=0, callback=None, name=None):
+        """
+        Queues fn(*args). If a job with the same key is still pending,
+        that job is returned instead (promoted if priority is higher)
+        and callback is added to it. callback(job) runs on the worker
+        thread after fn returns or raises.
+        """
+        if priority not in PRIORITY_NAMES:
+            raise ValueError(f"unknown priority {priority!r}")
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("scheduler is shut down")
+            stats = self._stats[priority]
+            stats.submitted += 1
+            if key is not None:
+                job = self._pending.get(key)
+                if job is not None:
+                    stats.deduplicated += 1
+                    job.callbacks.append(callback)
+                    if priority < job.priority:
+                        self._move(job, priority)
+                    return job
+            else:
+                key = ("job", next(self._seq))
+
+            job = Job(key, fn, args, priority, root, io_bytes, name or getattr(fn, "__name__", "job"))
+            job.callbacks.append(callback)
+            self._pending[key] = job
+            self._enqueue(job)
+            self._cond.notify()
+            return job
+
+    def promote(self, key, priority):
+        """Raises a pending job's priority. Returns False if not pending."""
+        with self._cond:
+            job = self._pending.get(key)
+            if job is None:
+                return False
+            if priority < job.priority:
+                self._move(job, priority)
+                self._cond.notify()
+            return True
+
+    def cancel(self, job, callback=None):
+        """
+        Withdraws one submission of a pending job (the one that passed
+        callback). The job is dropped once nobody is waiting for it;
+        running jobs always finish.
+        """
+        with self._cond:
+            if job.state != _PENDING:
+                return False
+            try:
+                job.callbacks.remove(callback)
+            except ValueError:
+                return False
+            if job.callbacks:
+                return False
+            self._dequeue(job)
+            del self._pending[job.key]
+            job.state = _CANCELLED
+            self._stats[job.priority].cancelled += 1
+        job._event.set()
+        return True
+
+    def cancel_pending(self, priority=None, root=None):
+        """Drops every pending job of a class and/or root, whoever asked."""
+        dropped = []
+        with self._cond:
+            for job in list(self._pending.values()):
+                if priority is not None and job.priority != priority:
+                    continue
+                if root is not None and job.root != root:
+                    continue
+                self._dequeue(job)
+                del self._pending[job.key]
+                job.state = _CANCELLED
+                self._stats[job.priority].cancelled += 1
+                dropped.append(job)
+        for job in dropped:
+            job._event.set()
+        return len(dropped)
+
+    # ---- user activity ----------------------------------------------
+
+    def note_user_activity(self):
+        """Call on input events; BACKGROUND jobs wait until idle_delay has passed."""
+        self._last_activity = time.monotonic()
+
+    def set_paused(self, paused):
+        """Holds all BACKGROUND jobs regardless of activity."""
+        with self._cond:
+            self._paused = bool(paused)
+            self._cond.notify_all()
+
+    def _background_hold(self, now):
+        if self._paused:
+            return None
+        remaining = self._last_activity + self.idle_delay - now
+        return remaining if remaining > 0 else 0.0
+
+    # ---- queues (caller holds the lock) -------------------------------
+
+    def _enqueue(self, job):
+        self._queues[job.priority].setdefault(job.root, OrderedDict())[job.key] = job
+
+    def _dequeue(self, job):
+        by_root = self._queues[job.priority]
+        queue = by_root.get(job.root)
+        if queue is not None:
+            queue.pop(job.key, None)
+            if not queue:
+                del by_root[job.root]
+
+    def _move(self, job, priority):
+        self._dequeue(job)
+        job.priority = priority
+        self._enqueue(job)
+
+    def _next_job(self, now):
+        """(job, None) or (None, seconds to wait; None = until notified)."""
+        retry = None
+        running_shared = self._stats[PREFETCH].running + self._stats[BACKGROUND].running
+        for priority in (INTERACTIVE, PREFETCH, BACKGROUND):
+            by_root = self._queues[priority]
+            if not by_root:
+                continue
+            if priority == INTERACTIVE:
+                root, queue = next(iter(by_root.items()))
+                return self._take(by_root, root, queue), None
+
+            if running_shared >= self.workers - 1:
+                continue
+            if priority == BACKGROUND:
+                hold = self._background_hold(now)
+                if hold is None:
+                    continue
+                if hold > 0:
+                    retry = hold if retry is None else min(retry, hold)
+                    continue
+
+            for root, queue in list(by_root.items()):
+                budget = self._roots.get(root)
+                if budget is None:
+                    budget = self._roots[root] = _RootBudget(self.root_io_rate or 0)
+                if budget.running >= self.root_concurrency:
+                    continue
+                if self.root_io_rate:
+                    budget.refill(self.root_io_rate, now)
+                    if budget.tokens <= 0:
+                        wait = -budget.tokens / self.root_io_rate + 0.001
+                        retry = wait if retry is None else min(retry, wait)
+                        continue
+                # round-robin: this root goes to the back of the line
+                by_root.move_to_end(root)
+                return self._take(by_root, root, queue), None
+        return None, retry
+
+    def _take(self, by_root, root, queue):
+        _, job = queue.popitem(last=False)
+        if not queue:
+            del by_root[root]
+        del self._pending[job.key]
+        job.state = _RUNNING
+        job.started = time.monotonic()
+        stats = self._stats[job.priority]
+        stats.running += 1
+        stats.waits.append(job.started - job.submitted)
+        if job.priority != INTERACTIVE:
+            budget = self._roots[job.root]
+            budget.running += 1
+            if self.root_io_rate:
+                budget.tokens -= job.io_bytes
+        return job
+
+    # ---- workers ------------------------------------------------------
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._shutdown:
+                        return
+                    job, retry = self._next_job(time.monotonic())
+                    if job is not None:
+                        break
+                    self._cond.wait(retry)
+
+            _local.job = job
+            try:
+                with span("job." + PRIORITY_NAMES[job.priority], job=job.name):
+                    job.result = job.fn(*job.args)
+            except Exception as e:
+                job.error = e
+            finally:
+                _local.job = None
+
+            with self._cond:
+                job.state = _DONE
+                job.finished = time.monotonic()
+                stats = self._stats[job.priority]
+                stats.running -= 1
+                if job.error is None:
+                    stats.completed += 1
+                else:
+                    stats.failed += 1
+                if job.priority != INTERACTIVE:
+                    self._roots[job.root].running -= 1
+                callbacks = list(job.callbacks)
+                self._cond.notify_all()
+            job._event.set()
+
+            for callback in callbacks:
+                if callback is None:
+                    continue
+                try:
+                    callback(job)
+                except Exception:
+                    pass
+
+    def shutdown(self, wait=True, cancel_pending=True):
+        if cancel_pending:
+            self.cancel_pending()
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    # ---- metrics ------------------------------------------------------
+
+    def metrics(self):
+        """
+        {"paused": bool, "classes": {name: {queued, running, submitted,
+        deduplicated, completed, failed, cancelled, wait_mean_ms,
+        wait_p95_ms, wait_max_ms}}}
+        """
+        with self._cond:
+            now = time.monotonic()
+            hold = self._background_hold(now)
+            result = {"paused": hold is None or hold > 0, "workers": self.workers, "classes": {}}
+            for priority, name in PRIORITY_NAMES.items():
+                stats = self._stats[priority]
+                waits = sorted(stats.waits)
+                queued = sum(len(q) for q in self._queues[priority].values())
+                result["classes"][name] = {
+                    "queued": queued,
+                    "running": stats.running,
+                    "submitted": stats.submitted,
+                    "deduplicated": stats.deduplicated,
+                    "completed": stats.completed,
+                    "failed": stats.failed,
+                    "cancelled": stats.cancelled,
+                    "wait_mean_ms": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                    "wait_p95_ms": round(waits[int((len(waits) - 1) * 0.95)] * 1000, 2) if waits else 0.0,
+                    "wait_max_ms": round(waits[-1] * 1000, 2) if waits else 0.0,
+                }
+        return result
+
+
+def file_io_bytes(path):
+    """Size of path for io_bytes (0 if it can't be stat'ed)."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+# ------------------------------------------------------------
+# Shared instance
+# ------------------------------------------------------------
+
+_default_scheduler = None
+_default_lock = threading.Lock()
+
+
+def configure_default_scheduler(workers=DEFAULT_WORKERS, root_concurrency=ROOT_CONCURRENCY,
+                                root_io_rate=None, idle_delay=IDLE_DELAY):
+    """Replaces the scheduler returned by get_default_scheduler()."""
+    global _default_scheduler
+    with _default_lock:
+        if _default_scheduler is not None:
+            _default_scheduler.shutdown(wait=False)
+        _default_scheduler = JobScheduler(workers, root_concurrency, root_io_rate, idle_delay)
+    return _default_scheduler
+
+
+def get_default_scheduler():
+    global _default_scheduler
+    if _default_scheduler is not None:
+        return _default_scheduler
+    with _default_lock:
+        if _default_scheduler is None:
+            _default_scheduler = JobScheduler()
+    return _default_scheduler
@@ -0,0 +1,224 @@
+import os
+import re
+import sqlite3
+import threading
+
+from .metadata_cache import file_stem
+
+SEARCH_COLUMNS = ("title", "author", "category", "keywords", "dates", "body")
+
+_TOKEN_RE = re.compile(r'(\w+):("[^"]*"|\S+)|"([^"]*)"|(\S+)')
+
+
+def default_index_path():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, "config", "search_index.sqlite")
+
+
+def build_match_query(text):
+    """
+    Turns search-box input into an FTS5 MATCH expression:
+      - plain words become prefix terms:  invoice    -> "invoice"*
+      - quoted text stays a phrase:       "amount due"
+      - column filters:                   category:permit -> category : "permit"*
+    All terms must match.
+    """
+    terms = []
+    for m in _TOKEN_RE.finditer(text):
+        column, value, phrase, word = m.groups()
+        if column and column.lower() in SEARCH_COLUMNS:
+            value = value.strip('"')
+            if value:
+                terms.append(f'{column.lower()} : {_quote(value)}*')
+        elif phrase:
+            terms.append(_quote(phrase))
+        else:
+            word = word if word is not None else m.group(0)
+            word = word.strip('"')
+            if word:
+                terms.append(f"{_quote(word)}*")
+    return " AND ".join(terms)
+
+
+def _quote(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+class SearchIndex:
+    """
+    Incremental full-text index (SQLite FTS5) over extracted text and
+    metadata fields. Rows are upserted as files are extracted; nothing is
+    ever rebuilt wholesale.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_index_path()
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                size INTEGER,
+                mtime_ns INTEGER,
+                title TEXT,
+                category TEXT,
+                confidence REAL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+                title, author, category, keywords, dates, body,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            );
+            """
+        )
+        self._conn.commit()
+
+    def update(self, path, metadata, st=None, commit=True, body=None):
+        """
+        Adds or refreshes the entry for path. Skips the write when the
+        stored size/mtime already match. Pass commit=False when loading
+        many rows and call commit() once at the end. body is the text to
+        index (metadata["excerpt"] if not given).
+        """
+        if st is None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return
+        metadata = metadata or {}
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, size, mtime_ns FROM docs WHERE path = ?", (path,)
+            ).fetchone()
+            if row and row[1] == st.st_size and row[2] == st.st_mtime_ns:
+                return
+
+            values = (
+                metadata.get("title") or "",
+                metadata.get("author") or "",
+                metadata.get("category") or "",
+                " ".join(str(k) for k in metadata.get("keywords") or []),
+                " ".join(
+                    str(metadata.get(k) or "")
+                    for k in ("date_created", "date_modified", "document_date")
+                ),
+                body or metadata.get("excerpt") or "",
+            )
+
+            if row:
+                doc_id = row[0]
+                self._conn.execute(
+                    "UPDATE docs SET size = ?, mtime_ns = ?, title = ?, category = ?, "
+                    "confidence = ? WHERE id = ?",
+                    (st.st_size, st.st_mtime_ns, values[0], values[2],
+                     metadata.get("confidence"), doc_id),
+                )
+                self._conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (doc_id,))
+            else:
+                cur = self._conn.execute(
+                    "INSERT INTO docs (path, size, mtime_ns, title, category, confidence) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, st.st_size, st.st_mtime_ns, values[0], values[2],
+                     metadata.get("confidence")),
+                )
+                doc_id = cur.lastrowid
+
+            self._conn.execute(
+                "INSERT INTO docs_fts (rowid, title, author, category, keywords, dates, body) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (doc_id,) + values,
+            )
+            if commit:
+                self._conn.commit()
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def remove(self, path):
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM docs_fts WHERE rowid = ?", (row[0],))
+                self._conn.execute("DELETE FROM docs WHERE id = ?", (row[0],))
+                self._conn.commit()
+
+    def rename(self, old_path, new_path):
+        """
+        Moves the entry for a renamed file. A title that was only the old
+        file name becomes the new one.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, title FROM docs WHERE path = ?", (old_path,)
+            ).fetchone()
+            if row is None:
+                return
+            self.remove(new_path)
+            self._conn.execute("UPDATE docs SET path = ? WHERE path = ?", (new_path, old_path))
+            if row[1] == file_stem(old_path):
+                title = file_stem(new_path)
+                self._conn.execute("UPDATE docs SET title = ? WHERE id = ?", (title, row[0]))
+                self._conn.execute("UPDATE docs_fts SET title = ? WHERE rowid = ?", (title, row[0]))
+            self._conn.commit()
+
+    def search(self, text, limit=200):
+        """
+        Returns [(path, title, category, snippet)] best match first.
+        """
+        query = build_match_query(text)
+        if not query:
+            return []
+        with self._lock:
+            try:
+                rows = self._conn.execute(
+                    "SELECT d.path, d.title, d.category, "
+                    "snippet(docs_fts, 5, '[', ']', '…', 8) "
+                    "FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid "
+                    "WHERE docs_fts MATCH ? ORDER BY bm25(docs_fts, 10.0, 3.0, 5.0, 5.0, 1.0, 1.0) "
+                    "LIMIT ?",
+                    (query, limit),
+                ).fetchall()
+            except sqlite3.OperationalError:
+                return []
+        return rows
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def optimize(self):
+        with self._lock:
+            self._conn.execute("INSERT INTO docs_fts(docs_fts) VALUES ('optimize')")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_default_search_index():
+    """
+    Returns the shared index at config/search_index.sqlite, or None if
+    SQLite lacks FTS5 or the file can't be opened.
+    """
+    global _default_index
+    if _default_index is None:
+        with _default_lock:
+            if _default_index is None:
+                try:
+                    _default_index = SearchIndex()
+                except (OSError, sqlite3.Error):
+                    return None
+    return _default_index
@@ -0,0 +1,78 @@
+import os
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QLabel
+)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+
+from .tracing import traced
+
+
+class SearchPanel(QWidget):
+    """
+    Search box over the workspace search index (titles, authors,
+    categories, keywords, dates and extracted text).
+    Supports prefix words, "quoted phrases" and column:value filters.
+    Emits: file_selected(path: str)
+    """
+    file_selected = pyqtSignal(str)
+
+    def __init__(self, settings_manager, search_index, parent=None):
+        super().__init__(parent)
+        self.settings_manager = settings_manager
+        self.search_index = search_index
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(150)
+        self._timer.timeout.connect(self.run_search)
+
+        self._init_ui()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(5)
+
+        self.query_input = QLineEdit(self)
+        self.query_input.setPlaceholderText("Search files (e.g. invoice category:permit \"amount due\")")
+        self.query_input.setClearButtonEnabled(True)
+        self.query_input.textChanged.connect(lambda _: self._timer.start())
+        self.query_input.returnPressed.connect(self.run_search)
+
+        self.status_label = QLabel(self)
+
+        self.results = QListWidget(self)
+        self.results.itemActivated.connect(self.on_result_activated)
+
+        layout.addWidget(self.query_input)
+        layout.addWidget(self.status_label)
+        layout.addWidget(self.results, 1)
+
+        if self.search_index is None:
+            self.query_input.setEnabled(False)
+            self.status_label.setText("Search index unavailable (SQLite without FTS5?)")
+
+    @traced("ui.search")
+    def run_search(self):
+        self._timer.stop()
+        self.results.clear()
+        text = self.query_input.text().strip()
+        if not text or self.search_index is None:
+            self.status_label.clear()
+            return
+
+        rows = self.search_index.search(text)
+        for path, title, category, snippet in rows:
+            label = title or os.path.basename(path)
+            if category:
+                label = f"[{category}] {label}"
+            item = QListWidgetItem(label)
+            item.setData(Qt.ItemDataRole.UserRole, path)
+            item.setToolTip(f"{path}\n{snippet}" if snippet else path)
+            self.results.addItem(item)
+        self.status_label.setText(f"{len(rows)} results")
+
+    def on_result_activated(self, item):
+        path = item.data(Qt.ItemDataRole.UserRole)
+        if path and os.path.isfile(path):
+            self.file_selected.emit(path)
@@ -0,0 +1,91 @@
+from functools import partial
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .metadata_engine import extract_metadata
+from .models import FileMetadata
+from .scheduler import INTERACTIVE, get_default_scheduler
+
+
+class _ExtractionSignals(QObject):
+    finished = pyqtSignal(int, object)
+    failed = pyqtSignal(int, str, str)
+
+
+class SelectionPipeline(QObject):
+    """
+    Extracts metadata once per selected file on the shared scheduler
+    (interactive class, so it never queues behind background work) and
+    hands the same FileMetadata object to every subscriber (preview,
+    rename, ...). A newer selection supersedes any extraction still queued
+    or running.
+    Emits:
+      loading(path: str)
+      metadata_ready(metadata: FileMetadata)
+      extraction_failed(path: str, error: str)
+    """
+    loading = pyqtSignal(str)
+    metadata_ready = pyqtSignal(object)
+    extraction_failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None, scheduler=None, extract=extract_metadata):
+        super().__init__(parent)
+        self.current = None
+        self.scheduler = scheduler or get_default_scheduler()
+        self.extract = extract  # extract_metadata, or a DaemonClient's extract
+
+        # created on the GUI thread, so emits from workers are queued to it
+        self._signals = _ExtractionSignals()
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+
+        self._generation = 0
+        self._pending = None
+
+    def on_file_selected(self, path: str):
+        if not path:
+            return
+
+        self.scheduler.note_user_activity()
+        self._cancel_pending()
+        self._generation += 1
+
+        # same key as watcher re-extraction, so a queued background job
+        # for this file is promoted rather than run twice
+        callback = partial(self._report, self._generation)
+        job = self.scheduler.submit(
+            self.extract, path, key=("extract", path), priority=INTERACTIVE,
+            callback=callback, name="extract_metadata",
+        )
+        self._pending = (job, callback)
+
+        self.loading.emit(path)
+
+    def _cancel_pending(self):
+        if self._pending is not None:
+            # running jobs finish; their result is ignored by generation
+            self.scheduler.cancel(*self._pending)
+            self._pending = None
+
+    def _report(self, generation, job):
+        # worker thread
+        path = job.args[0]
+        if job.error is not None:
+            self._signals.failed.emit(generation, path, str(job.error))
+        else:
+            self._signals.finished.emit(
+                generation, FileMetadata(path=path, raw_metadata=job.result or {})
+            )
+
+    def _on_finished(self, generation: int, metadata):
+        if generation != self._generation:
+            return  # superseded by a newer selection
+        self._pending = None
+        self.current = metadata
+        self.metadata_ready.emit(metadata)
+
+    def _on_failed(self, generation: int, path: str, error: str):
+        if generation != self._generation:
+            return
+        self._pending = None
+        self.extraction_failed.emit(path, error)
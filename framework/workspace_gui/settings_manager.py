@@ -9,7 +9,17 @@ DEFAULT_SETTINGS = {
     "include_version": True,
     "include_category": True,
     "order": ["date", "project_name", "category", "version", "title"],
-    "default_preset": "developer_standard"
+    "default_preset": "developer_standard",
+    "metadata_cache_enabled": True,
+    "metadata_cache_mb": 256,
+    "watch_filesystem": True,
+    "tree_metadata_columns": True,
+    "thumbnail_cache_mb": 64,
+    "tracing_enabled": False,
+    "scheduler_workers": 3,
+    "background_io_mb_per_sec": 0,
+    "background_idle_ms": 1500,
+    "use_daemon": True
 }
 
 
@@ -49,7 +59,8 @@ class SettingsManager:
                 "developer_standard": "{date}_{project}_{title}_{version}",
                 "minimal": "{title}",
                 "research": "{author}_{year}_{title}",
-                "media": "{date}_{category}_{title}"
+                "media": "{date}_{category}_{title}",
+                "records": "{date}_{agency}_{category}_{number}"
             }
             with open(self.presets_path, "w", encoding="utf-8") as f:
                 json.dump(default_presets, f, indent=2)
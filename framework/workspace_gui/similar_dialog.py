@@ -0,0 +1,209 @@
+import os
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QMessageBox,
+    QTreeWidget, QTreeWidgetItem, QHeaderView, QProgressBar
+)
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, Qt, pyqtSignal
+
+from .batch_rename import plan_batch_rename
+from .batch_rename_dialog import BatchRenameDialog
+from .metadata_engine import extract_metadata
+from .similarity import apply_to_cache, find_similar_in_tree
+
+PATH_ROLE = Qt.ItemDataRole.UserRole
+CLUSTER_ROLE = Qt.ItemDataRole.UserRole + 1
+
+
+class _ScanSignals(QObject):
+    progress = pyqtSignal(str, int, int)
+    finished = pyqtSignal(list)
+    failed = pyqtSignal(str)
+
+
+class _ScanTask(QRunnable):
+    def __init__(self, root, metadata_for):
+        super().__init__()
+        self.root = root
+        self.metadata_for = metadata_for
+        self.signals = _ScanSignals()
+
+    def run(self):
+        try:
+            clusters = find_similar_in_tree(
+                self.root, self.metadata_for, progress=self.signals.progress.emit
+            )
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            clusters = []
+        self.signals.finished.emit(clusters)
+
+
+class SimilarDocumentsDialog(QDialog):
+    """
+    Clusters near-duplicate PDFs and text files under a folder in the
+    background and lists each cluster with the category its members
+    agree on. A cluster can be batch-renamed with that category and
+    title, or its categories written to the metadata cache.
+    Emits: file_selected(path: str) when a member is double-clicked,
+           renamed(list of (old_path, new_path))
+    """
+    file_selected = pyqtSignal(str)
+    renamed = pyqtSignal(list)
+
+    def __init__(self, root, settings_manager, parent=None, cache=None,
+                 metadata_for=extract_metadata):
+        super().__init__(parent)
+        self.setWindowTitle(f"Similar documents in {root}")
+        self.resize(900, 600)
+        self.root = root
+        self.settings_manager = settings_manager
+        self.cache = cache
+        self.metadata_for = metadata_for
+        self.clusters = []
+
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._task = None
+
+        self._init_ui()
+        self.scan()
+
+    def _init_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel("Scanning…", self)
+        self.progress = QProgressBar(self)
+
+        self.tree = QTreeWidget(self)
+        self.tree.setHeaderLabels(["Document", "Category", "Confidence", "Similarity"])
+        header = self.tree.header()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        for column in (1, 2, 3):
+            header.setSectionResizeMode(column, QHeaderView.ResizeMode.ResizeToContents)
+        self.tree.setUniformRowHeights(True)
+        self.tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+        self.tree.currentItemChanged.connect(self._update_buttons)
+
+        buttons = QHBoxLayout()
+        self.btn_rename = QPushButton("Rename Cluster…", self)
+        self.btn_rename.clicked.connect(self.rename_cluster)
+        self.btn_apply = QPushButton("Apply Categories", self)
+        self.btn_apply.setToolTip("Store each cluster's category and confidence in the metadata cache")
+        self.btn_apply.clicked.connect(self.apply_categories)
+        self.btn_rescan = QPushButton("Rescan", self)
+        self.btn_rescan.clicked.connect(self.scan)
+        btn_close = QPushButton("Close", self)
+        btn_close.clicked.connect(self.accept)
+        buttons.addWidget(self.btn_rename)
+        buttons.addWidget(self.btn_apply)
+        buttons.addStretch()
+        buttons.addWidget(self.btn_rescan)
+        buttons.addWidget(btn_close)
+
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.progress)
+        layout.addWidget(self.tree, 1)
+        layout.addLayout(buttons)
+        self._update_buttons()
+
+    def scan(self):
+        if self._task is not None:
+            return
+        self.tree.clear()
+        self.clusters = []
+        self.btn_rescan.setEnabled(False)
+        self._update_buttons()
+        self.progress.show()
+        self.summary_label.setText("Scanning…")
+
+        self._task = _ScanTask(self.root, self.metadata_for)
+        self._task.setAutoDelete(False)
+        self._task.signals.progress.connect(self.on_progress)
+        self._task.signals.finished.connect(self.on_finished)
+        self._task.signals.failed.connect(self.on_failed)
+        self.pool.start(self._task)
+
+    def on_progress(self, stage, done, total):
+        self.summary_label.setText(
+            "Reading documents…" if stage == "extract" else "Comparing documents…"
+        )
+        self.progress.setMaximum(max(total, 1))
+        self.progress.setValue(done)
+
+    def on_finished(self, clusters):
+        self._task = None
+        self.clusters = clusters
+        self.btn_rescan.setEnabled(True)
+        self.progress.hide()
+
+        members = sum(len(c.paths) for c in clusters)
+        self.summary_label.setText(
+            f"{len(clusters)} clusters of similar documents, {members} documents"
+        )
+        for i, cluster in enumerate(clusters):
+            parent = QTreeWidgetItem([
+                cluster.title or os.path.basename(cluster.paths[0]),
+                cluster.category,
+                f"{cluster.confidence:.2f}",
+                f"≥ {cluster.similarity:.0%}",
+            ])
+            parent.setData(0, CLUSTER_ROLE, i)
+            for path in cluster.paths:
+                meta = cluster.metadata.get(path) or {}
+                child = QTreeWidgetItem([
+                    os.path.relpath(path, self.root),
+                    meta.get("category", ""),
+                    f"{meta.get('confidence', 0.0):.2f}",
+                    "",
+                ])
+                child.setData(0, PATH_ROLE, path)
+                child.setData(0, CLUSTER_ROLE, i)
+                parent.addChild(child)
+            self.tree.addTopLevelItem(parent)
+        self._update_buttons()
+
+    def on_failed(self, message):
+        QMessageBox.critical(self, "Error", f"Failed to scan {self.root}:\n{message}")
+
+    def _current_cluster(self):
+        item = self.tree.currentItem()
+        if item is None:
+            return None
+        index = item.data(0, CLUSTER_ROLE)
+        return self.clusters[index] if index is not None else None
+
+    def _update_buttons(self, *_):
+        scanning = self._task is not None
+        self.btn_rename.setEnabled(not scanning and self._current_cluster() is not None)
+        self.btn_apply.setEnabled(
+            not scanning and bool(self.clusters) and hasattr(self.cache, "put")
+        )
+
+    def rename_cluster(self):
+        cluster = self._current_cluster()
+        if cluster is None:
+            return
+        # names are built from the cluster's shared category and title
+        ops = plan_batch_rename(
+            cluster.paths, self.settings_manager, metadata_for=cluster.metadata.__getitem__
+        )
+        dialog = BatchRenameDialog(ops, self)
+        dialog.renamed.connect(self._on_renamed)
+        dialog.exec()
+
+    def _on_renamed(self, pairs):
+        self.renamed.emit(pairs)
+        self.scan()
+
+    def apply_categories(self):
+        try:
+            count = apply_to_cache(self.clusters, self.cache)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to update the metadata cache:\n{e}")
+            return
+        QMessageBox.information(self, "Categories", f"Updated {count} files.")
+
+    def on_item_double_clicked(self, item, column):
+        path = item.data(0, PATH_ROLE)
+        if path:
+            self.file_selected.emit(path)
@@ -0,0 +1,477 @@
+"""
+Near-duplicate document clustering.
+
+    python -m workspace_gui.similarity <root> [--threshold 0.7] [--json] [--apply]
+
+Scanned copies, revised contracts and re-exported invoices rarely share
+bytes (dedup.py finds those) but share most of their text. Each
+document's excerpt is cut into overlapping word shingles and reduced to
+a MinHash signature of NUM_PERM values, computed for all permutations at
+once with NumPy. Signatures are split into BANDS bands; documents whose
+band values agree land in the same LSH bucket, so a lookup only compares
+against the documents it shares a bucket with instead of the whole
+corpus. Candidates whose estimated Jaccard similarity reaches the
+threshold are merged into clusters with union-find, and each cluster
+settles on one category (confidence-weighted vote) that its members
+adopt.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import numpy as np
+
+from .metadata_engine import extract_metadata
+
+NUM_PERM = 128
+BANDS = 16                  # 8 rows per band: candidates from ~0.7 similarity
+SHINGLE_WORDS = 4
+MIN_SHINGLES = 8            # shorter texts are too generic to compare
+DEFAULT_THRESHOLD = 0.7
+MINHASH_COLUMNS = 4096      # shingles hashed per step, bounds temporary memory
+PAIR_BLOCK = 65536          # candidate pairs compared per step
+
+# Categories the extractors assign by file type alone; a rule category
+# found for any member of a cluster wins over them.
+GENERIC_CATEGORIES = {"", "document", "text"}
+CLUSTER_BONUS = 0.05
+MAX_CONFIDENCE = 0.95
+
+_PRIME = np.uint64(4294967291)      # largest prime below 2**32
+_MASK32 = np.uint64(0xFFFFFFFF)
+_SHINGLE_MULT = np.uint64(0x01000193)
+_WORD_RE = re.compile(r"\w+")
+
+_rng = np.random.RandomState(0x5EED)
+_PERM_A = _rng.randint(1, 2**32 - 5, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, 2**32 - 5, size=NUM_PERM, dtype=np.uint64)
+_BAND_MULT = _rng.randint(1, 2**62, size=NUM_PERM // BANDS, dtype=np.uint64) | np.uint64(1)
+_BAND_SALT = _rng.randint(0, 2**62, size=BANDS, dtype=np.uint64)
+
+
+# ------------------------------------------------------------
+# Signatures
+# ------------------------------------------------------------
+
+def shingle_hashes(text, words=SHINGLE_WORDS):
+    """
+    Distinct 32-bit hashes of the text's overlapping runs of `words`
+    words (lowercased). Texts shorter than one run give one hash per word.
+    """
+    tokens = _WORD_RE.findall(text.lower())
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    h = np.fromiter((zlib.crc32(t.encode("utf-8")) for t in tokens),
+                    dtype=np.uint64, count=len(tokens))
+    if len(h) >= words:
+        # polynomial combination of each window, vectorized over windows
+        n = len(h) - words + 1
+        combined = h[:n].copy()
+        for j in range(1, words):
+            combined = (combined * _SHINGLE_MULT + h[j:j + n]) & _MASK32
+        h = combined
+    return np.unique(h)
+
+
+def minhash(shingles):
+    """
+    MinHash signature (uint32[NUM_PERM]) of a shingle hash array, or None
+    if there are fewer than MIN_SHINGLES. Each permutation is
+    (a * x + b) mod p; all of them are evaluated for a block of shingles
+    at once.
+    """
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    sig = np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    a, b = _PERM_A[:, None], _PERM_B[:, None]
+    for start in range(0, len(shingles), MINHASH_COLUMNS):
+        x = shingles[None, start:start + MINHASH_COLUMNS]
+        # a, x < 2**32, so a * x + b fits in uint64
+        np.minimum(sig, ((a * x + b) % _PRIME).min(axis=1), out=sig)
+    return sig.astype(np.uint32)
+
+
+def text_signature(text):
+    return minhash(shingle_hashes(text)) if text else None
+
+
+def metadata_signature(meta):
+    """Signature of the extracted text in meta["excerpt"], or None."""
+    return text_signature((meta or {}).get("excerpt") or "")
+
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of the two documents' shingle sets."""
+    return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+def _band_keys(signatures):
+    """
+    (n, BANDS) uint64 bucket keys, one per band of each signature, salted
+    per band so all bands can share one key space.
+    """
+    rows = NUM_PERM // BANDS
+    bands = signatures.reshape(len(signatures), BANDS, rows).astype(np.uint64)
+    # wrapping multiply-add; a collision only adds a candidate to verify
+    return (bands * _BAND_MULT).sum(axis=2, dtype=np.uint64) + _BAND_SALT
+
+
+# ------------------------------------------------------------
+# LSH index
+# ------------------------------------------------------------
+
+class SimilarityIndex:
+    """
+    MinHash signatures of many documents with their LSH band keys. The
+    keys of all bands are kept in one sorted array (rebuilt lazily after
+    adds), so a document's buckets are found with one vectorized binary
+    search and no per-document objects are kept.
+    query() and clusters() compare a document only with documents that
+    share at least one bucket with it.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.paths = []
+        self._ids = {}
+        self._blocks = []
+        self._signatures = np.empty((0, NUM_PERM), dtype=np.uint32)
+        self._keys = np.empty((0, BANDS), dtype=np.uint64)
+        self._order = None          # flat (id * BANDS + band) positions, by key
+        self._sorted_keys = None
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __contains__(self, path):
+        return path in self._ids
+
+    def add_many(self, paths, signatures):
+        """Adds documents; signatures is an (n, NUM_PERM) array or a list."""
+        if not len(paths):
+            return
+        signatures = np.asarray(signatures, dtype=np.uint32).reshape(len(paths), NUM_PERM)
+        first = len(self.paths)
+        for i, path in enumerate(paths):
+            if path in self._ids:
+                raise ValueError(f"already indexed: {path}")
+            self._ids[path] = first + i
+        self.paths.extend(paths)
+        self._blocks.append(signatures)
+        self._order = self._sorted_keys = None
+
+    def add(self, path, signature):
+        self.add_many([path], [signature])
+
+    @property
+    def signatures(self):
+        self._merge()
+        return self._signatures
+
+    def _merge(self):
+        if self._blocks:
+            self._keys = np.concatenate([self._keys] + [_band_keys(b) for b in self._blocks])
+            self._signatures = np.concatenate([self._signatures] + self._blocks)
+            self._blocks = []
+
+    def _buckets(self):
+        self._merge()
+        if self._order is None:
+            flat = self._keys.ravel()
+            self._order = np.argsort(flat, kind="stable")
+            self._sorted_keys = flat[self._order]
+        return self._order, self._sorted_keys
+
+    def candidates(self, signature):
+        """Ids of indexed documents sharing a bucket with signature."""
+        order, sorted_keys = self._buckets()
+        keys = _band_keys(np.asarray(signature, dtype=np.uint32)[None, :])[0]
+        lo = np.searchsorted(sorted_keys, keys, side="left")
+        hi = np.searchsorted(sorted_keys, keys, side="right")
+        found = [order[a:b] for a, b in zip(lo.tolist(), hi.tolist()) if b > a]
+        if not found:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(found) // BANDS)
+
+    def query(self, signature, threshold=None):
+        """[(path, similarity)] for indexed documents at least threshold similar."""
+        threshold = self.threshold if threshold is None else threshold
+        ids = self.candidates(signature)
+        if not len(ids):
+            return []
+        sims = (self.signatures[ids] == signature).mean(axis=1)
+        keep = sims >= threshold
+        hits = sorted(zip(sims[keep].tolist(), ids[keep].tolist()), reverse=True)
+        return [(self.paths[i], round(s, 3)) for s, i in hits]
+
+    def similar_to(self, path, threshold=None):
+        """query() for an indexed document, without the document itself."""
+        own = self._ids[path]
+        return [hit for hit in self.query(self.signatures[own], threshold) if hit[0] != path]
+
+    def clusters(self, threshold=None):
+        """
+        Groups of indexed paths (two or more) connected by pairs at least
+        threshold similar, largest first.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        if len(self.paths) < 2:
+            return []
+        order, sorted_keys = self._buckets()
+        sigs = self._signatures
+        parent = list(range(len(self.paths)))
+
+        def find(i):
+            root = i
+            while parent[root] != root:
+                root = parent[root]
+            while parent[i] != root:
+                parent[i], i = root, parent[i]
+            return root
+
+        # runs of equal keys in sorted order are the buckets; every member
+        # is compared with its bucket's first member, all buckets at once
+        ids = order // BANDS
+        bounds = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        starts = np.concatenate(([0], bounds))
+        sizes = np.diff(np.concatenate((starts, [len(ids)])))
+        run_of = np.repeat(np.arange(len(starts)), sizes)
+        heads = ids[starts][run_of]
+        pair = heads != ids
+        heads, members, runs = heads[pair], ids[pair], run_of[pair]
+
+        matched = np.empty(len(heads), dtype=bool)
+        for lo in range(0, len(heads), PAIR_BLOCK):
+            hi = lo + PAIR_BLOCK
+            sims = (sigs[heads[lo:hi]] == sigs[members[lo:hi]]).mean(axis=1)
+            matched[lo:hi] = sims >= threshold
+
+        n = len(self.paths)
+        for code in np.unique(heads[matched] * n + members[matched]).tolist():
+            a, b = find(code // n), find(code % n)
+            if a != b:
+                parent[b] = a
+
+        # members that missed their head may still match each other
+        left, left_runs = members[~matched], runs[~matched]
+        splits = np.flatnonzero(left_runs[1:] != left_runs[:-1]) + 1
+        for group in np.split(left, splits):
+            pending = np.unique(group)
+            while len(pending) > 1:
+                head, rest = pending[0], pending[1:]
+                hits = (sigs[rest] == sigs[head]).mean(axis=1) >= threshold
+                head_root = find(int(head))
+                for other in rest[hits].tolist():
+                    other_root = find(other)
+                    if other_root != head_root:
+                        parent[other_root] = head_root
+                pending = rest[~hits]
+
+        groups = {}
+        for i in range(len(self.paths)):
+            groups.setdefault(find(i), []).append(i)
+        result = [sorted(self.paths[i] for i in ids) for ids in groups.values() if len(ids) > 1]
+        result.sort(key=lambda paths: (-len(paths), paths[0]))
+        return result
+
+
+# ------------------------------------------------------------
+# Clusters and what they imply for metadata
+# ------------------------------------------------------------
+
+@dataclass
+class SimilarCluster:
+    paths: List[str]
+    similarity: float = 0.0     # lowest estimated similarity to the first member
+    category: str = ""
+    confidence: float = 0.0
+    title: str = ""
+    # per-member metadata with the cluster's category/confidence/title applied
+    metadata: Dict[str, dict] = field(default_factory=dict)
+
+
+def harmonize(paths, metadata):
+    """
+    Returns (category, confidence, title, {path: updated copy of its
+    metadata}) for one cluster. The category is the confidence-weighted
+    vote of the members, with rule categories preferred over generic
+    file-type ones. Members take that category, with a confidence of at
+    least the winners' best scaled by how much of the vote agreed, plus
+    CLUSTER_BONUS (members that already agreed keep theirs plus the
+    bonus). Members whose title only repeats their file name take the
+    title of the most confident member that has a real one. The returned
+    confidence is the highest member's.
+    """
+    votes = {}
+    for path in paths:
+        meta = metadata.get(path) or {}
+        category = meta.get("category") or ""
+        votes[category] = votes.get(category, 0.0) + float(meta.get("confidence") or 0.0)
+    specific = {c: v for c, v in votes.items() if c not in GENERIC_CATEGORIES}
+    pool = specific or votes
+    category = max(sorted(pool), key=lambda c: pool[c])
+    total = sum(votes.values()) or 1.0
+    support = votes[category] / total
+
+    winners = [metadata.get(p) or {} for p in paths
+               if ((metadata.get(p) or {}).get("category") or "") == category]
+    best = max(float(m.get("confidence") or 0.0) for m in winners)
+    floor = round(min(MAX_CONFIDENCE, best * support + CLUSTER_BONUS), 2)
+
+    title = ""
+    for meta in sorted(winners, key=lambda m: -float(m.get("confidence") or 0.0)):
+        candidate = meta.get("title") or ""
+        if candidate and not any(_is_own_stem(p, candidate) for p in paths):
+            title = candidate
+            break
+
+    updated = {}
+    for path in paths:
+        meta = dict(metadata.get(path) or {})
+        agrees = (meta.get("category") or "") == category
+        own = float(meta.get("confidence") or 0.0) if agrees else 0.0
+        meta["category"] = category
+        meta["confidence"] = max(round(min(MAX_CONFIDENCE, own + CLUSTER_BONUS), 2), floor)
+        if title and (not meta.get("title") or _is_own_stem(path, meta["title"])):
+            meta["title"] = title
+        meta["cluster_size"] = len(paths)
+        updated[path] = meta
+    confidence = max(m["confidence"] for m in updated.values())
+    return category, confidence, title, updated
+
+
+def _is_own_stem(path, title):
+    return title == os.path.splitext(os.path.basename(path))[0]
+
+
+def cluster_metadata(metadata, threshold=DEFAULT_THRESHOLD, progress=None) -> List[SimilarCluster]:
+    """
+    Clusters {path: metadata} by the similarity of their excerpts.
+    Documents without enough text are left out. progress(stage, done,
+    total) is called while signatures are computed.
+    """
+    index = SimilarityIndex(threshold)
+    paths, signatures = [], []
+    total = len(metadata)
+    for done, (path, meta) in enumerate(metadata.items(), 1):
+        sig = metadata_signature(meta)
+        if sig is not None:
+            paths.append(path)
+            signatures.append(sig)
+        if progress:
+            progress("signatures", done, total)
+    index.add_many(paths, signatures)
+
+    result = []
+    sigs, ids = index.signatures, index._ids
+    for members in index.clusters():
+        first = sigs[ids[members[0]]]
+        similarity = float((sigs[[ids[p] for p in members[1:]]] == first).mean(axis=1).min())
+        category, confidence, title, updated = harmonize(members, metadata)
+        result.append(SimilarCluster(
+            paths=members, similarity=round(similarity, 3), category=category,
+            confidence=confidence, title=title, metadata=updated,
+        ))
+    return result
+
+
+def is_text_document(path):
+    """True for the file types whose extractors keep an excerpt."""
+    from .filetype_detect import guess_mime
+    try:
+        mime = guess_mime(path) or ""
+    except OSError:
+        return False
+    return mime == "application/pdf" or mime.startswith("text/")
+
+
+def find_similar_in_tree(root, metadata_for=extract_metadata, threshold=DEFAULT_THRESHOLD,
+                         include_hidden=False, progress=None) -> List[SimilarCluster]:
+    """
+    Clusters the PDFs and text files under root. Metadata comes from
+    metadata_for (the cache, for files indexed before). progress(stage,
+    done, total) reports "extract" and then "signatures".
+    """
+    from .index import iter_files
+    paths = [e[0] for e in iter_files(root, include_hidden=include_hidden) if is_text_document(e[0])]
+    metadata = {}
+    for done, path in enumerate(paths, 1):
+        try:
+            metadata[path] = metadata_for(path) or {}
+        except Exception:
+            pass
+        if progress:
+            progress("extract", done, len(paths))
+    return cluster_metadata(metadata, threshold, progress)
+
+
+def apply_to_cache(clusters, cache):
+    """
+    Stores each cluster's harmonized metadata in cache, so the tree's
+    category column, suggestions and renames use it until a file changes.
+    """
+    count = 0
+    for cluster in clusters:
+        for path, meta in cluster.metadata.items():
+            cache.put(path, meta)
+            count += 1
+    return count
+
+
+# ------------------------------------------------------------
+# CLI
+# ------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m workspace_gui.similarity",
+        description="Cluster near-duplicate documents (scans, revisions, re-exports) under a folder.",
+    )
+    parser.add_argument("root", help="folder to scan")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"minimum estimated similarity, 0-1 (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--hidden", action="store_true",
+                        help="include dotfiles and dot-directories")
+    parser.add_argument("--json", action="store_true", help="print clusters as JSON lines")
+    parser.add_argument("--apply", action="store_true",
+                        help="store each cluster's category/confidence in the metadata cache")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.root):
+        parser.error(f"not a directory: {args.root}")
+    if not 0 < args.threshold <= 1:
+        parser.error("--threshold must be between 0 and 1")
+
+    clusters = find_similar_in_tree(args.root, threshold=args.threshold, include_hidden=args.hidden)
+    for cluster in clusters:
+        if args.json:
+            print(json.dumps({
+                "paths": cluster.paths, "similarity": cluster.similarity,
+                "category": cluster.category, "confidence": cluster.confidence,
+                "title": cluster.title,
+            }))
+        else:
+            print(f"{cluster.category or '-':<12} {cluster.confidence:.2f}  "
+                  f"~{cluster.similarity:.0%} x {len(cluster.paths)}  {cluster.title}")
+            for path in cluster.paths:
+                print(f"    {path}")
+    if args.apply:
+        from .metadata_cache import get_default_cache
+        cache = get_default_cache()
+        if cache is None:
+            print("metadata cache unavailable; nothing applied", file=sys.stderr)
+        else:
+            print(f"updated {apply_to_cache(clusters, cache)} cache entries", file=sys.stderr)
+            cache.flush()
+    members = sum(len(c.paths) for c in clusters)
+    print(f"{len(clusters)} clusters, {members} documents", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""
+Startup timing for `python app.py --profile-startup`.
+
+Records:
+  - inclusive import time of every module imported while enabled
+  - named sections (app setup, widget construction, ...)
+A report is printed to stderr once the window is up.
+"""
+import builtins
+import importlib.util
+import sys
+import time
+from contextlib import contextmanager
+
+_enabled = False
+_sections = []
+_imports = {}
+_depth = 0
+_original_import = builtins.__import__
+
+
+def enabled():
+    return _enabled
+
+
+def enable():
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+    builtins.__import__ = _timed_import
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    builtins.__import__ = _original_import
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    global _depth
+    key = name
+    if level:
+        try:
+            package = (globals or {}).get("__package__")
+            key = importlib.util.resolve_name("." * level + name, package)
+        except (ImportError, ValueError):
+            key = name
+    if not key or key in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+
+    _depth += 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        _depth -= 1
+        if key not in _imports:
+            _imports[key] = (elapsed, _depth)
+
+
+@contextmanager
+def section(name):
+    """
+    Times a block of startup work. Costs one flag check when disabled.
+    """
+    if not _enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _sections.append((name, time.perf_counter() - start))
+
+
+def report(top=25):
+    lines = ["", "Startup profile", "=" * 60, "Sections:"]
+    for name, elapsed in _sections:
+        lines.append(f"  {elapsed * 1000:9.1f} ms  {name}")
+
+    lines.append("")
+    lines.append(f"Slowest imports (inclusive, top {top}):")
+    ranked = sorted(_imports.items(), key=lambda kv: kv[1][0], reverse=True)
+    for name, (elapsed, depth) in ranked[:top]:
+        marker = "" if depth == 0 else "  (nested)"
+        lines.append(f"  {elapsed * 1000:9.1f} ms  {name}{marker}")
+    lines.append("=" * 60)
+    return "\n".join(lines)
+
+
+def print_report(top=25):
+    print(report(top), file=sys.stderr, flush=True)
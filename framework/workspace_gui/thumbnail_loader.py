@@ -0,0 +1,137 @@
+import os
+from collections import OrderedDict
+from functools import partial
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtGui import QImage
+
+from .scheduler import INTERACTIVE, PREFETCH, get_default_scheduler
+from .thumbnails import THUMB_SIZE, can_thumbnail, get_thumbnail
+
+MEMORY_ENTRIES = 128
+
+
+class _ThumbnailSignals(QObject):
+    finished = pyqtSignal(str, int, object)
+
+
+def _load_image(path, cache, size):
+    """
+    Loads (or renders) one thumbnail and decodes it to a QImage on a
+    worker thread; the GUI thread only has to wrap it in a QPixmap.
+    """
+    try:
+        data = get_thumbnail(path, cache, size)
+        if data:
+            image = QImage.fromData(data)
+            if not image.isNull():
+                return image
+    except Exception:
+        pass
+    return None
+
+
+class ThumbnailLoader(QObject):
+    """
+    Serves previews for the selected file:
+      - decoded thumbnails are kept in a small in-memory LRU, so a warm
+        request is answered synchronously
+      - misses are rendered as interactive jobs on the shared scheduler
+        (disk cache first)
+      - prefetch() warms neighbouring files as prefetch jobs
+    Emits: thumbnail_ready(path: str, image: QImage)
+    """
+    thumbnail_ready = pyqtSignal(str, object)
+
+    def __init__(self, cache=None, size=THUMB_SIZE, parent=None,
+                 memory_entries=MEMORY_ENTRIES, scheduler=None):
+        super().__init__(parent)
+        self.cache = cache
+        self.size = size
+        self.memory_entries = memory_entries
+        self.current = None
+        self.scheduler = scheduler or get_default_scheduler()
+
+        self._signals = _ThumbnailSignals()
+        self._signals.finished.connect(self._on_finished)
+
+        self._memory = OrderedDict()
+        self._pending = {}       # path -> (job, callback)
+        self._prefetching = set()
+
+    def request(self, path):
+        self.current = path
+        if not can_thumbnail(path):
+            return
+        mtime_ns = self._mtime(path)
+        if mtime_ns is None:
+            return
+
+        image = self._remembered(path, mtime_ns)
+        if image is not None:
+            self.thumbnail_ready.emit(path, image)
+            return
+
+        if path in self._pending:
+            if path in self._prefetching:
+                # promote a queued prefetch instead of rendering twice
+                self._prefetching.discard(path)
+                self.scheduler.promote(("thumbnail", path), INTERACTIVE)
+            return
+        self._start(path, mtime_ns, INTERACTIVE)
+
+    def prefetch(self, paths):
+        # neighbours of the previous selection are no longer interesting
+        for path in list(self._prefetching):
+            entry = self._pending.get(path)
+            if entry is not None and self.scheduler.cancel(*entry):
+                del self._pending[path]
+            self._prefetching.discard(path)
+
+        for path in paths:
+            if path in self._pending or not can_thumbnail(path):
+                continue
+            mtime_ns = self._mtime(path)
+            if mtime_ns is None or self._remembered(path, mtime_ns) is not None:
+                continue
+            self._prefetching.add(path)
+            self._start(path, mtime_ns, PREFETCH)
+
+    def _start(self, path, mtime_ns, priority):
+        callback = partial(self._report, mtime_ns)
+        job = self.scheduler.submit(
+            _load_image, path, self.cache, self.size, key=("thumbnail", path),
+            priority=priority, root=os.path.dirname(path), callback=callback,
+            name="thumbnail",
+        )
+        self._pending[path] = (job, callback)
+
+    def _report(self, mtime_ns, job):
+        # worker thread
+        self._signals.finished.emit(job.args[0], mtime_ns, job.result)
+
+    def _on_finished(self, path, mtime_ns, image):
+        self._pending.pop(path, None)
+        self._prefetching.discard(path)
+        if image is None:
+            return
+        self._memory[path] = (mtime_ns, image)
+        self._memory.move_to_end(path)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+        if path == self.current:
+            self.thumbnail_ready.emit(path, image)
+
+    def _remembered(self, path, mtime_ns):
+        entry = self._memory.get(path)
+        if entry is None or entry[0] != mtime_ns:
+            return None
+        self._memory.move_to_end(path)
+        return entry[1]
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
@@ -0,0 +1,245 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from .extractor_registry import lazy_import
+
+THUMB_SIZE = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+SIGNATURE_BLOCK = 64 * 1024
+
+IMAGE_EXTENSIONS = {
+    ".jpg", ".jpeg", ".png", ".gif", ".bmp", ".tif", ".tiff", ".webp",
+}
+PDF_EXTENSIONS = {".pdf"}
+
+
+def default_thumbnail_dir():
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(base_dir, "config", "thumbnails")
+
+
+def can_thumbnail(path):
+    ext = os.path.splitext(path)[1].lower()
+    return ext in IMAGE_EXTENSIONS or ext in PDF_EXTENSIONS
+
+
+# ------------------------------------------------------------
+# Content signature
+# ------------------------------------------------------------
+
+def content_signature(path, st=None, block_size=SIGNATURE_BLOCK):
+    """
+    Cheap content key: size plus a hash of the first and last block.
+    Survives renames and copies; reads at most 2 * block_size bytes.
+    """
+    if st is None:
+        st = os.stat(path)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(st.st_size).encode())
+    with open(path, "rb") as f:
+        h.update(f.read(block_size))
+        if st.st_size > block_size:
+            f.seek(max(block_size, st.st_size - block_size))
+            h.update(f.read(block_size))
+    return h.hexdigest()
+
+
+# ------------------------------------------------------------
+# Rendering
+# ------------------------------------------------------------
+
+def render_thumbnail(path, size=THUMB_SIZE):
+    """
+    Returns encoded thumbnail bytes (JPEG, or PNG when there is alpha)
+    no larger than size x size, or None if the file can't be previewed.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext in PDF_EXTENSIONS:
+            return _render_pdf(path, size)
+        if ext in IMAGE_EXTENSIONS:
+            return _render_image(path, size)
+    except Exception:
+        return None
+    return None
+
+
+def _render_image(path, size):
+    Image = lazy_import("PIL.Image")
+    if not Image:
+        return None
+    with Image.open(path) as img:
+        # JPEG decoders can scale by 1/2..1/8 while decoding, so large
+        # photos never get decoded at full resolution
+        img.draft("RGB", (size, size))
+        img.thumbnail((size, size))
+        return _encode(_upright(img))
+
+
+def _render_pdf(path, size):
+    fitz = lazy_import("fitz")
+    if fitz:
+        with fitz.open(path) as doc:
+            if doc.page_count == 0:
+                return None
+            page = doc.load_page(0)
+            zoom = size / max(page.rect.width, page.rect.height, 1)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return pix.tobytes("png")
+
+    # without PyMuPDF: use the first image embedded on the first page
+    PdfReader = lazy_import("PyPDF2", "PdfReader")
+    Image = lazy_import("PIL.Image")
+    if not PdfReader or not Image:
+        return None
+    reader = PdfReader(path)
+    if not reader.pages:
+        return None
+    for embedded in getattr(reader.pages[0], "images", []):
+        with Image.open(io.BytesIO(embedded.data)) as img:
+            img.draft("RGB", (size, size))
+            img.thumbnail((size, size))
+            return _encode(img)
+    return None
+
+
+def _upright(img):
+    ImageOps = lazy_import("PIL.ImageOps")
+    if not ImageOps:
+        return img
+    try:
+        return ImageOps.exif_transpose(img)
+    except Exception:
+        return img
+
+
+def _encode(img):
+    out = io.BytesIO()
+    if img.mode in ("RGBA", "LA") or "transparency" in img.info:
+        img.convert("RGBA").save(out, "PNG", compress_level=1)
+    else:
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        img.save(out, "JPEG", quality=85)
+    return out.getvalue()
+
+
+# ------------------------------------------------------------
+# On-disk cache
+# ------------------------------------------------------------
+
+class ThumbnailCache:
+    """
+    Size-bounded directory of rendered thumbnails, one file per
+    (content signature, size). Least recently used files are removed
+    once max_bytes is exceeded.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_thumbnail_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._files = OrderedDict()
+        self.total_bytes = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        existing = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".thumb"):
+                    st = entry.stat()
+                    existing.append((st.st_mtime, entry.name, st.st_size))
+        for _, name, nbytes in sorted(existing):
+            self._files[name] = nbytes
+            self.total_bytes += nbytes
+
+    def _name(self, signature, size):
+        return f"{signature}-{size}.thumb"
+
+    def get(self, signature, size=THUMB_SIZE):
+        name = self._name(signature, size)
+        with self._lock:
+            if name not in self._files:
+                self.misses += 1
+                return None
+            self._files.move_to_end(name)
+        path = os.path.join(self.cache_dir, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.total_bytes -= self._files.pop(name, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, signature, data, size=THUMB_SIZE):
+        name = self._name(signature, size)
+        path = os.path.join(self.cache_dir, name)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        with self._lock:
+            self.total_bytes += len(data) - self._files.pop(name, 0)
+            self._files[name] = len(data)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "entries": len(self._files),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _evict(self):
+        # caller holds the lock; drop to 90% like the metadata cache
+        target = int(self.max_bytes * 0.9)
+        while self._files and self.total_bytes > target:
+            name, nbytes = self._files.popitem(last=False)
+            self.total_bytes -= nbytes
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+
+def get_thumbnail(path, cache=None, size=THUMB_SIZE):
+    """
+    Returns thumbnail bytes for path, rendering and storing them on a
+    cache miss. None if the file can't be previewed.
+    """
+    try:
+        st = os.stat(path)
+        signature = content_signature(path, st)
+    except OSError:
+        return None
+
+    if cache is not None:
+        data = cache.get(signature, size)
+        if data is not None:
+            return data
+
+    data = render_thumbnail(path, size)
+    if data and cache is not None:
+        cache.put(signature, data, size)
+    return data
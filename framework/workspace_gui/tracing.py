@@ -0,0 +1,189 @@
+"""
+Lightweight tracing for hot paths.
+
+    @traced("exif.read_headers", arg=0)
+    def read_exif(path, tags=DEFAULT_TAGS): ...
+
+    with span("mimetypes.guess_type"):
+        ...
+
+While disabled, traced functions cost one flag check and span() returns
+a shared no-op context manager. While enabled, every call is recorded
+(name, start, duration, thread, args) in a fixed-size ring buffer that
+the performance panel reads and that can be exported as a Chrome trace
+(chrome://tracing, Perfetto).
+"""
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+DEFAULT_CAPACITY = 5000
+
+_enabled = False
+_events = deque(maxlen=DEFAULT_CAPACITY)
+_lock = threading.Lock()
+_clock = time.perf_counter_ns
+
+
+def enabled():
+    return _enabled
+
+
+def enable(capacity=None):
+    global _enabled, _events
+    with _lock:
+        if capacity and capacity != _events.maxlen:
+            _events = deque(_events, maxlen=capacity)
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def clear():
+    with _lock:
+        _events.clear()
+
+
+def record(name, start_ns, duration_ns, args=None):
+    event = (name, start_ns, duration_ns, threading.get_ident(), args)
+    with _lock:
+        _events.append(event)
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = _clock()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, self.start, _clock() - self.start, self.args)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name, **args):
+    """Context manager timing a block; a shared no-op while disabled."""
+    if not _enabled:
+        return _NOOP
+    return _Span(name, args or None)
+
+
+def traced(name=None, arg=None):
+    """
+    Decorator recording every call of the function.
+    arg: index of a positional argument to keep with the event, usually
+    the path (only its basename is stored).
+    """
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def wrapper(*a, **kw):
+            if not _enabled:
+                return fn(*a, **kw)
+            start = _clock()
+            try:
+                return fn(*a, **kw)
+            finally:
+                args = None
+                if arg is not None and len(a) > arg:
+                    value = a[arg]
+                    if isinstance(value, str):
+                        args = {"path": os.path.basename(value)}
+                    else:
+                        args = {"arg": repr(value)[:80]}
+                record(label, start, _clock() - start, args)
+
+        return wrapper
+
+    return decorate
+
+
+# ------------------------------------------------------------
+# Reading the buffer
+# ------------------------------------------------------------
+
+def events():
+    """Snapshot of the ring buffer, oldest first:
+    [(name, start_ns, duration_ns, thread_id, args)]."""
+    with _lock:
+        return list(_events)
+
+
+def recent(n=200):
+    with _lock:
+        return list(_events)[-n:]
+
+
+def summary(evts=None):
+    """
+    Per-name totals, slowest total first:
+    [(name, count, total_ms, mean_ms, max_ms)].
+    Nested spans are counted in their own row and in their parent's.
+    """
+    stats = {}
+    for name, _, duration, _, _ in (events() if evts is None else evts):
+        entry = stats.get(name)
+        if entry is None:
+            stats[name] = [1, duration, duration]
+        else:
+            entry[0] += 1
+            entry[1] += duration
+            if duration > entry[2]:
+                entry[2] = duration
+    rows = [
+        (name, count, total / 1e6, total / count / 1e6, peak / 1e6)
+        for name, (count, total, peak) in stats.items()
+    ]
+    rows.sort(key=lambda r: r[2], reverse=True)
+    return rows
+
+
+def chrome_trace(evts=None):
+    """Returns the events as a Chrome trace-event document."""
+    pid = os.getpid()
+    trace = []
+    for name, start, duration, tid, args in (events() if evts is None else evts):
+        event = {
+            "name": name,
+            "cat": name.split(".", 1)[0],
+            "ph": "X",
+            "ts": start / 1000.0,
+            "dur": duration / 1000.0,
+            "pid": pid,
+            "tid": tid,
+        }
+        if args:
+            event["args"] = args
+        trace.append(event)
+    return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(path, evts=None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(evts), f)
+    return path
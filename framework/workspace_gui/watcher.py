@@ -0,0 +1,361 @@
+import os
+import threading
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from .metadata_engine import extract_metadata
+from .scheduler import BACKGROUND, file_io_bytes, get_default_scheduler
+
+DEBOUNCE_MS = 750
+POLL_INTERVAL_MS = 30000
+# inotify watches are a per-user kernel resource; directories beyond this
+# are covered by the polling fallback instead.
+MAX_WATCHED_DIRS = 2000
+# the initial snapshot stops here; deeper folders simply aren't tracked
+MAX_SNAPSHOT_DIRS = 20000
+
+
+# ------------------------------------------------------------
+# Directory snapshots (no Qt)
+# ------------------------------------------------------------
+
+def scan_dir(path):
+    """
+    Returns ({file_name: (size, mtime_ns, inode)}, {subdir_name, ...}) for
+    one directory, or (None, None) if it can't be listed.
+    """
+    files = {}
+    subdirs = set()
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.add(entry.name)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        files[entry.name] = (st.st_size, st.st_mtime_ns, st.st_ino)
+                except OSError:
+                    continue
+    except OSError:
+        return None, None
+    return files, subdirs
+
+
+def scan_tree(root, max_dirs=None):
+    """
+    Snapshots root and its subdirectories breadth-first.
+    Returns {dir_path: (files, subdirs)}.
+    """
+    snapshots = {}
+    queue = [root]
+    while queue:
+        current = queue.pop(0)
+        files, subdirs = scan_dir(current)
+        if files is None:
+            continue
+        snapshots[current] = (files, subdirs)
+        if max_dirs is not None and len(snapshots) >= max_dirs:
+            break
+        queue.extend(os.path.join(current, d) for d in sorted(subdirs))
+    return snapshots
+
+
+class ChangeSet:
+    def __init__(self):
+        self.created = []
+        self.modified = []
+        self.deleted = []
+        self.renamed = []
+        self.new_dirs = []
+        self.gone_dirs = []
+
+    def __bool__(self):
+        return bool(self.created or self.modified or self.deleted or self.renamed)
+
+
+def diff_snapshots(changes, folder, old, new):
+    """
+    Adds the differences between two snapshots of folder to changes.
+    """
+    old_files, old_dirs = old
+    new_files, new_dirs = new
+
+    for name, sig in new_files.items():
+        prev = old_files.get(name)
+        path = os.path.join(folder, name)
+        if prev is None:
+            changes.created.append((path, sig))
+        elif prev[:2] != sig[:2]:
+            changes.modified.append(path)
+    for name, sig in old_files.items():
+        if name not in new_files:
+            changes.deleted.append((os.path.join(folder, name), sig))
+
+    changes.new_dirs.extend(os.path.join(folder, d) for d in new_dirs - old_dirs)
+    changes.gone_dirs.extend(os.path.join(folder, d) for d in old_dirs - new_dirs)
+
+
+def collect_changes(olds, max_new_dirs=MAX_SNAPSHOT_DIRS):
+    """
+    Rescans the folders in olds ({dir_path: snapshot}) and snapshots any
+    new subdirectories, up to max_new_dirs of them. Returns
+    (changes, {dir_path: new snapshot}); folders that vanished are in
+    changes.gone_dirs and not in the result. Touches nothing else, so it
+    can run off the GUI thread.
+    """
+    changes = ChangeSet()
+    snapshots = {}
+    for folder, old in olds.items():
+        files, subdirs = scan_dir(folder)
+        if files is None:
+            changes.gone_dirs.append(folder)
+            files, subdirs = {}, set()
+        else:
+            snapshots[folder] = (files, subdirs)
+        diff_snapshots(changes, folder, old, (files, subdirs))
+
+    # new directories: snapshot them and report their files as created
+    for folder in changes.new_dirs:
+        if max_new_dirs <= 0:
+            break
+        tree = scan_tree(folder, max_new_dirs)
+        max_new_dirs -= len(tree)
+        for path, snap in tree.items():
+            snapshots[path] = snap
+            for name, sig in snap[0].items():
+                changes.created.append((os.path.join(path, name), sig))
+    return changes, snapshots
+
+
+def pair_renames(changes):
+    """
+    Turns delete + create pairs with the same inode and size into renames.
+    """
+    by_inode = {}
+    for path, sig in changes.deleted:
+        by_inode[(sig[2], sig[0])] = path
+
+    created = []
+    for path, sig in changes.created:
+        old_path = by_inode.pop((sig[2], sig[0]), None)
+        if old_path is not None:
+            changes.renamed.append((old_path, path))
+        else:
+            created.append((path, sig))
+
+    renamed_from = {old for old, _ in changes.renamed}
+    changes.created = created
+    changes.deleted = [(p, s) for p, s in changes.deleted if p not in renamed_from]
+    return changes
+
+
+# ------------------------------------------------------------
+# Qt watcher
+# ------------------------------------------------------------
+
+class WorkspaceWatcher(QObject):
+    """
+    Watches a folder tree and reports file changes in debounced batches.
+      - QFileSystemWatcher on up to MAX_WATCHED_DIRS directories
+      - os.scandir polling for directories it can't watch
+      - rescans and snapshots of new folders run on a background thread
+      - delete + create of the same inode is reported as a rename
+    Emits:
+      files_changed(list of paths)        new or modified files
+      files_removed(list of paths)
+      files_renamed(list of (old, new))
+    """
+    files_changed = pyqtSignal(list)
+    files_removed = pyqtSignal(list)
+    files_renamed = pyqtSignal(list)
+    _snapshot_ready = pyqtSignal(str, dict)
+    _changes_ready = pyqtSignal(int, object, dict)
+
+    def __init__(self, parent=None, poll_interval_ms=POLL_INTERVAL_MS):
+        super().__init__(parent)
+        self.root = None
+        self._snapshots = {}
+        self._dirty = set()
+        self._polled = set()
+        self._generation = 0
+        self._scanning = False
+
+        self._fs = QFileSystemWatcher(self)
+        self._fs.directoryChanged.connect(self._on_directory_changed)
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._flush)
+
+        self._poll = QTimer(self)
+        self._poll.setInterval(poll_interval_ms)
+        self._poll.timeout.connect(self._on_poll)
+
+        self._snapshot_ready.connect(self._on_snapshot_ready)
+        self._changes_ready.connect(self._on_changes_ready)
+
+    def watch(self, root):
+        """
+        Starts watching root. The initial snapshot is taken on a
+        background thread; changes are reported once it is in place.
+        """
+        self.stop()
+        self.root = root
+        threading.Thread(
+            target=lambda: self._snapshot_ready.emit(root, scan_tree(root, MAX_SNAPSHOT_DIRS)),
+            name="watcher-snapshot",
+            daemon=True,
+        ).start()
+
+    def stop(self):
+        dirs = self._fs.directories()
+        if dirs:
+            self._fs.removePaths(dirs)
+        self._snapshots.clear()
+        self._dirty.clear()
+        self._polled.clear()
+        self._poll.stop()
+        self._debounce.stop()
+        self._generation += 1     # results of a rescan in flight are dropped
+        self._scanning = False
+        self.root = None
+
+    def _on_snapshot_ready(self, root, snapshots):
+        if root != self.root:
+            return  # superseded by a newer watch()
+        self._snapshots = snapshots
+        self._add_dirs(list(snapshots))
+
+    def _add_dirs(self, dirs):
+        room = MAX_WATCHED_DIRS - len(self._fs.directories())
+        to_watch, to_poll = dirs[:max(room, 0)], dirs[max(room, 0):]
+        if to_watch:
+            failed = self._fs.addPaths(to_watch)
+            to_poll.extend(failed)
+        self._polled.update(to_poll)
+        if self._polled and not self._poll.isActive():
+            self._poll.start()
+
+    def _on_directory_changed(self, path):
+        self._dirty.add(path)
+        self._debounce.start()
+
+    def _on_poll(self):
+        self._dirty.update(self._polled)
+        self._flush()
+
+    def _flush(self):
+        # one rescan at a time; folders marked dirty meanwhile wait for
+        # the next one
+        if self._scanning or not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        olds = {f: self._snapshots[f] for f in dirty if f in self._snapshots}
+        if not olds:
+            return
+        room = MAX_SNAPSHOT_DIRS - len(self._snapshots)
+        generation = self._generation
+        self._scanning = True
+        threading.Thread(
+            target=lambda: self._changes_ready.emit(generation, *collect_changes(olds, room)),
+            name="watcher-rescan",
+            daemon=True,
+        ).start()
+
+    def _on_changes_ready(self, generation, changes, snapshots):
+        if generation != self._generation:
+            return  # stopped or re-rooted since the rescan started
+        self._scanning = False
+
+        new_dirs = [p for p in snapshots if p not in self._snapshots]
+        self._snapshots.update(snapshots)
+        if new_dirs:
+            self._add_dirs(new_dirs)
+
+        # removed directories: everything under them is gone
+        for folder in changes.gone_dirs:
+            prefix = folder + os.sep
+            for path in [p for p in self._snapshots if p == folder or p.startswith(prefix)]:
+                snap_files, _ = self._snapshots.pop(path)
+                for name, sig in snap_files.items():
+                    changes.deleted.append((os.path.join(path, name), sig))
+                self._polled.discard(path)
+                if path in self._fs.directories():
+                    self._fs.removePath(path)
+
+        # a vanished folder can be reported by its own diff and its parent's
+        changes.deleted = list(dict(changes.deleted).items())
+        pair_renames(changes)
+
+        if changes.renamed:
+            self.files_renamed.emit(changes.renamed)
+        if changes.deleted:
+            self.files_removed.emit([p for p, _ in changes.deleted])
+        changed = [p for p, _ in changes.created] + changes.modified
+        if changed:
+            self.files_changed.emit(changed)
+
+        if self._dirty:
+            self._debounce.start()
+
+
+# ------------------------------------------------------------
+# Keeping cache + search index in sync
+# ------------------------------------------------------------
+
+class IncrementalUpdater(QObject):
+    """
+    Applies watcher events (and renames done in the app) to the metadata
+    cache and the search index. Only new or changed files are re-extracted,
+    as background jobs on the shared scheduler: one job per file, so a file
+    that changes again before its turn is extracted once, and the work
+    waits while the user is busy.
+    """
+
+    def __init__(self, cache=None, search_index=None, parent=None, scheduler=None,
+                 extract=extract_metadata):
+        super().__init__(parent)
+        self.cache = cache
+        self.search_index = search_index
+        self.scheduler = scheduler or get_default_scheduler()
+        self.extract = extract
+        self.root = None
+
+    def set_root(self, root):
+        """Quota bucket for the jobs (the folder shown in the tree)."""
+        self.root = root
+
+    def on_files_changed(self, paths):
+        for path in paths:
+            # stale cache rows fail the size/mtime check and are
+            # re-extracted; listeners refresh the search index
+            self.scheduler.submit(
+                self.extract, path, key=("extract", path), priority=BACKGROUND,
+                root=self.root, io_bytes=file_io_bytes(path), name="reextract",
+            )
+
+    def on_files_removed(self, paths):
+        for path in paths:
+            if self.cache is not None:
+                self.cache.invalidate(path)
+            if self.search_index is not None:
+                self.search_index.remove(path)
+
+    def on_files_renamed(self, pairs):
+        for old_path, new_path in pairs:
+            self.on_file_renamed(old_path, new_path)
+
+    def on_file_renamed(self, old_path, new_path):
+        if self.cache is not None:
+            self.cache.rename(old_path, new_path)
+        if self.search_index is not None:
+            self.search_index.rename(old_path, new_path)
+
+    def connect_watcher(self, watcher):
+        watcher.files_changed.connect(self.on_files_changed)
+        watcher.files_removed.connect(self.on_files_removed)
+        watcher.files_renamed.connect(self.on_files_renamed)